@@ -5,24 +5,178 @@ Uses Vosk for speech-to-text and OpenAI for generating questions
 Detects when user finishes speaking using silence detection
 """
 
-import pyaudio
 import json
-from vosk import Model, KaldiRecognizer
 import sys
 import time
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
 from elevenlabs.client import ElevenLabs
-from elevenlabs import stream
 from concurrent.futures import ThreadPoolExecutor
+import queue
 import threading
+from stt_engine import create_recognizer
+from conversation_context import ConversationContext
+from reaction_bank import REACTION_SYSTEM_PROMPT
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None  # only the live interview needs audio I/O; batch_grade.py does not
 
 load_dotenv()
 
+QUESTION_SYSTEM_PROMPT = """You are a friendly AI interviewer conducting a casual conversation.
+Ask one question at a time. Keep questions natural and conversational.
+Ask about the person's background, interests, goals, or experiences.
+Build on their previous answers."""
+
+CODE_FEEDBACK_SYSTEM_PROMPT = """You are a technical interviewer reviewing code written under time pressure and strict circumstances.
+                    
+                    Focus on:
+                    1. Overall approach and logic
+                    2. Algorithm correctness (does the logic make sense?)
+                    3. Time and space complexity analysis
+                    4. Potential optimizations
+                    5. Problem-solving approach
+                    
+                    Be lenient about:
+                    - Minor syntax errors (they're coding under pressure)
+                    - Missing semicolons, brackets, or small typos
+                    - Variable naming inconsistencies
+                    
+                    Be encouraging and constructive. Focus on the algorithmic thinking rather than perfect syntax.
+                    Keep your feedback conversational and under 200 words."""
+
+
+def generate_reaction(client, answer, raise_errors=False):
+    """Brief AI reaction to an answer (shared by the live interview and batch_grade.py)
+
+    raise_errors: Raise API errors instead of returning a generic reaction
+    """
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": REACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"They said: {answer}"}
+            ],
+            max_tokens=25,
+            temperature=0.7
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"⚠️  Reaction generation error: {e}")
+        return "That's great to hear!"
+
+
+def generate_code_feedback(client, code, raise_errors=False):
+    """Detailed feedback on submitted code (shared by the live interview and batch_grade.py)
+
+    raise_errors: Raise API errors instead of returning a placeholder message
+    """
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": CODE_FEEDBACK_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Please review this code written under interview conditions:\n\n{code}"}
+            ],
+            max_tokens=400,
+            temperature=0.7
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"⚠️  Feedback generation error: {e}")
+        return "Unable to generate feedback at this time."
+
+
+def interview_document(responses, code_review=None, turn_timings=(), prompt_tokens=()):
+    """The saved interview_responses_*.json structure"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_questions": len(responses),
+        "responses": responses,
+        "turn_timings": list(turn_timings),
+        "prompt_tokens": list(prompt_tokens),
+        "code_review": code_review
+    }
+
+
+class Playback:
+    """Handle for one queued clip; the events fire when its first sample is written and when it ends"""
+    
+    def __init__(self, source):
+        self.source = source
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+
+
+class AudioPlayer:
+    """Plays queued 16-bit mono PCM clips back to back on one long-lived output stream
+    
+    play() returns immediately, so the caller can keep working (listening, generating the
+    next reply) while audio is still coming out of the speakers."""
+    
+    def __init__(self, pa, rate=16000):
+        self.stream = pa.open(format=pyaudio.paInt16, channels=1, rate=rate, output=True)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def play(self, source):
+        """Queue PCM bytes or an iterator of PCM chunks; returns a Playback handle"""
+        playback = Playback(source)
+        self._queue.put(playback)
+        return playback
+    
+    def _run(self):
+        while True:
+            playback = self._queue.get()
+            if playback is None:
+                break
+            chunks = [playback.source] if isinstance(playback.source, bytes) else playback.source
+            carry = b""
+            try:
+                for chunk in chunks:
+                    # Streamed chunks can split a sample; hold the odd byte for the next write
+                    data = carry + chunk
+                    cut = len(data) - len(data) % 2
+                    carry = data[cut:]
+                    if not cut:
+                        continue
+                    if not playback.started.is_set():
+                        playback.started_at = time.time()
+                        playback.started.set()
+                    self.stream.write(data[:cut])
+            except Exception as e:
+                print(f"⚠️  Playback Error: {e}")
+            finally:
+                playback.finished_at = time.time()
+                if playback.started_at is None:
+                    playback.started_at = playback.finished_at
+                playback.started.set()
+                playback.done.set()
+    
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self.stream.stop_stream()
+        self.stream.close()
+
 
 class AIInterviewer:
     def __init__(self, model_path="model", questions_file="interview_questions.json"):
+        if pyaudio is None:
+            print("PyAudio is required for the live interview (see README); batch_grade.py grades recordings without it")
+            sys.exit(1)
+        
         # Initialize OpenAI
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         
@@ -30,23 +184,14 @@ class AIInterviewer:
         self.elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API"))
         self.voice_id = "hzLyDn3IrvrdH83BdqUu"
         
-        # Load questions
+        # Load questions; after the file runs out, ask_question writes up to GENERATED_QUESTIONS follow-ups
         self.questions = self.load_questions(questions_file)
         self.current_question_index = 0
+        self.generated_questions = int(os.getenv("GENERATED_QUESTIONS", 0))
         
-        # Thread pool for parallel processing
+        # Background TTS fetches (next question's audio is fetched during the current answer)
         self.executor = ThreadPoolExecutor(max_workers=2)
         
-        # Initialize Vosk
-        print(f"Loading Vosk model from '{model_path}'...")
-        try:
-            self.vosk_model = Model(model_path)
-            print("Model loaded!\n")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            print("Please download vosk-model-en-us-0.22 and extract to 'model/' directory")
-            sys.exit(1)
-        
         # Audio settings
         self.CHUNK = 4000
         self.FORMAT = pyaudio.paInt16
@@ -58,13 +203,33 @@ class AIInterviewer:
         self.MIN_ANSWER_LENGTH = 10  # minimum characters for a valid answer
         self.last_speech_time = time.time()
         
+        # Initialize Vosk (shared through the model registry)
+        try:
+            self.recognizer = create_recognizer("vosk", self.RATE, model_path=model_path)
+            print()
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            print("Please download vosk-model-en-us-0.22 and extract to 'model/' directory")
+            sys.exit(1)
+        
         self.pyaudio = pyaudio.PyAudio()
-        self.recognizer = KaldiRecognizer(self.vosk_model, self.RATE)
-        self.recognizer.SetWords(True)
+        
+        # Output queue for TTS audio and one microphone stream kept open for the whole interview
+        self.TTS_RATE = 16000
+        self.player = AudioPlayer(self.pyaudio, rate=self.TTS_RATE)
+        self.mic = None
         
         # Interview state
         self.conversation_history = []
         self.responses = []
+        self.turn_timings = []
+        
+        # Prompt context for generated questions: recent turns verbatim, older ones summarized
+        self.context = ConversationContext(
+            self.client,
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", 2048)),
+            keep_recent=int(os.getenv("CONTEXT_KEEP_RECENT", 3))
+        )
     
     def load_questions(self, questions_file):
         """Load questions from JSON file"""
@@ -84,29 +249,24 @@ class AIInterviewer:
             ]
     
     def get_next_question(self):
-        """Get the next hardcoded question"""
+        """Get the next question from the file, then generated follow-ups"""
         if self.current_question_index < len(self.questions):
             question = self.questions[self.current_question_index]
             self.current_question_index += 1
             return question
+        if self.current_question_index < len(self.questions) + self.generated_questions:
+            try:
+                question = self.ask_question()
+            except Exception as e:
+                print(f"⚠️  Error generating question: {e}")
+                return None
+            self.current_question_index += 1
+            return question
         return None
     
     def generate_reaction(self, answer):
         """Generate a brief AI reaction to the user's answer"""
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a warm, friendly interviewer. Give a brief, positive acknowledgment in 1 sentence. Be encouraging and supportive but keep it general and vague. Don't reference specific details from their answer. Keep it under 12 words. DO NOT ask any questions or follow-ups."},
-                    {"role": "user", "content": f"They said: {answer}"}
-                ],
-                max_tokens=25,
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"⚠️  Reaction generation error: {e}")
-            return "That's great to hear!"
+        return generate_reaction(self.client, answer)
     
     def load_code_submission(self, code_string=None, code_file="code_submission.py"):
         """Load code submission for review - accepts string or file"""
@@ -122,35 +282,7 @@ class AIInterviewer:
     
     def generate_code_feedback(self, code):
         """Generate detailed feedback on submitted code"""
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": """You are a technical interviewer reviewing code written under time pressure and strict circumstances.
-                    
-                    Focus on:
-                    1. Overall approach and logic
-                    2. Algorithm correctness (does the logic make sense?)
-                    3. Time and space complexity analysis
-                    4. Potential optimizations
-                    5. Problem-solving approach
-                    
-                    Be lenient about:
-                    - Minor syntax errors (they're coding under pressure)
-                    - Missing semicolons, brackets, or small typos
-                    - Variable naming inconsistencies
-                    
-                    Be encouraging and constructive. Focus on the algorithmic thinking rather than perfect syntax.
-                    Keep your feedback conversational and under 200 words."""},
-                    {"role": "user", "content": f"Please review this code written under interview conditions:\n\n{code}"}
-                ],
-                max_tokens=400,
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"⚠️  Feedback generation error: {e}")
-            return "Unable to generate feedback at this time."
+        return generate_code_feedback(self.client, code)
     
     def run_code_review(self, code_string=None, code_file="code_submission.py"):
         """Run the code review phase - accepts code as string or from file"""
@@ -159,9 +291,8 @@ class AIInterviewer:
         print("=" * 60)
         print("\n🤖 AI: Now let's review your code submission.\n")
         
-        # Speak transition
+        # Speak transition (returns once playback has finished)
         self.speak("Now let's review your code submission.")
-        time.sleep(1)
         
         # Load code (from string or file)
         code = self.load_code_submission(code_string, code_file)
@@ -195,32 +326,55 @@ class AIInterviewer:
             "code": code,
             "feedback": feedback
         }
-        
-    def speak(self, text):
-        """Use ElevenLabs to speak text with streaming for lower latency"""
+    
+    def synthesize_stream(self, text):
+        """ElevenLabs TTS as an iterator of raw PCM chunks (the request starts on first read)"""
+        return self.elevenlabs.text_to_speech.convert(
+            voice_id=self.voice_id,
+            text=text,
+            model_id="eleven_turbo_v2_5",  # Turbo model for lower latency
+            output_format=f"pcm_{self.TTS_RATE}",  # Raw PCM plays straight into the output stream
+            optimize_streaming_latency=4  # Max optimization (0-4)
+        )
+    
+    def synthesize(self, text):
+        """Fetch the whole clip up front (used to prefetch audio ahead of when it is needed)"""
         try:
-            # Use streaming for faster playback start
-            audio_stream = self.elevenlabs.text_to_speech.convert(
-                voice_id=self.voice_id,
-                text=text,
-                model_id="eleven_turbo_v2_5",  # Turbo model for lower latency
-                optimize_streaming_latency=4  # Max optimization (0-4)
-            )
-            stream(audio_stream)
+            return b"".join(self.synthesize_stream(text))
         except Exception as e:
             print(f"⚠️  TTS Error: {e}")
+            return b""
+    
+    def speak_async(self, text):
+        """Queue text for playback, streaming it as it arrives; returns a Playback handle"""
+        def chunks():
+            try:
+                yield from self.synthesize_stream(text)
+            except Exception as e:
+                print(f"⚠️  TTS Error: {e}")
+        return self.player.play(chunks())
+    
+    def speak(self, text):
+        """Speak text and wait until playback has finished"""
+        self.speak_async(text).done.wait()
+    
+    def prefetch_next_question(self):
+        """Start fetching the upcoming question's audio in the background"""
+        if self.current_question_index >= len(self.questions):
+            return None
+        return self.executor.submit(self.synthesize, self.questions[self.current_question_index])
     
     def save_responses(self, filename="interview_responses.json"):
         """Save interview responses to JSON file"""
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"interview_responses_{timestamp}.json"
         
-        output = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "total_questions": len(self.responses),
-            "responses": self.responses,
-            "code_review": getattr(self, 'code_review', None)
-        }
+        output = interview_document(
+            self.responses,
+            getattr(self, 'code_review', None),
+            self.turn_timings,
+            self.context.prompt_log
+        )
         
         try:
             with open(filename, 'w') as f:
@@ -229,22 +383,12 @@ class AIInterviewer:
         except Exception as e:
             print(f"⚠️  Error saving responses: {e}")
     
-    def ask_question(self, context=""):
+    def ask_question(self):
         """Generate next question using OpenAI"""
         print("\n🤖 AI: Thinking...")
         
-        # Build conversation context
-        messages = [
-            {"role": "system", "content": """You are a friendly AI interviewer conducting a casual conversation. 
-            Ask one question at a time. Keep questions natural and conversational.
-            Ask about the person's background, interests, goals, or experiences.
-            Build on their previous answers."""}
-        ]
-        
-        # Add conversation history
-        for qa in self.responses:
-            messages.append({"role": "assistant", "content": qa["question"]})
-            messages.append({"role": "user", "content": qa["answer"]})
+        # Static system prompt, then the latest turns verbatim, then the running summary
+        messages = self.context.build_messages(QUESTION_SYSTEM_PROMPT)
         
         # Generate next question
         response = self.client.chat.completions.create(
@@ -254,53 +398,60 @@ class AIInterviewer:
             temperature=0.7
         )
         
+        usage = getattr(response, "usage", None)
+        self.context.record_prompt(messages, usage.prompt_tokens if usage else None)
+        
         question = response.choices[0].message.content.strip()
         return question
     
+    def open_microphone(self):
+        """Open the input stream once; it stays open between turns"""
+        if self.mic is None:
+            self.mic = self.pyaudio.open(
+                format=self.FORMAT,
+                channels=self.CHANNELS,
+                rate=self.RATE,
+                input=True,
+                frames_per_buffer=self.CHUNK
+            )
+        return self.mic
+    
     def listen_for_answer(self):
         """Listen to user's answer and detect when they're done speaking"""
-        stream = self.pyaudio.open(
-            format=self.FORMAT,
-            channels=self.CHANNELS,
-            rate=self.RATE,
-            input=True,
-            frames_per_buffer=self.CHUNK
-        )
+        stream = self.open_microphone()
+        
+        # Drop audio captured while the AI was talking so it is not transcribed as the answer
+        available = stream.get_read_available()
+        if available:
+            stream.read(available, exception_on_overflow=False)
         
         print("🎤 Listening... (speak your answer)\n")
         
         current_answer = ""
         self.last_speech_time = time.time()
         is_speaking = False
-        last_partial = ""
+        self.recognizer.reset()
         
         try:
             while True:
                 data = stream.read(self.CHUNK, exception_on_overflow=False)
                 
-                if self.recognizer.AcceptWaveform(data):
-                    # Final result (end of phrase)
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get("text", "").strip()
+                for event in self.recognizer.accept(data):
+                    text = event["text"]
                     
                     # Ignore very short words (likely noise)
-                    if text and len(text) > 2:
+                    if len(text) <= 2:
+                        continue
+                    
+                    if event["type"] == "final":
+                        # Final result (end of phrase)
                         current_answer += " " + text
                         print(f"   {text}")
-                        self.last_speech_time = time.time()
-                        is_speaking = True
-                        last_partial = ""
-                else:
-                    # Partial result
-                    partial = json.loads(self.recognizer.PartialResult())
-                    text = partial.get("partial", "").strip()
-                    
-                    # Only update if partial is meaningful and different
-                    if text and len(text) > 2 and text != last_partial:
-                        self.last_speech_time = time.time()
-                        is_speaking = True
-                        last_partial = text
+                    else:
+                        # Partial result (recognizer only emits it when it changed)
                         print(f"\r💬 {text}...", end="", flush=True)
+                    self.last_speech_time = time.time()
+                    is_speaking = True
                 
                 # Check for silence (user finished speaking)
                 silence_duration = time.time() - self.last_speech_time
@@ -309,13 +460,10 @@ class AIInterviewer:
                     if len(current_answer.strip()) >= self.MIN_ANSWER_LENGTH:
                         print("\n\n✓ Answer recorded")
                         break
-                    
+        
         except KeyboardInterrupt:
             print("\n\n⚠️  Interview stopped by user")
             return None
-        finally:
-            stream.stop_stream()
-            stream.close()
         
         return current_answer.strip()
     
@@ -332,11 +480,17 @@ class AIInterviewer:
         print("- Press Ctrl+C to stop anytime\n")
         print("=" * 60)
         
+        # Fetch the first question's audio while the instructions are on screen
+        next_audio = self.prefetch_next_question()
         time.sleep(2)
         
+        # The previous turn's reaction and timings, completed once the next question starts playing
+        reaction_playback = None
+        pending_turn = None
+        
         try:
             while True:
-                # Get next hardcoded question
+                # Get next question (from the file, then generated)
                 question = self.get_next_question()
                 
                 if question is None:
@@ -349,31 +503,37 @@ class AIInterviewer:
                 print(f"🤖 Question {q_num}: {question}")
                 print('='*60)
                 
-                self.speak(question)
-                time.sleep(0.5)
+                # Queued behind the reaction, so it plays as soon as the reaction ends
+                question_playback = self.player.play(next_audio.result() if next_audio else self.synthesize(question))
+                # Fetch the following question's audio while this one plays and the candidate answers
+                next_audio = self.prefetch_next_question()
+                
+                question_playback.done.wait()
+                listen_start = time.time()
+                
+                if pending_turn:
+                    pending_turn["reaction_to_question"] = question_playback.started_at - reaction_playback.finished_at
+                    self.record_turn(pending_turn)
+                    pending_turn = None
                 
                 # Listen for answer
                 answer = self.listen_for_answer()
+                answer_end = time.time()
                 
                 if answer is None:  # User interrupted
                     break
                 
                 if not answer or len(answer) < self.MIN_ANSWER_LENGTH:
                     print("⚠️  No clear answer detected, moving on...\n")
+                    reaction_playback = None
                     continue
                 
-                # Generate reaction and prepare TTS in parallel
                 print("\n🤖 AI: Thinking...")
+                reaction = self.generate_reaction(answer)
                 
-                # Start generating reaction immediately
-                reaction_future = self.executor.submit(self.generate_reaction, answer)
-                
-                # Wait for reaction (this is fast with gpt-4o-mini)
-                reaction = reaction_future.result()
-                
-                # Speak reaction immediately (streaming starts playback faster)
+                # Playback streams from the output queue while the loop moves on to the next question
                 print(f"💬 {reaction}\n")
-                self.speak(reaction)
+                reaction_playback = self.speak_async(reaction)
                 
                 # Store Q&A
                 self.responses.append({
@@ -382,9 +542,21 @@ class AIInterviewer:
                     "answer": answer,
                     "ai_reaction": reaction
                 })
+                # Generated questions build on this; summary folds start once ask_question reads the
+                # context, so an interview that only uses the question file never pays for them
+                self.context.add_turn(question, answer)
                 
-                # Minimal pause before next question (reduced from 1.5s)
-                time.sleep(0.8)
+                reaction_playback.started.wait()
+                pending_turn = {
+                    "question_number": q_num,
+                    "question_to_listen": listen_start - question_playback.finished_at,
+                    "answer_to_reaction": reaction_playback.started_at - answer_end,
+                    "reaction_to_question": 0.0
+                }
+            
+            if pending_turn:
+                reaction_playback.done.wait()
+                self.record_turn(pending_turn)
             
             # Run code review phase (with string or file)
             self.run_code_review(code_string=code_string)
@@ -392,7 +564,7 @@ class AIInterviewer:
             # Save and show summary
             self.save_responses()
             self.show_summary()
-            
+        
         except KeyboardInterrupt:
             print("\n\n⚠️  Interview stopped")
             # Still run code review if interrupted after questions
@@ -405,8 +577,18 @@ class AIInterviewer:
             self.show_summary()
         finally:
             self.executor.shutdown(wait=False)
+            self.context.shutdown()
+            self.player.close()
+            if self.mic is not None:
+                self.mic.stop_stream()
+                self.mic.close()
             self.pyaudio.terminate()
     
+    def record_turn(self, turn):
+        """Store the dead air (silence the candidate hears) around one question"""
+        turn["dead_air"] = turn["question_to_listen"] + turn["answer_to_reaction"] + turn["reaction_to_question"]
+        self.turn_timings.append({k: round(v, 3) if isinstance(v, float) else v for k, v in turn.items()})
+    
     def show_summary(self):
         """Display interview summary"""
         print("\n" + "=" * 60)
@@ -425,6 +607,28 @@ class AIInterviewer:
             print(f"Source: {self.code_review['code_source']}")
             print(f"Feedback: {self.code_review['feedback'][:100]}...")
         
+        if self.turn_timings:
+            print("\n" + "-" * 60)
+            print("DEAD AIR PER TURN (seconds)")
+            print("-" * 60)
+            for t in self.turn_timings:
+                print(f"Q{t['question_number']}: {t['dead_air']:.2f}  "
+                      f"(answer->reaction {t['answer_to_reaction']:.2f}, "
+                      f"reaction->question {t['reaction_to_question']:.2f}, "
+                      f"question->listening {t['question_to_listen']:.2f})")
+            avg = sum(t["dead_air"] for t in self.turn_timings) / len(self.turn_timings)
+            print(f"Average: {avg:.2f}s")
+        
+        if self.context.prompt_log:
+            print("\n" + "-" * 60)
+            print("PROMPT TOKENS PER GENERATED QUESTION")
+            print("-" * 60)
+            for p in self.context.prompt_log:
+                print(f"After {p['turn']} turns: {p['prompt_tokens']} sent "
+                      f"(~{p['replay_all_tokens_est']} replaying every turn, "
+                      f"{p['verbatim_turns']} turns verbatim)")
+            print(f"Summary updates: {self.context.summary_tokens} tokens")
+        
         print("\n" + "=" * 60)
         print(f"Total questions answered: {len(self.responses)}")
         print("=" * 60)
@@ -1,20 +1,36 @@
 #!/usr/bin/env python3
 """
 Flask WebSocket server for AI Voice Interview
+Start it with server.py, which calls main()
 """
 
-from flask import Flask, render_template, request, jsonify, session, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 import json
 import time
 import os
+import threading
 from dotenv import load_dotenv
 from openai import OpenAI
 from elevenlabs.client import ElevenLabs
-from vosk import Model, KaldiRecognizer
-import wave
-import io
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from code_runner import TestRunnerPool, format_report
+from recognizer_pool import RecognizerPool
+from model_registry import get_vosk_model
+from second_pass import SecondPassTranscriber
+from audio_buffer import PCMRingBuffer
+from stt_engine import VoskStreamingRecognizer
+from model_tiering import DecodeLoadMonitor, TierPolicy
+from static_assets import AssetIndex, send_asset
+import audio_codecs
+from resampler import PolyphaseResampler
+from speech_analytics import WordRecorder
+from reaction_bank import ReactionBank, REACTION_SYSTEM_PROMPT
+import narration
+from profiling import HandlerTracker, SamplingProfiler, Watchdog, collapsed, summarize
+import hmac
 
 load_dotenv()
 
@@ -28,13 +44,101 @@ openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API"))
 VOICE_ID = "hzLyDn3IrvrdH83BdqUu"
 
-# Initialize Vosk model
-print("Loading Vosk model...")
-vosk_model = Model("model")
-print("Model loaded!")
+# Initialize Vosk models (already loaded in the master when started via prefork.py).
+# "large" is the accurate model; "small" is only used while decode load is high and
+# tiering stays off when its directory is missing.
+VOSK_MODEL = os.getenv("VOSK_MODEL", "model")
+VOSK_SMALL_MODEL = os.getenv("VOSK_SMALL_MODEL", "model-small")
+vosk_models = {"large": get_vosk_model(VOSK_MODEL)}
+if os.path.isdir(VOSK_SMALL_MODEL):
+    vosk_models["small"] = get_vosk_model(VOSK_SMALL_MODEL)
+
+# Recognizers are handed out when a session first streams audio, not at /api/start
+recognizer_pools = {
+    tier: RecognizerPool(
+        lambda model=model: VoskStreamingRecognizer(model, 16000, partials=False),
+        min_idle=int(os.getenv("RECOGNIZER_MIN_IDLE", "2")),
+        max_total=int(os.getenv("RECOGNIZER_MAX_TOTAL", "32"))
+    )
+    for tier, model in vosk_models.items()
+}
+
+# Decode timing from every chunk drives which tier new answers get
+decode_monitor = DecodeLoadMonitor(cores=int(os.getenv("ASR_CORES", "0")) or None)
+tier_policy = TierPolicy(
+    decode_monitor,
+    high_load=float(os.getenv("ASR_HIGH_LOAD", "0.75")),
+    low_load=float(os.getenv("ASR_LOW_LOAD", "0.5"))
+)
+
+# Warm resource-limited workers for running OA submissions against the Two Sum suite
+# (not a security sandbox: submissions run as this server's user, see code_runner.py)
+test_runner = TestRunnerPool()
+
+# Second-pass Faster-Whisper transcription of complete answers (SECOND_PASS_WORKERS=0 disables)
+SECOND_PASS_WORKERS = int(os.getenv("SECOND_PASS_WORKERS", "1"))
+SECOND_PASS_SAVE_WAIT = float(os.getenv("SECOND_PASS_SAVE_WAIT", "15"))  # seconds /api/save waits for refinements
+second_pass = SecondPassTranscriber(
+    pool_size=SECOND_PASS_WORKERS,
+    model_size=os.getenv("SECOND_PASS_MODEL", "base")
+) if SECOND_PASS_WORKERS > 0 else None
+
+# Fingerprinted, precompressed frontend assets built once at startup (STATIC_ASSET_INDEX=0 serves files directly, e.g. while editing)
+static_assets = AssetIndex(os.path.join(app.root_path, '..', 'frontend', 'src')) \
+    if os.getenv("STATIC_ASSET_INDEX", "1") != "0" else None
+
+# Socket audio encodings the server accepts; each client offers its own list on connect.
+# float32 (uncompressed, ~1.5 Mbit/s at 48 kHz) is opt-in: add it here for clients that ask for it
+AUDIO_ENCODINGS = [e.strip() for e in os.getenv("AUDIO_ENCODINGS", "adpcm,mulaw,pcm16").split(",") if e.strip()]
+client_encodings = {}  # socket sid -> negotiated encoding
+
+# Capture rates clients may declare on connect; audio is resampled to 16 kHz per session
+AUDIO_RATES = {int(r) for r in os.getenv("AUDIO_RATES", "8000,16000,22050,24000,32000,44100,48000,96000").split(",") if r.strip()}
+client_rates = {}  # socket sid -> declared sample rate
+
+# Turn transitions: after an answer the server pushes the reaction and the next question,
+# text and audio, prepared concurrently (clients opt in on connect)
+turn_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TURN_WORKERS", "8")))
+turn_transition_clients = set()  # socket sids that asked for pushed turn transitions
+
+# Reactions: "llm" writes each one live; "bank" picks a pre-voiced one from REACTION_BANK_DIR
+# (built with reaction_bank.py), matched to the answer's length and tone unless REACTION_BANK_MATCH=0
+REACTION_MODE = os.getenv("REACTION_MODE", "llm")
+REACTION_BANK_DIR = os.getenv("REACTION_BANK_DIR", "reaction_bank")
+REACTION_BANK_MATCH = os.getenv("REACTION_BANK_MATCH", "1") != "0"
+REACTION_REPEAT_WINDOW = int(os.getenv("REACTION_REPEAT_WINDOW", "5"))  # recent reactions a session won't hear again
+reaction_bank = None
+if REACTION_MODE == "bank":
+    if os.path.exists(os.path.join(REACTION_BANK_DIR, "bank.json")):
+        reaction_bank = ReactionBank(REACTION_BANK_DIR)
+        print(f"Reaction bank: {len(reaction_bank)} reactions from {REACTION_BANK_DIR}")
+        if len(reaction_bank) == 0:
+            # e.g. every TTS call failed during the build; pick() needs at least one entry
+            reaction_bank = None
+            print("Reaction bank is empty, using live LLM reactions")
+    else:
+        print(f"Reaction bank not found in {REACTION_BANK_DIR}, using live LLM reactions")
+
+# Directory for per-session word timing columns (.npz) used by speech_analytics.py; empty disables
+WORD_TIMINGS_DIR = os.getenv("WORD_TIMINGS_DIR", "word_timings")
+
+# Profiling: handlers tag their thread, /api/admin/profile samples on demand, the watchdog
+# logs the stack of any Socket.IO handler running past WATCHDOG_THRESHOLD seconds.
+# The admin endpoints are disabled unless ADMIN_TOKEN is set.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+handler_tracker = HandlerTracker()
+profiler = SamplingProfiler(handler_tracker)
+watchdog = Watchdog(handler_tracker, threshold=float(os.getenv("WATCHDOG_THRESHOLD", "1.0")))
+
+# Per-session answer audio: hard cap in seconds, and an optional scratch directory to spill it to
+# (one file per live session, deleted when the session is saved or evicted)
+AUDIO_BUFFER_SECONDS = float(os.getenv("AUDIO_BUFFER_SECONDS", "600"))
+AUDIO_SPILL_DIR = os.getenv("AUDIO_SPILL_DIR")
 
 # Store active sessions
 sessions = {}
+SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", "3600"))  # idle seconds before eviction
+COMPLETED_SESSION_TTL = int(os.getenv("COMPLETED_SESSION_TTL_SECONDS", "300"))  # seconds a saved session is kept
 
 
 class InterviewSession:
@@ -43,8 +147,20 @@ class InterviewSession:
         self.questions = self.load_questions()
         self.current_question_index = 0
         self.responses = []
-        self.recognizer = KaldiRecognizer(vosk_model, 16000)
-        self.recognizer.SetWords(True)
+        self.lock = threading.RLock()  # responses are also updated by second-pass results from another thread
+        self.stream_lock = threading.RLock()  # recognizer and audio stream: audio chunks vs. other threads
+        self.recognizer = None  # acquired from recognizer_pools on the first audio chunk
+        self.tier = None  # model tier of the held recognizer
+        self.pending_tier = None  # tier already chosen for the next acquire
+        self.last_activity = time.time()
+        self.completed_at = None  # set when the session is saved
+        spill_path = os.path.join(AUDIO_SPILL_DIR, f"session_{session_id}.wav") if AUDIO_SPILL_DIR else None
+        self.audio = PCMRingBuffer(AUDIO_BUFFER_SECONDS, 16000, spill_path=spill_path)
+        self.resampler = None  # for clients that capture at a rate other than 16 kHz
+        self.words = WordRecorder()  # per-word timings/confidences from final results
+        self.turn_metrics = []  # client-measured gaps between the end of an answer and the next question
+        self.reaction_latency = []  # per-turn reaction source and time to text
+        self.recent_reactions = []  # bank ids, most recent last
         self.current_transcript = ""
         self.code_review = None
         self.last_speech_time = time.time()
@@ -68,20 +184,117 @@ class InterviewSession:
             ]
     
     def get_next_question(self):
-        if self.current_question_index < len(self.questions):
-            question = self.questions[self.current_question_index]
-            self.current_question_index += 1
-            # Reset submission flag for new question
-            self.answer_submitted = False
-            return question
-        return None
+        # Also called from the turn transition thread while a chunk may be inside accept()
+        with self.stream_lock:
+            if self.current_question_index < len(self.questions):
+                question = self.questions[self.current_question_index]
+                self.current_question_index += 1
+                # Reset submission flag for new question
+                self.answer_submitted = False
+                # Drop any decoder state left over from the previous answer, and give the
+                # recognizer back if load now calls for the other tier
+                if self.recognizer is not None:
+                    tier = self.choose_tier()
+                    if tier != self.tier:
+                        self.release_recognizer()
+                        self.pending_tier = tier
+                    else:
+                        self.recognizer.reset()
+                self.audio.start_segment(self.current_question_index)
+                return question
+            return None
+    
+    def choose_tier(self):
+        return tier_policy.choose() if "small" in recognizer_pools else "large"
+    
+    def acquire_recognizer(self):
+        if self.recognizer is None:
+            tier = self.pending_tier or self.choose_tier()
+            self.pending_tier = None
+            self.recognizer = recognizer_pools[tier].acquire()
+            if self.recognizer is None and tier == "large" and "small" in recognizer_pools:
+                # Large pool at capacity; the small model is better than no transcript
+                tier = "small"
+                self.recognizer = recognizer_pools[tier].acquire()
+            self.tier = tier if self.recognizer is not None else None
+        return self.recognizer
+    
+    def release_recognizer(self):
+        with self.stream_lock:
+            if self.recognizer is not None:
+                recognizer_pools[self.tier].release(self.recognizer)
+                self.recognizer = None
+                self.tier = None
+    
+    def resample(self, samples, rate):
+        """Client audio at rate -> 16 kHz; filter state carries over between chunks"""
+        if rate == 16000:
+            return samples
+        if self.resampler is None or self.resampler.in_rate != rate:
+            self.resampler = PolyphaseResampler(rate)
+        return self.resampler.process(samples)
+    
+    def flush_audio(self):
+        self.audio.end_segment()
+        self.audio.flush()
+    
+    def record_response(self, q_num, question, answer, reaction):
+        with self.lock:
+            self.responses.append({
+                "question_number": q_num,
+                "question": question,
+                "answer": answer,
+                "ai_reaction": reaction,
+                "speech": self.words.answer_stats(q_num),
+                "asr_tier": self.tier
+            })
+            index = len(self.responses) - 1
+        self.queue_second_pass(index)
+    
+    def queue_second_pass(self, response_index):
+        """Hand the finished answer's audio to the Whisper pool; the Vosk text stays until it returns"""
+        self.audio.end_segment()
+        q_num = self.responses[response_index]["question_number"]
+        if second_pass is None or q_num not in self.audio.segments:
+            return
+        pcm = self.audio.segment_bytes(q_num)
+        if not pcm:
+            return
+        
+        def apply(text):
+            with self.lock:
+                entry = self.responses[response_index]
+                entry["live_answer"] = entry["answer"]
+                entry["answer"] = text
+                entry["transcript_source"] = "faster-whisper"
+            print(f"[Second pass] Q{entry['question_number']}: {text}")
+        
+        second_pass.submit(self.session_id, pcm, apply)
     
     def generate_reaction(self, answer):
+        start = time.perf_counter()
+        if reaction_bank is not None:
+            # Its audio is already on disk; generate_tts serves it by text
+            entry = reaction_bank.pick(answer, self.recent_reactions, match=REACTION_BANK_MATCH)
+            self.recent_reactions = (self.recent_reactions + [entry["id"]])[-REACTION_REPEAT_WINDOW:]
+            reaction, source = entry["text"], "bank"
+        else:
+            reaction, source = self.generate_llm_reaction(answer), "llm"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.reaction_latency.append({
+            "question_number": self.current_question_index,
+            "source": source,
+            "ms": round(elapsed_ms, 3)
+        })
+        print(f"[Reaction] Q{self.current_question_index} {source}: {elapsed_ms:.2f}ms")
+        return reaction
+    
+    def generate_llm_reaction(self, answer):
         try:
             response = openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a warm, friendly interviewer. Give a brief, positive acknowledgment in 1 sentence. Be encouraging and supportive but keep it general and vague. Don't reference specific details from their answer. Keep it under 12 words. DO NOT ask any questions or follow-ups."},
+                    {"role": "system", "content": REACTION_SYSTEM_PROMPT},
                     {"role": "user", "content": f"They said: {answer}"}
                 ],
                 max_tokens=25,
@@ -92,7 +305,7 @@ class InterviewSession:
             print(f"Reaction error: {e}")
             return "That's great to hear!"
     
-    def generate_code_feedback(self, code):
+    def generate_code_feedback(self, code, test_report=None):
         try:
             response = openai_client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -117,9 +330,12 @@ class InterviewSession:
                     - Write "O(log n)" as "O of log N"
                     - Write "O(1)" as "O of one"
                     
+                    If automated test results are provided, treat them as ground truth for
+                    correctness and use the measured timings when discussing complexity.
+                    
                     Be honest, constructive, and encouraging. Focus on algorithmic thinking.
                     Keep feedback under 150 words and conversational."""},
-                    {"role": "user", "content": f"Review this Two Sum solution written under interview conditions:\n\n{code}"}
+                    {"role": "user", "content": f"Review this Two Sum solution written under interview conditions:\n\n{code}\n\n{format_report(test_report)}"}
                 ],
                 max_tokens=300,
                 temperature=0.7
@@ -137,20 +353,44 @@ class InterviewSession:
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "total_questions": len(self.responses),
             "responses": self.responses,
+            "turn_metrics": self.turn_metrics,
+            "reaction_latency": self.reaction_latency,
             "code_review": self.code_review
         }
         
         try:
-            with open(filename, 'w') as f:
+            with self.lock, open(filename, 'w') as f:
                 json.dump(output, f, indent=2)
+            if WORD_TIMINGS_DIR and len(self.words):
+                os.makedirs(WORD_TIMINGS_DIR, exist_ok=True)
+                self.words.save(os.path.join(WORD_TIMINGS_DIR, f"words_{self.session_id}_{timestamp}.npz"), self.session_id)
             return filename
         except Exception as e:
             print(f"Save error: {e}")
             return None
 
 
+def evict_stale_sessions():
+    """Drop sessions idle longer than SESSION_TTL, or saved longer than COMPLETED_SESSION_TTL ago,
+    and return their recognizers to the pool"""
+    now = time.time()
+    cutoff = now - SESSION_TTL
+    completed_cutoff = now - COMPLETED_SESSION_TTL
+    for session_id in [sid for sid, s in sessions.items()
+                       if s.last_activity < cutoff or (s.completed_at and s.completed_at < completed_cutoff)]:
+        interview = sessions.pop(session_id, None)
+        if interview:
+            interview.release_recognizer()
+            interview.audio.close(delete_spill=True)
+            print(f"Evicted idle session: {session_id}")
+
+
 def generate_tts(text):
     """Generate TTS audio and return bytes"""
+    if reaction_bank is not None:
+        audio_bytes = reaction_bank.audio_for(text)
+        if audio_bytes:
+            return audio_bytes
     try:
         audio_stream = elevenlabs_client.text_to_speech.convert(
             voice_id=VOICE_ID,
@@ -166,13 +406,32 @@ def generate_tts(text):
         return None
 
 
+@app.before_request
+def tag_request():
+    handler_tracker.enter(request.url_rule.rule if request.url_rule else request.path, "http")
+
+
+@app.teardown_request
+def untag_request(exc):
+    handler_tracker.exit()
+
+
+def is_admin():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
 @app.route('/')
 def index():
-    return send_from_directory('../frontend/src/pages', 'index.html')
+    return serve_static('index.html')
 
 
 @app.route('/<path:path>')
 def serve_static(path):
+    if static_assets is not None:
+        response = send_asset(static_assets, path)
+        if response is not None:
+            return response
     # Serve pages from src/pages
     if path.endswith('.html'):
         return send_from_directory('../frontend/src/pages', path)
@@ -190,6 +449,7 @@ def serve_static(path):
 def start_interview():
     """Initialize a new interview session"""
     try:
+        evict_stale_sessions()
         session_id = str(time.time())
         interview = InterviewSession(session_id)
         sessions[session_id] = interview
@@ -215,6 +475,7 @@ def get_question(session_id):
             return jsonify({"error": "Invalid session"}), 400
         
         interview = sessions[session_id]
+        interview.last_activity = time.time()
         question = interview.get_next_question()
         
         if question is None:
@@ -254,17 +515,32 @@ def text_to_speech():
 
 
 @socketio.on('connect')
-def handle_connect():
-    print(f"Client connected: {request.sid}")
-    emit('connected', {'status': 'ready'})
+@handler_tracker.tagged('connect')
+def handle_connect(auth=None):
+    offered = auth.get('audio_encodings') if isinstance(auth, dict) else None
+    encoding = audio_codecs.negotiate(offered, AUDIO_ENCODINGS)
+    client_encodings[request.sid] = encoding
+    # Clients that capture at their native rate declare it; anything unsupported gets 16 kHz
+    rate = auth.get('audio_rate') if isinstance(auth, dict) else None
+    rate = rate if isinstance(rate, int) and rate in AUDIO_RATES else 16000
+    client_rates[request.sid] = rate
+    print(f"Client connected: {request.sid} (audio: {encoding}, {rate} Hz)")
+    if isinstance(auth, dict) and auth.get('turn_transition'):
+        turn_transition_clients.add(request.sid)
+    emit('connected', {'status': 'ready', 'audio_encoding': encoding, 'audio_rate': rate})
 
 
 @socketio.on('disconnect')
+@handler_tracker.tagged('disconnect')
 def handle_disconnect():
     print(f"Client disconnected: {request.sid}")
+    client_encodings.pop(request.sid, None)
+    client_rates.pop(request.sid, None)
+    turn_transition_clients.discard(request.sid)
 
 
 @socketio.on('audio_chunk')
+@handler_tracker.tagged('audio_chunk')
 def handle_audio_chunk(data):
     """Process incoming audio chunks for transcription"""
     session_id = data.get('session_id')
@@ -275,84 +551,184 @@ def handle_audio_chunk(data):
         return
     
     interview = sessions[session_id]
+    interview.last_activity = time.time()
     
-    try:
-        # Convert array to bytes
-        if isinstance(audio_data, list):
-            # Convert list of integers to bytes
-            import struct
-            audio_bytes = struct.pack(f'{len(audio_data)}h', *audio_data)
-        elif isinstance(audio_data, str):
-            import base64
-            audio_bytes = base64.b64decode(audio_data)
-        else:
-            audio_bytes = bytes(audio_data)
-        
-        # Validate audio data
-        if len(audio_bytes) < 100:
-            return  # Skip too-short chunks
+    # Serialized with get_next_question/release_recognizer, which reset or hand back the recognizer
+    with interview.stream_lock:
+        if interview.acquire_recognizer() is None:
+            emit('error', {'message': 'Server is at capacity, please try again shortly'})
+            return
         
-        # Process audio with Vosk
-        if interview.recognizer.AcceptWaveform(audio_bytes):
-            result = json.loads(interview.recognizer.Result())
-            text = result.get("text", "").strip()
+        try:
+            # Decode to int16 samples
+            if isinstance(audio_data, list):
+                # Older clients send a JSON list of int16 samples
+                samples = np.asarray(audio_data, dtype=np.int16)
+            else:
+                if isinstance(audio_data, str):
+                    import base64
+                    audio_data = base64.b64decode(audio_data)
+                # Binary payload in the encoding agreed on connect
+                encoding = data.get('encoding') or client_encodings.get(request.sid, 'pcm16')
+                samples = audio_codecs.decode(audio_data, encoding)
             
-            if text and len(text) > 2:
-                print(f"[Vosk Final] {text}")
-                interview.current_transcript += " " + text
-                interview.last_speech_time = time.time()
-                interview.is_speaking = True
+            # A chunk may name its rate if the client's capture rate changed since connecting
+            rate = data.get('rate') or client_rates.get(request.sid, 16000)
+            # Integers only: 48000.0 would pass the set lookup and then break the resampler
+            if not isinstance(rate, int) or (rate != 16000 and rate not in AUDIO_RATES):
+                emit('error', {'message': f'Unsupported sample rate {rate}'})
+                return
+            samples = interview.resample(samples, rate)
+            
+            # Validate audio data
+            if len(samples) < 50:
+                return  # Skip too-short chunks
+            
+            if not interview.answer_submitted:
+                interview.audio.write(samples)
+            
+            # Process audio with Vosk, timed for the tier policy
+            decode_monitor.begin()
+            started = time.perf_counter()
+            try:
+                events = interview.recognizer.accept(samples.tobytes())
+            finally:
+                decode_monitor.end(interview.tier, len(samples) / 16000, time.perf_counter() - started)
+            
+            for event in events:
+                text = event["text"]
                 
-                emit('transcription', {
-                    'text': text,
-                    'is_final': True,
-                    'full_transcript': interview.current_transcript.strip()
-                })
-        
-        # Check for silence (auto-submit)
-        current_time = time.time()
-        silence_duration = current_time - interview.last_speech_time
+                if event["type"] == "final" and len(text) > 2:
+                    print(f"[Vosk Final] {text}")
+                    interview.current_transcript += " " + text
+                    interview.words.add(interview.current_question_index, event.get("words", []))
+                    interview.last_speech_time = time.time()
+                    interview.is_speaking = True
+                    
+                    emit('transcription', {
+                        'text': text,
+                        'is_final': True,
+                        'full_transcript': interview.current_transcript.strip()
+                    })
+            
+            # Check for silence (auto-submit)
+            current_time = time.time()
+            silence_duration = current_time - interview.last_speech_time
+            
+            if interview.is_speaking and not interview.answer_submitted and silence_duration > interview.silence_threshold:
+                transcript = interview.current_transcript.strip()
+                if len(transcript) >= interview.min_answer_length:
+                    print(f"[Auto-submit] Silence detected, submitting: {transcript}")
+                    
+                    # Mark as submitted to prevent duplicates
+                    interview.answer_submitted = True
+                    
+                    # Get current question info
+                    q_num = interview.current_question_index
+                    question = interview.questions[q_num - 1] if q_num > 0 else ""
+                    
+                    if request.sid in turn_transition_clients:
+                        # Reaction and next question are prepared and pushed off this handler
+                        interview.current_transcript = ""
+                        interview.is_speaking = False
+                        emit('auto_submit', {'answer': transcript})
+                        socketio.start_background_task(run_turn_transition, request.sid, interview, q_num, question, transcript)
+                        return
+                    
+                    # Generate reaction
+                    reaction = interview.generate_reaction(transcript)
+                    
+                    # Store response
+                    interview.record_response(q_num, question, transcript, reaction)
+                    
+                    # Reset for next question
+                    interview.current_transcript = ""
+                    interview.is_speaking = False
+                    
+                    # Notify client
+                    emit('auto_submit', {'answer': transcript})
+                    emit('reaction', {
+                        'reaction': reaction,
+                        'has_audio': True
+                    })
+                    
+        except Exception as e:
+            print(f"Audio processing error: {e}")
+            # Don't emit error for every chunk, just log it
+
+
+def run_turn_transition(sid, interview, q_num, question, answer):
+    """Push the reaction, then the next question, each with its audio, in one ordered sequence
+    
+    The client waits for turn_question, so it is sent even if the reaction fails (the answer is
+    kept without one); if the interview cannot advance, the client gets an error instead."""
+    started = time.time()
+    question_audio = None
+    reaction = None
+    recorded = False
+    reaction_ready = None
+    try:
+        # The next question is fixed, so its audio is synthesized while the reaction is generated
+        next_index = interview.current_question_index
+        next_text = interview.questions[next_index] if next_index < len(interview.questions) else None
+        question_audio = turn_executor.submit(generate_tts, next_text) if next_text else None
         
-        if interview.is_speaking and not interview.answer_submitted and silence_duration > interview.silence_threshold:
-            transcript = interview.current_transcript.strip()
-            if len(transcript) >= interview.min_answer_length:
-                print(f"[Auto-submit] Silence detected, submitting: {transcript}")
-                
-                # Mark as submitted to prevent duplicates
-                interview.answer_submitted = True
-                
-                # Get current question info
-                q_num = interview.current_question_index
-                question = interview.questions[q_num - 1] if q_num > 0 else ""
-                
-                # Generate reaction
-                reaction = interview.generate_reaction(transcript)
-                
-                # Store response
-                interview.responses.append({
-                    "question_number": q_num,
-                    "question": question,
-                    "answer": transcript,
-                    "ai_reaction": reaction
-                })
-                
-                # Reset for next question
-                interview.current_transcript = ""
-                interview.is_speaking = False
-                
-                # Notify client
-                emit('auto_submit', {'answer': transcript})
-                emit('reaction', {
-                    'reaction': reaction,
-                    'has_audio': True
-                })
-                
+        reaction = interview.generate_reaction(answer)
+        reaction_audio = generate_tts(reaction)
+        interview.record_response(q_num, question, answer, reaction)
+        recorded = True
+        socketio.emit('turn_reaction', {
+            'reaction': reaction,
+            'audio': reaction_audio,
+            'question_number': q_num
+        }, to=sid)
+        reaction_ready = time.time() - started
+    except Exception as e:
+        print(f"[Turn] Q{q_num} reaction failed, moving on without it: {e}")
+    
+    try:
+        if not recorded:
+            interview.record_response(q_num, question, answer, reaction)
+        # Advance only now, so chunks still in flight from the answer are not counted as the next one
+        next_question = interview.get_next_question()
+        if next_question is None:
+            socketio.emit('turn_question', {'question': None, 'completed': True}, to=sid)
+            return
+        try:
+            audio = question_audio.result() if question_audio else None
+        except Exception as e:
+            print(f"[Turn] Q{interview.current_question_index} audio failed, sending the text only: {e}")
+            audio = None
+        socketio.emit('turn_question', {
+            'question': next_question,
+            'question_number': interview.current_question_index,
+            'audio': audio,
+            'completed': False
+        }, to=sid)
     except Exception as e:
-        print(f"Audio processing error: {e}")
-        # Don't emit error for every chunk, just log it
+        print(f"[Turn] Q{q_num} transition failed: {e}")
+        socketio.emit('error', {'message': 'Could not load the next question, please refresh the page'}, to=sid)
+        return
+    reaction_note = f"reaction pushed after {reaction_ready:.2f}s" if reaction_ready is not None else "no reaction"
+    print(f"[Turn] Q{q_num} -> Q{interview.current_question_index}: {reaction_note}, "
+          f"question after {time.time() - started:.2f}s")
+
+
+@socketio.on('turn_metrics')
+@handler_tracker.tagged('turn_metrics')
+def handle_turn_metrics(data):
+    """Client-measured time from the end of an answer to reaction and question playback"""
+    interview = sessions.get(data.get('session_id'))
+    if interview is None:
+        return
+    metrics = {k: data.get(k) for k in ('question_number', 'mode', 'answer_to_reaction_ms',
+                                        'answer_to_question_ms', 'reaction_audio_ms')}
+    interview.turn_metrics.append(metrics)
+    print(f"[Turn metrics] {metrics}")
 
 
 @socketio.on('submit_answer')
+@handler_tracker.tagged('submit_answer')
 def handle_submit_answer(data):
     """Submit answer and get AI reaction (deprecated - now using auto-submit)"""
     session_id = data.get('session_id')
@@ -374,12 +750,7 @@ def handle_submit_answer(data):
     reaction = interview.generate_reaction(answer)
     
     # Store response
-    interview.responses.append({
-        "question_number": question_number,
-        "question": question,
-        "answer": answer,
-        "ai_reaction": reaction
-    })
+    interview.record_response(question_number, question, answer, reaction)
     
     # Reset transcript for next question
     interview.current_transcript = ""
@@ -397,6 +768,7 @@ def code_review():
     data = request.json
     session_id = data.get('session_id')
     code = data.get('code', '')
+    language = data.get('language', 'python')
     
     if session_id not in sessions:
         return jsonify({"error": "Invalid session"}), 400
@@ -406,13 +778,19 @@ def code_review():
     
     interview = sessions[session_id]
     
+    # Run the submission so feedback is grounded in real pass/fail and timings
+    test_report = test_runner.run(code, language)
+    print(f"[Tests] {format_report(test_report)}")
+    
     # Generate feedback
-    feedback = interview.generate_code_feedback(code)
+    feedback = interview.generate_code_feedback(code, test_report)
     
     # Store code review
     interview.code_review = {
         "code_source": "web_submission",
         "code": code,
+        "language": language,
+        "tests": test_report,
         "feedback": feedback
     }
     
@@ -421,6 +799,7 @@ def code_review():
     
     return jsonify({
         "feedback": feedback,
+        "tests": test_report,
         "has_audio": audio_bytes is not None
     })
 
@@ -432,7 +811,16 @@ def save_session(session_id):
         return jsonify({"error": "Invalid session"}), 400
     
     interview = sessions[session_id]
+    # Give in-flight second-pass transcriptions a chance to land in the saved file
+    if second_pass is not None and not second_pass.wait_for_session(session_id, SECOND_PASS_SAVE_WAIT):
+        print(f"[Second pass] Saving {session_id} with {second_pass.pending(session_id)} answers still pending")
     filename = interview.save_responses()
+    interview.release_recognizer()
+    interview.flush_audio()
+    # The answers are saved (and handed to the second pass), so the audio ring can go now
+    # rather than when the session is evicted; a spill file goes with it
+    interview.audio.close(delete_spill=True)
+    interview.completed_at = time.time()
     
     if filename:
         return jsonify({"filename": filename, "status": "saved"})
@@ -440,20 +828,67 @@ def save_session(session_id):
         return jsonify({"error": "Failed to save"}), 500
 
 
-@app.route('/api/segment_feedback', methods=['POST'])
-def segment_feedback():
-    """Generate AI feedback for a code segment"""
+@app.route('/api/recognizer_pool', methods=['GET'])
+def recognizer_pool_stats():
+    """Report recognizer pool utilization per model tier and the tier policy's view of load"""
+    return jsonify({
+        "tiers": {tier: pool.stats() for tier, pool in recognizer_pools.items()},
+        "tiering": tier_policy.stats() if "small" in recognizer_pools else None,
+        "active_sessions": len(sessions)
+    })
+
+
+@app.route('/api/second_pass', methods=['GET'])
+def second_pass_stats():
+    """Report second-pass real-time factor and queue lag"""
+    if second_pass is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(second_pass.stats(), enabled=True))
+
+
+@app.route('/api/admin/profile', methods=['GET'])
+def admin_profile():
+    """Sample handler threads for N seconds; collapsed stacks (default) or a JSON summary"""
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 10))
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if not (0 < seconds < float('inf') and 0 < interval_ms < float('inf')):  # also rejects nan
+        return jsonify({"error": "seconds and interval_ms must be positive"}), 400
+    seconds = min(seconds, 60)
+    interval = max(interval_ms, 1) / 1000
+    include_idle = request.args.get('idle') == '1'
+    try:
+        stacks, samples = profiler.run(seconds, interval=interval, include_idle=include_idle)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    
+    if request.args.get('format') == 'json':
+        return jsonify(dict(summarize(stacks, samples, interval), collapsed=collapsed(stacks)))
+    return app.response_class(collapsed(stacks), mimetype='text/plain')
+
+
+@app.route('/api/admin/watchdog', methods=['GET'])
+def admin_watchdog():
+    """Recent Socket.IO handlers that ran past the watchdog threshold, with their stacks"""
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "threshold_s": watchdog.threshold,
+        "active": [{"handler": tag, "kind": kind, "running_s": round(time.time() - started, 3)}
+                   for tag, kind, started in handler_tracker.active().values()],
+        "reports": list(watchdog.reports)
+    })
+
+
+def generate_segment_feedback(code, segment_index, total_segments, language='python'):
+    """AI feedback for one code segment, or None if the request failed"""
+    if not code.strip():
+        return "No code provided for this segment."
     try:
-        data = request.json
-        code = data.get('code', '')
-        segment_index = data.get('segment_index', 0)
-        total_segments = data.get('total_segments', 1)
-        language = data.get('language', 'python')
-        
-        if not code:
-            return jsonify({"feedback": "No code provided for this segment."}), 200
-        
-        # Generate AI feedback for this specific segment
         response = openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
@@ -471,14 +906,94 @@ def segment_feedback():
             max_tokens=150,
             temperature=0.7
         )
-        
-        feedback = response.choices[0].message.content.strip()
-        return jsonify({"feedback": feedback})
-        
+        return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Segment feedback error: {e}")
+        return None
+
+
+def generate_tts_with_timestamps(text, previous_text=None, next_text=None):
+    """TTS audio plus per-character timings, for narrations"""
+    try:
+        response = elevenlabs_client.text_to_speech.convert_with_timestamps(
+            voice_id=VOICE_ID,
+            text=text,
+            model_id="eleven_turbo_v2_5",
+            output_format=narration.OUTPUT_FORMAT,
+            previous_text=previous_text,
+            next_text=next_text
+        )
+        return narration.decode_alignment(response)
+    except Exception as e:
+        print(f"Narration TTS error: {e}")
+        return None, None
+
+
+# Segment feedback narrated in one script, cached by submission (NARRATION_CACHE_DIR keeps it across restarts)
+narrator = narration.NarrationBuilder(
+    generate_segment_feedback,
+    generate_tts_with_timestamps,
+    VOICE_ID,
+    cache_dir=os.getenv("NARRATION_CACHE_DIR") or None
+)
+
+
+@app.route('/api/segment_feedback', methods=['POST'])
+def segment_feedback():
+    """Generate AI feedback for a code segment"""
+    data = request.json
+    code = data.get('code', '')
+    if not code:
+        return jsonify({"feedback": "No code provided for this segment."}), 200
+    
+    feedback = generate_segment_feedback(
+        code,
+        data.get('segment_index', 0),
+        data.get('total_segments', 1),
+        data.get('language', 'python')
+    )
+    if feedback is None:
         return jsonify({"feedback": "Unable to generate feedback for this segment."}), 500
+    return jsonify({"feedback": feedback})
+
+
+@app.route('/api/narration', methods=['POST'])
+def build_narration():
+    """Feedback for every segment plus one narration audio with per-segment start/end seconds"""
+    data = request.json or {}
+    code = data.get('code', '')
+    segments = data.get('segments') or []
+    if not code or not segments:
+        return jsonify({"error": "code and segments are required"}), 400
+    try:
+        segments = [{"start_line": int(s["start_line"]), "end_line": int(s["end_line"])} for s in segments]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "segments need start_line and end_line"}), 400
+    
+    start = time.time()
+    metadata, cached = narrator.build(code, data.get('language', 'python'), segments)
+    print(f"[Narration] {len(segments)} segments, {metadata['tts_requests']} TTS request(s), "
+          f"{'cached' if cached else 'built'} in {time.time() - start:.2f}s")
+    return jsonify({
+        **metadata,
+        "cached": cached,
+        "audio_url": f"/api/narration/{metadata['key']}/audio" if metadata["duration"] else None
+    })
+
+
+@app.route('/api/narration/<key>/audio')
+def narration_audio(key):
+    entry = narrator.get(key)
+    if entry is None:
+        return jsonify({"error": "Narration not found"}), 404
+    # The key is a content hash, so a complete narration never changes; an incomplete
+    # one is rebuilt on the next request and must not be kept
+    complete = entry[0].get("complete")
+    return entry[1], 200, {
+        'Content-Type': 'audio/mpeg',
+        'Cache-Control': 'public, max-age=31536000, immutable' if complete else 'no-store'
+    }
 
 
-if __name__ == '__main__':
+def main():
     socketio.run(app, host='0.0.0.0', port=5001, debug=True)
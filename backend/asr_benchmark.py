@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+ASR speed/accuracy benchmark matrix
+Runs a labeled set of recordings through every recognizer configuration the app
+uses and writes one comparison table:
+
+    script/vosk-*      speech_to_text_vosk.py: Vosk with partials, CHUNK = 4000 (and 1024)
+    script/whisper-*   speech_to_text.py: Faster-Whisper int8 on CPU, sliding-window
+                       streaming (beam 1 and 5) and 1-second blocks, CHUNK = 1024
+    server/vosk-*      app.py's live path: 4096-sample socket messages in the negotiated
+                       encoding, decoded by audio_codecs, Vosk without partials; the
+                       -48k variants capture at 48 kHz and go through resampler.py
+    server/second-pass second_pass.py: whole-answer Faster-Whisper base, beam 5
+
+Every file is replayed at real-time pace (stt_engine.simulate_realtime), which gives
+the real-time factor, how long after speech starts the first partial (or final, if
+the configuration has no partials) is available, and the mean lag between a word
+being spoken and it being committed. Each configuration runs in a fresh process, so
+peak RSS is that configuration's model plus decoding state. WER is corpus-level
+(total word errors over total reference words).
+
+    dataset/
+        <name>.wav    16 kHz mono 16-bit
+        <name>.txt    reference transcript
+
+    python asr_benchmark.py dataset --json asr_baseline.json
+    python asr_benchmark.py dataset --only 'script/vosk-*' --only 'server/*'
+    python asr_benchmark.py dataset --baseline asr_baseline.json   # exit 1 on regression
+"""
+
+import argparse
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RATE = 16000
+
+COLUMNS = (
+    # key, header, format
+    ("wer", "WER", "{:.3f}"),
+    ("real_time_factor", "RTF", "{:.3f}"),
+    ("first_event_ms", "first ms", "{:.0f}"),
+    ("commit_latency_ms", "commit ms", "{:.0f}"),
+    ("peak_rss_mb", "peak MB", "{:.0f}"),
+    ("load_s", "load s", "{:.1f}"),
+)
+
+
+def default_matrix(vosk_large="model", vosk_small="model-small", encoding="adpcm",
+                   whisper_sizes=("tiny", "base", "small")):
+    """Configurations as dicts: name, engine, model, chunk, options (recognizer kwargs), encoding"""
+    matrix = []
+    for tier, path in (("large", vosk_large), ("small", vosk_small)):
+        for chunk in (4000, 1024):
+            matrix.append({"name": f"script/vosk-{tier}/chunk{chunk}", "engine": "vosk", "model": path,
+                           "chunk": chunk, "options": {}})
+        matrix.append({"name": f"server/vosk-{tier}/{encoding}", "engine": "vosk", "model": path,
+                       "chunk": 4096, "options": {"partials": False}, "encoding": encoding})
+        matrix.append({"name": f"server/vosk-{tier}/float32-48k", "engine": "vosk", "model": path,
+                       "chunk": 4096, "options": {"partials": False}, "encoding": "float32",
+                       "capture_rate": 48000, "message_samples": 8192})
+    for size in whisper_sizes:
+        for beam in (1, 5):
+            matrix.append({"name": f"script/whisper-{size}/stream-beam{beam}", "engine": "whisper-streaming",
+                           "model": size, "chunk": 1024, "options": {"step_seconds": 1.0, "beam_size": beam}})
+        matrix.append({"name": f"script/whisper-{size}/blocks-beam1", "engine": "whisper", "model": size,
+                       "chunk": 1024, "options": {"block_seconds": 1.0, "beam_size": 1}})
+    matrix.append({"name": "server/second-pass/whisper-base", "engine": "whisper", "model": "base",
+                   "chunk": 4096, "options": {"block_seconds": None, "beam_size": 5}})
+    return matrix
+
+
+def load_dataset(directory):
+    """[(name, wav path, reference text)] for every WAV with a matching .txt"""
+    items = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        reference = os.path.splitext(path)[0] + ".txt"
+        if not os.path.exists(reference):
+            print(f"  no reference for {os.path.basename(path)}, skipping")
+            continue
+        with open(reference) as f:
+            items.append((os.path.splitext(os.path.basename(path))[0], path, f.read().strip()))
+    return items
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit, got {wf.getframerate()} Hz, "
+                             f"{wf.getnchannels()} channel(s), {wf.getsampwidth() * 8}-bit")
+        return wf.readframes(wf.getnframes())
+
+
+def speech_onset(pcm, frame=320):
+    """Seconds to the first 20 ms frame within 20 dB of the loudest one"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+    if not len(frames):
+        return 0.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return float(np.argmax(rms >= 0.1 * rms.max())) * frame / RATE
+
+
+def codec_round_trip(pcm, encoding, chunk, capture_rate=RATE):
+    """PCM as the recognizer sees it after the client encodes each message (captured at
+    capture_rate) and the server decodes it and resamples it to 16 kHz"""
+    import audio_codecs
+    from resampler import PolyphaseResampler, band_limited_resample
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if capture_rate != RATE:
+        samples = np.clip(band_limited_resample(samples, RATE, capture_rate), -32768, 32767).astype(np.int16)
+    resampler = PolyphaseResampler(capture_rate)
+    decoded = [resampler.process(audio_codecs.decode(audio_codecs.encode(samples[i:i + chunk], encoding), encoding))
+               for i in range(0, len(samples), chunk)]
+    if not decoded:
+        return b""
+    # Drop the filter delay so word timings stay comparable
+    skip = resampler.delay if capture_rate != RATE else 0
+    return np.concatenate(decoded)[skip:].astype(np.int16).tobytes()
+
+
+def run_config(config, dataset):
+    """Runs in a fresh worker process: metrics for one configuration over the whole dataset"""
+    import resource
+    from stt_engine import create_recognizer, simulate_realtime, word_error_rate
+
+    start = time.perf_counter()
+    recognizer = create_recognizer(config["engine"], RATE, model_path=config["model"],
+                                   model_size=config["model"], **config["options"])
+    load_s = time.perf_counter() - start
+
+    files = []
+    errors = ref_words = 0
+    audio_seconds = decode_seconds = 0.0
+    first_latencies, commit_lags, committed = [], 0.0, 0
+    for name, path, reference in dataset:
+        pcm = read_wav(path)
+        if config.get("encoding"):
+            pcm = codec_round_trip(pcm, config["encoding"], config.get("message_samples", config["chunk"]),
+                                   config.get("capture_rate", RATE))
+        recognizer.reset()
+        events = []
+        timing = simulate_realtime(recognizer, pcm, config["chunk"], events)
+        text = " ".join(e["text"] for e in events if e["type"] == "final")
+        seconds = len(pcm) / 2 / RATE
+        wer = word_error_rate(reference, text)
+        words = len(reference.split())
+
+        errors += wer * words
+        ref_words += words
+        audio_seconds += seconds
+        decode_seconds += timing["decode_seconds"]
+        if timing["first_event_s"] is not None:
+            first_latencies.append(max(timing["first_event_s"] - speech_onset(pcm), 0.0))
+        if timing["words_committed"]:
+            commit_lags += timing["mean_commit_latency_s"] * timing["words_committed"]
+            committed += timing["words_committed"]
+        files.append({"name": name, "wer": round(wer, 3), "real_time_factor": timing["real_time_factor"],
+                      "first_event_s": timing["first_event_s"], "hypothesis": text})
+
+    return {
+        "wer": round(errors / ref_words, 4) if ref_words else None,
+        "real_time_factor": round(decode_seconds / audio_seconds, 3) if audio_seconds else None,
+        "first_event_ms": round(1000 * float(np.median(first_latencies))) if first_latencies else None,
+        "commit_latency_ms": round(1000 * commit_lags / committed) if committed else None,
+        # ru_maxrss is KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "load_s": round(load_s, 2),
+        "audio_seconds": round(audio_seconds, 1),
+        "files": files,
+    }
+
+
+def run_matrix(matrix, dataset):
+    """{name: config + metrics (or "error")}, one fresh process per configuration"""
+    results = {}
+    spawn = multiprocessing.get_context("spawn")
+    for config in matrix:
+        print(f"  {config['name']} ...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            try:
+                metrics = pool.submit(run_config, config, dataset).result()
+            except Exception as e:
+                metrics = {"error": f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"}
+        results[config["name"]] = dict(config, **metrics)
+    return results
+
+
+def format_table(results):
+    width = max([len(name) for name in results] + [13])
+    lines = [f"{'configuration':<{width}}  " + "  ".join(f"{header:>9}" for _, header, _ in COLUMNS)]
+    for name, result in results.items():
+        if "error" in result:
+            lines.append(f"{name:<{width}}  error: {result['error']}")
+            continue
+        cells = [fmt.format(result[key]) if result.get(key) is not None else "-" for key, _, fmt in COLUMNS]
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{cell:>9}" for cell in cells))
+    return "\n".join(lines)
+
+
+def find_regressions(results, baseline, wer_tolerance=0.01, slowdown=1.25, memory_growth=1.15):
+    """Metrics that got worse than the baseline by more than the tolerances, as messages"""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None or "error" in old:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+        checks = (("wer", lambda o, n: n > o + wer_tolerance),
+                  ("real_time_factor", lambda o, n: n > o * slowdown),
+                  ("first_event_ms", lambda o, n: n > o * slowdown),
+                  ("commit_latency_ms", lambda o, n: n > o * slowdown),
+                  ("peak_rss_mb", lambda o, n: n > o * memory_growth))
+        for key, worse in checks:
+            if old.get(key) is not None and result.get(key) is not None and worse(old[key], result[key]):
+                regressions.append(f"{name}: {key} {old[key]} -> {result[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ASR engines and settings on a labeled audio set")
+    parser.add_argument("dataset", help="directory of <name>.wav + <name>.txt pairs")
+    parser.add_argument("--vosk-model", default=os.getenv("VOSK_MODEL", "model"))
+    parser.add_argument("--vosk-small-model", default=os.getenv("VOSK_SMALL_MODEL", "model-small"))
+    parser.add_argument("--encoding", default="adpcm", help="socket encoding for the server path")
+    parser.add_argument("--whisper-sizes", default="tiny,base,small")
+    parser.add_argument("--only", action="append", help="run configurations matching this glob (repeatable)")
+    parser.add_argument("--list", action="store_true", help="print the configurations and exit")
+    parser.add_argument("--json", help="write full results (usable as a --baseline) here")
+    parser.add_argument("--csv", help="write the comparison table as CSV here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run; exit 1 on regressions")
+    parser.add_argument("--wer-tolerance", type=float, default=0.01, help="allowed absolute WER increase")
+    parser.add_argument("--slowdown", type=float, default=1.25, help="allowed RTF / latency ratio")
+    parser.add_argument("--memory-growth", type=float, default=1.15, help="allowed peak memory ratio")
+    args = parser.parse_args()
+
+    matrix = default_matrix(args.vosk_model, args.vosk_small_model, args.encoding,
+                            [s for s in args.whisper_sizes.split(",") if s])
+    if args.only:
+        matrix = [c for c in matrix if any(fnmatch.fnmatch(c["name"], pattern) for pattern in args.only)]
+    if args.list:
+        for config in matrix:
+            print(config["name"])
+        return 0
+
+    dataset = load_dataset(args.dataset)
+    if not dataset:
+        print(f"No labeled WAVs in '{args.dataset}'")
+        return 1
+    print(f"{len(dataset)} recordings, {len(matrix)} configurations")
+    results = run_matrix(matrix, dataset)
+    print()
+    print(format_table(results))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write("configuration," + ",".join(key for key, _, _ in COLUMNS) + ",error\n")
+            for name, result in results.items():
+                values = ["" if result.get(key) is None else str(result[key]) for key, _, _ in COLUMNS]
+                f.write(",".join([name] + values + [result.get("error", "").replace(",", ";")]) + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.wer_tolerance, args.slowdown,
+                                           args.memory_growth)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Per-session PCM ring buffer
+Preallocated int16 storage for a session's microphone audio with per-question
+segment markers. Reads return NumPy views into the buffer rather than copies.
+In spill mode the ring is a memory-mapped WAV file, so long sessions keep their
+audio in the page cache instead of in Python objects. The file is a playable WAV
+only until the ring first wraps; after that it is raw ring storage (samples in
+rotated order) and its header declares no audio. It is scratch space, deleted
+when the session closes the buffer.
+"""
+
+import os
+import struct
+import numpy as np
+
+WAV_HEADER_BYTES = 44
+
+
+def _write_wav_header(f, num_samples, sample_rate):
+    data_bytes = num_samples * 2
+    f.seek(0)
+    f.write(b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE")
+    f.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16))
+    f.write(b"data" + struct.pack("<I", data_bytes))
+
+
+class PCMRingBuffer:
+    def __init__(self, max_seconds=600, sample_rate=16000, spill_path=None):
+        """
+        Args:
+            max_seconds: Hard cap on buffered audio; older audio is overwritten once full
+            sample_rate: Samples per second of the mono int16 stream
+            spill_path: If set, back the ring with a memory-mapped WAV file at this path
+        """
+        self.sample_rate = sample_rate
+        self.capacity = int(max_seconds * sample_rate)
+        self.spill_path = spill_path
+        self.written = 0  # total samples ever written; absolute stream position
+        self.segments = {}  # key -> [start, end]; end is None while the segment is open
+        self._open_segment = None
+
+        if spill_path:
+            # Size the file up front; pages are only materialized as they are written
+            with open(spill_path, "wb") as f:
+                _write_wav_header(f, 0, sample_rate)
+                f.truncate(WAV_HEADER_BYTES + self.capacity * 2)
+            self._buf = np.memmap(spill_path, dtype=np.int16, mode="r+",
+                                  offset=WAV_HEADER_BYTES, shape=(self.capacity,))
+        else:
+            # np.empty does not touch the pages, so RSS grows only as audio arrives
+            self._buf = np.empty(self.capacity, dtype=np.int16)
+
+    @property
+    def nbytes(self):
+        return self.capacity * 2
+
+    @property
+    def oldest(self):
+        """Absolute position of the oldest sample still held"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, pcm):
+        """Append int16 PCM (bytes-like or array) to the ring"""
+        samples = np.frombuffer(pcm, dtype=np.int16) if not isinstance(pcm, np.ndarray) else pcm
+        n = len(samples)
+        if n == 0 or self._buf is None:
+            return  # nothing to write, or the buffer was closed
+        if n > self.capacity:
+            # Only the tail can survive anyway
+            self.written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        pos = self.written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buf[pos:pos + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:]
+        self.written += n
+
+    def start_segment(self, key):
+        """Mark the current stream position as the start of segment key (e.g. a question number)"""
+        self.end_segment()
+        self.segments[key] = [self.written, None]
+        self._open_segment = key
+
+    def end_segment(self):
+        if self._open_segment is not None:
+            self.segments[self._open_segment][1] = self.written
+            self._open_segment = None
+
+    def views(self, start, end):
+        """Views (no copy) covering absolute positions [start, end); two when the range wraps"""
+        start = max(start, self.oldest)
+        end = min(end, self.written)
+        if end <= start or self._buf is None:
+            return []
+        a, b = start % self.capacity, end % self.capacity
+        if a < b or b == 0:
+            return [self._buf[a:b or self.capacity]]
+        return [self._buf[a:], self._buf[:b]]
+
+    def segment_views(self, key):
+        start, end = self.segments[key]
+        return self.views(start, self.written if end is None else end)
+
+    def segment_truncated(self, key):
+        """True if part of the segment has already been overwritten"""
+        return self.segments[key][0] < self.oldest
+
+    def segment_bytes(self, key):
+        """Segment PCM as bytes; copies, so only use it where a copy is needed anyway (e.g. IPC)"""
+        parts = self.segment_views(key)
+        if not parts:
+            return b""
+        return parts[0].tobytes() if len(parts) == 1 else np.concatenate(parts).tobytes()
+
+    def flush(self):
+        """In spill mode, sync pages and make the WAV header reflect the audio held
+        (none once the ring has wrapped, since the samples are no longer in order)"""
+        if self.spill_path and self._buf is not None:
+            self._buf.flush()
+            with open(self.spill_path, "r+b") as f:
+                _write_wav_header(f, self.written if self.written <= self.capacity else 0, self.sample_rate)
+
+    def close(self, delete_spill=False):
+        self.flush()
+        # Dropping the reference unmaps the file once no outstanding views remain
+        self._buf = None
+        if self.spill_path and delete_spill and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
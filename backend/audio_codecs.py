@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Compact encodings for microphone audio sent over the socket
+Decoders return mono int16 NumPy arrays at the connection's sample rate, which
+resampler.py brings to 16 kHz for the recognizer and the session ring buffer.
+interview.js holds the matching encoders; the encoding and the rate are agreed
+per connection in the Socket.IO connect handshake. Bit rates are at 16 kHz.
+
+    float32 - raw little-endian float32 in [-1, 1], the Web Audio format (512 kbit/s)
+    pcm16  - raw little-endian int16 (256 kbit/s)
+    mulaw  - G.711 µ-law, 8 bits per sample (128 kbit/s)
+    adpcm  - IMA-ADPCM, 4 bits per sample in independent blocks (~71 kbit/s)
+
+IMA-ADPCM blocks follow the WAV (Microsoft IMA) layout: a 4-byte header (int16
+first sample, uint8 step index, one reserved byte) followed by packed nibbles, low
+nibble first. Every block restarts the codec state, so blocks decode in parallel:
+the decoder walks the sample positions once and handles all blocks of a chunk per
+step as NumPy vectors.
+
+Benchmark decode cost and quality (optionally ASR accuracy with a Vosk model):
+    python audio_codecs.py
+    python audio_codecs.py fixtures/*.wav --model-path model
+"""
+
+import numpy as np
+
+ENCODINGS = ("adpcm", "mulaw", "float32", "pcm16")
+
+# 4-byte header + 32 bytes of nibbles = 65 samples per block. Short blocks cost ~5%
+# more bandwidth than 129-sample ones but halve the sequential steps per chunk.
+ADPCM_BLOCK_BYTES = 36
+
+_STEP_TABLE = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767
+], dtype=np.int32)
+_INDEX_ADJUST = np.array([-1, -1, -1, -1, 2, 4, 6, 8] * 2, dtype=np.int32)
+
+
+def _adpcm_tables():
+    """Signed predictor delta and next step index for every (step index, nibble) pair"""
+    codes = np.arange(16)
+    step = _STEP_TABLE[:, None]
+    diff = step >> 3
+    diff = diff + np.where(codes & 4, step, 0)
+    diff = diff + np.where(codes & 2, step >> 1, 0)
+    diff = diff + np.where(codes & 1, step >> 2, 0)
+    delta = np.where(codes & 8, -diff, diff).astype(np.int32)
+    next_index = np.clip(np.arange(89)[:, None] + _INDEX_ADJUST[None, :], 0, 88).astype(np.int32)
+    return delta, next_index
+
+
+_ADPCM_DELTA, _ADPCM_NEXT_INDEX = _adpcm_tables()
+_ADPCM_DELTA_FLAT = _ADPCM_DELTA.ravel()
+_ADPCM_NEXT_STATE = (_ADPCM_NEXT_INDEX * 16).ravel()
+
+
+def _mulaw_table():
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+_MULAW_DECODE = _mulaw_table()
+_MULAW_SEGMENT_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+
+def decode_mulaw(data):
+    """µ-law bytes -> int16 samples (one table lookup per byte)"""
+    return _MULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def encode_mulaw(samples):
+    """int16 samples -> µ-law bytes (G.711: 14-bit magnitude, bias 33, clip 8159)"""
+    x = np.asarray(samples, dtype=np.int32) >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(x), 8159) + 0x21
+    segment = np.searchsorted(_MULAW_SEGMENT_END, magnitude)
+    value = np.where(segment < 8, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F), 0x7F)
+    return ((value ^ mask) & 0xFF).astype(np.uint8).tobytes()
+
+
+def _decode_adpcm_blocks(blocks):
+    """(n_blocks, block_bytes) uint8 -> (n_blocks, samples_per_block) int16"""
+    n_blocks = blocks.shape[0]
+    predictor = blocks[:, 0:2].copy().view("<i2")[:, 0].astype(np.int32)
+    # State is step index * 16, so state + nibble indexes the flattened tables directly
+    state = np.minimum(blocks[:, 2], 88).astype(np.int32) * 16
+
+    # One row of nibbles per sample position, across all blocks
+    packed = blocks[:, 4:].T
+    codes = np.empty((packed.shape[0] * 2, n_blocks), dtype=np.int32)
+    codes[0::2] = packed & 0x0F
+    codes[1::2] = packed >> 4
+
+    rows = np.empty((codes.shape[0] + 1, n_blocks), dtype=np.int32)
+    rows[0] = predictor
+    for i in range(codes.shape[0]):
+        k = state + codes[i]
+        predictor += _ADPCM_DELTA_FLAT.take(k)
+        np.minimum(np.maximum(predictor, -32768, out=predictor), 32767, out=predictor)
+        state = _ADPCM_NEXT_STATE.take(k)
+        rows[i + 1] = predictor
+    return rows.T.astype(np.int16)
+
+
+def decode_ima_adpcm(data, block_bytes=ADPCM_BLOCK_BYTES):
+    """IMA-ADPCM blocks -> int16 samples; the last block may be shorter"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    full = len(buf) // block_bytes
+    parts = []
+    if full:
+        parts.append(_decode_adpcm_blocks(buf[:full * block_bytes].reshape(full, block_bytes)).ravel())
+    tail = buf[full * block_bytes:]
+    if len(tail) >= 4:
+        parts.append(_decode_adpcm_blocks(tail.reshape(1, -1)).ravel())
+    if not parts:
+        return np.zeros(0, dtype=np.int16)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def encode_ima_adpcm(samples, block_bytes=ADPCM_BLOCK_BYTES):
+    """int16 samples -> IMA-ADPCM blocks (reference encoder, mirrors interview.js)
+
+    A short final block carries an even number of coded samples, so an odd leftover
+    sample is dropped."""
+    x = np.asarray(samples, dtype=np.int32)
+    per_block = 1 + (block_bytes - 4) * 2
+    out = bytearray()
+    index = 0
+    for start in range(0, len(x), per_block):
+        block = x[start:start + per_block]
+        coded = len(block) - 1
+        coded -= coded % 2
+        predictor = int(block[0])
+        out += int(predictor).to_bytes(2, "little", signed=True) + bytes([index, 0])
+        nibbles = []
+        for sample in block[1:1 + coded]:
+            step = int(_STEP_TABLE[index])
+            diff = int(sample) - predictor
+            code = 8 if diff < 0 else 0
+            diff = abs(diff)
+            if diff >= step:
+                code |= 4
+                diff -= step
+            if diff >= step >> 1:
+                code |= 2
+                diff -= step >> 1
+            if diff >= step >> 2:
+                code |= 1
+            predictor = max(-32768, min(32767, predictor + int(_ADPCM_DELTA[index, code])))
+            index = int(_ADPCM_NEXT_INDEX[index, code])
+            nibbles.append(code)
+        out += bytes(nibbles[i] | (nibbles[i + 1] << 4) for i in range(0, len(nibbles), 2))
+    return bytes(out)
+
+
+def decode(data, encoding):
+    """Socket payload in the negotiated encoding -> int16 samples"""
+    if encoding == "adpcm":
+        return decode_ima_adpcm(data)
+    if encoding == "mulaw":
+        return decode_mulaw(data)
+    if encoding == "float32":
+        return np.clip(np.rint(np.frombuffer(data, dtype="<f4") * 32768), -32768, 32767).astype(np.int16)
+    return np.frombuffer(data, dtype=np.int16)
+
+
+def encode(samples, encoding):
+    if encoding == "adpcm":
+        return encode_ima_adpcm(samples)
+    if encoding == "mulaw":
+        return encode_mulaw(samples)
+    if encoding == "float32":
+        return (np.asarray(samples, dtype=np.float32) / 32768).astype("<f4").tobytes()
+    return np.asarray(samples, dtype=np.int16).tobytes()
+
+
+def negotiate(offered, allowed=ENCODINGS):
+    """First encoding in the client's preference list that the server allows; pcm16 otherwise"""
+    for encoding in offered or ():
+        if encoding in allowed:
+            return encoding
+    return "pcm16"
+
+
+def snr_db(reference, decoded):
+    n = min(len(reference), len(decoded))
+    ref = reference[:n].astype(np.float64)
+    noise = ref - decoded[:n].astype(np.float64)
+    return 10 * np.log10(np.sum(ref ** 2) / max(np.sum(noise ** 2), 1e-9))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import wave
+
+    parser = argparse.ArgumentParser(description="Benchmark socket audio encodings")
+    parser.add_argument("wavs", nargs="*", help="16 kHz mono WAV fixtures (a synthetic signal is used if none)")
+    parser.add_argument("--model-path", help="Vosk model; if set, compare transcripts of each encoding")
+    parser.add_argument("--chunk", type=int, default=4096, help="samples per socket message (interview.js sends 4096)")
+    args = parser.parse_args()
+
+    rate = 16000
+    fixtures = []
+    for path in args.wavs:
+        with wave.open(path, "rb") as wf:
+            fixtures.append((path, np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)))
+    if not fixtures:
+        # 10 s of a gliding harmonic tone with noise and pauses, roughly speech-like in level
+        t = np.arange(rate * 10) / rate
+        f0 = 140 + 60 * np.sin(2 * np.pi * 0.3 * t)
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+        envelope = (np.sin(2 * np.pi * 0.5 * t) > -0.3).astype(float)
+        rng = np.random.default_rng(0)
+        signal = 6000 * voice * envelope + rng.normal(0, 150, len(t))
+        fixtures.append(("synthetic", np.clip(signal, -32768, 32767).astype(np.int16)))
+
+    recognizer = None
+    if args.model_path:
+        from stt_engine import create_recognizer, run_file, word_error_rate
+        recognizer = create_recognizer("vosk", rate, model_path=args.model_path)
+
+    for name, pcm in fixtures:
+        seconds = len(pcm) / rate
+        print(f"\n{name} ({seconds:.1f} s)")
+        reference_text = None
+        for encoding in ("pcm16", "mulaw", "adpcm"):
+            # Encode per chunk, as the client does
+            chunks = [encode(pcm[i:i + args.chunk], encoding) for i in range(0, len(pcm), args.chunk)]
+            payload = sum(len(c) for c in chunks)
+
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                decoded = [decode(c, encoding) for c in chunks]
+                best = min(best, time.perf_counter() - start)
+            decoded = np.concatenate(decoded)
+
+            line = (f"  {encoding:<6} {payload * 8 / seconds / 1000:>6.1f} kbit/s  "
+                    f"decode {best / seconds * 1000:>6.3f} ms per audio second  "
+                    f"SNR {snr_db(pcm, decoded):>5.1f} dB" if encoding != "pcm16" else
+                    f"  {encoding:<6} {payload * 8 / seconds / 1000:>6.1f} kbit/s  "
+                    f"decode {best / seconds * 1000:>6.3f} ms per audio second")
+            if recognizer is not None:
+                recognizer.reset()
+                events, _ = run_file(recognizer, decoded.tobytes(), 4000)
+                text = " ".join(e["text"] for e in events if e["type"] == "final")
+                if reference_text is None:
+                    reference_text = text
+                line += f"  WER vs pcm16 {word_error_rate(reference_text, text):.3f}"
+            print(line)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Offline batch grading of recorded interviews
+Re-transcribes and re-grades archived sessions without a microphone: every answer
+WAV goes through a process pool of recognizers (one model per worker), and each
+session whose answers are transcribed gets its reactions and code feedback from a
+bounded thread pool of LLM calls. Results are written in the same format as
+ai_interview.py's interview_responses_*.json, one file per session, as soon as the
+session is done; a rerun skips sessions that already have a result, so an
+interrupted batch resumes where it stopped. An answer that failed to transcribe
+or to grade is stored with transcription_error / grading_error instead of a
+placeholder, and --retry-failed redoes those sessions.
+
+    archive/
+        <session id>/
+            answer_1.wav       16 kHz mono int16; the number is the question number
+            answer_2.wav
+            code.py            optional; the first code.* file is the submission
+            questions.json     optional; {"questions": [...]}, else --questions
+
+    python batch_grade.py archive --out graded --engine vosk --model-path model
+    python batch_grade.py archive --out graded --engine whisper --model-size base --asr-workers 4
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import re
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+RATE = 16000
+CHUNK_SAMPLES = 4000
+
+_ANSWER_WAV = re.compile(r"(\d+)\.wav$")
+
+# Per worker process; built once by the pool initializer
+_worker_recognizer = None
+
+
+def _init_worker(engine, model_path, model_size):
+    global _worker_recognizer
+    from stt_engine import create_recognizer
+    kwargs = {"partials": False} if engine == "vosk" else {}
+    _worker_recognizer = create_recognizer(engine, RATE, model_path=model_path, model_size=model_size, **kwargs)
+
+
+def _transcribe(path):
+    """Runs in a worker: (text, audio seconds, decode seconds, error) for one answer WAV"""
+    from stt_engine import run_file
+    start = time.perf_counter()
+    try:
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"expected 16 kHz mono 16-bit, got {wf.getframerate()} Hz, "
+                                 f"{wf.getnchannels()} channel(s), {wf.getsampwidth() * 8}-bit")
+            pcm = wf.readframes(wf.getnframes())
+        _worker_recognizer.reset()
+        events, timing = run_file(_worker_recognizer, pcm, CHUNK_SAMPLES)
+        text = " ".join(e["text"] for e in events if e["type"] == "final")
+        return text, timing["audio_seconds"], time.perf_counter() - start, None
+    except Exception as e:
+        return None, 0.0, time.perf_counter() - start, str(e)
+
+
+def discover(archive, default_questions):
+    """Sessions under archive: [{"id", "answers": {q_num: wav}, "code", "questions"}]"""
+    sessions = []
+    for directory in sorted(glob.glob(os.path.join(archive, "*", ""))):
+        answers = {}
+        for path in glob.glob(os.path.join(directory, "*.wav")):
+            match = _ANSWER_WAV.search(os.path.basename(path))
+            if match:
+                answers[int(match.group(1))] = path
+        if not answers:
+            continue
+        code_files = sorted(glob.glob(os.path.join(directory, "code.*")))
+        code = None
+        if code_files:
+            with open(code_files[0]) as f:
+                code = f.read()
+        questions = default_questions
+        if os.path.exists(os.path.join(directory, "questions.json")):
+            with open(os.path.join(directory, "questions.json")) as f:
+                questions = json.load(f).get("questions", default_questions)
+        sessions.append({
+            "id": os.path.basename(os.path.normpath(directory)),
+            "answers": dict(sorted(answers.items())),
+            "code": code,
+            "code_source": code_files[0] if code_files else None,
+            "questions": questions,
+        })
+    return sessions
+
+
+def result_path(out_dir, session_id):
+    return os.path.join(out_dir, f"interview_responses_{session_id}.json")
+
+
+def is_graded(out_dir, session_id, retry_failed=False):
+    path = result_path(out_dir, session_id)
+    if not os.path.exists(path):
+        return False
+    if not retry_failed:
+        return True
+    with open(path) as f:
+        return not has_errors(json.load(f))
+
+
+def has_errors(document):
+    """True if any answer failed to transcribe or grade, or the code review failed"""
+    entries = document["responses"] + [document.get("code_review") or {}]
+    return any("transcription_error" in e or "grading_error" in e for e in entries)
+
+
+def grade_session(client, session, transcripts, min_answer_length=10):
+    """Reactions and code feedback for a transcribed session, as an interview_responses document"""
+    from ai_interview import generate_code_feedback, generate_reaction, interview_document
+    responses = []
+    for q_num, (text, audio_seconds, error) in sorted(transcripts.items()):
+        questions = session["questions"]
+        entry = {
+            "question_number": q_num,
+            "question": questions[q_num - 1] if 0 < q_num <= len(questions) else None,
+            "answer": text or "",
+            "ai_reaction": None,
+            "audio_seconds": audio_seconds,
+        }
+        if error:
+            entry["transcription_error"] = error
+        elif len(entry["answer"]) >= min_answer_length:
+            try:
+                entry["ai_reaction"] = generate_reaction(client, entry["answer"], raise_errors=True)
+            except Exception as e:
+                entry["grading_error"] = str(e)
+        responses.append(entry)
+
+    code_review = None
+    if session["code"]:
+        code_review = {
+            "code_source": session["code_source"],
+            "code": session["code"],
+            "feedback": None
+        }
+        try:
+            code_review["feedback"] = generate_code_feedback(client, session["code"], raise_errors=True)
+        except Exception as e:
+            code_review["grading_error"] = str(e)
+    document = interview_document(responses, code_review)
+    document["session_id"] = session["id"]
+    return document
+
+
+def write_result(out_dir, session_id, document):
+    """Write atomically, so a crash never leaves a partial file that a rerun would skip"""
+    path = result_path(out_dir, session_id)
+    with open(path + ".tmp", "w") as f:
+        json.dump(document, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def run_batch(archive, out_dir, client, engine="vosk", model_path="model", model_size="base",
+              asr_workers=None, llm_concurrency=8, questions_file="interview_questions.json", limit=None,
+              retry_failed=False):
+    """Grade every session in archive that has no result in out_dir yet; returns a stats dict"""
+    os.makedirs(out_dir, exist_ok=True)
+    default_questions = []
+    if os.path.exists(questions_file):
+        with open(questions_file) as f:
+            default_questions = json.load(f).get("questions", [])
+    else:
+        print(f"Questions file '{questions_file}' not found; sessions without questions.json get no question text")
+
+    sessions = discover(archive, default_questions)
+    pending = [s for s in sessions if not is_graded(out_dir, s["id"], retry_failed)]
+    print(f"{len(sessions)} sessions found, {len(sessions) - len(pending)} already graded, {len(pending)} to do")
+    if limit:
+        pending = pending[:limit]
+
+    asr_workers = asr_workers or os.cpu_count() or 1
+    stats = {"sessions": 0, "answers": 0, "failed_answers": 0, "failed_sessions": 0,
+             "audio_seconds": 0.0, "decode_seconds": 0.0}
+    start = time.time()
+
+    # spawn: each worker loads its own model, and nothing from this process is inherited
+    asr_pool = ProcessPoolExecutor(
+        max_workers=asr_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(engine, model_path, model_size)
+    )
+    llm_pool = ThreadPoolExecutor(max_workers=llm_concurrency)
+    try:
+        transcripts = {s["id"]: {} for s in pending}
+        by_id = {s["id"]: s for s in pending}
+        futures = {}
+        for session in pending:
+            for q_num, path in session["answers"].items():
+                futures[asr_pool.submit(_transcribe, path)] = (session["id"], q_num)
+
+        def grade(session):
+            document = grade_session(client, session, transcripts.pop(session["id"]))
+            write_result(out_dir, session["id"], document)
+            return document
+
+        grading = []
+        for future in as_completed(futures):
+            session_id, q_num = futures[future]
+            text, audio_seconds, decode_seconds, error = future.result()
+            transcripts[session_id][q_num] = (text, audio_seconds, error)
+            stats["answers"] += 1
+            stats["failed_answers"] += error is not None
+            stats["audio_seconds"] += audio_seconds
+            stats["decode_seconds"] += decode_seconds
+            if error:
+                print(f"  {session_id} answer {q_num}: {error}")
+            session = by_id[session_id]
+            if len(transcripts[session_id]) == len(session["answers"]):
+                # All answers are in: grading overlaps with transcription of later sessions
+                grading.append(llm_pool.submit(grade, session))
+
+        for future in as_completed(grading):
+            stats["failed_sessions"] += has_errors(future.result())
+            stats["sessions"] += 1
+            if stats["sessions"] % 50 == 0:
+                print(f"  {stats['sessions']}/{len(pending)} sessions graded")
+    finally:
+        asr_pool.shutdown(cancel_futures=True)
+        llm_pool.shutdown()
+
+    elapsed = time.time() - start
+    stats["elapsed_seconds"] = round(elapsed, 1)
+    stats["asr_workers"] = asr_workers
+    stats["interviews_per_hour_per_core"] = round(stats["sessions"] / (elapsed / 3600) / asr_workers, 1) if elapsed else None
+    stats["asr_real_time_factor"] = round(stats["decode_seconds"] / stats["audio_seconds"], 3) if stats["audio_seconds"] else None
+    return stats
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    parser = argparse.ArgumentParser(description="Re-transcribe and re-grade recorded interviews")
+    parser.add_argument("archive", help="directory with one subdirectory of answer WAVs (+ code) per session")
+    parser.add_argument("--out", default="graded", help="where interview_responses_<session>.json files go")
+    parser.add_argument("--engine", default="vosk", choices=["vosk", "whisper"])
+    parser.add_argument("--model-path", default="model", help="Vosk model directory")
+    parser.add_argument("--model-size", default="base", help="Faster-Whisper model size")
+    parser.add_argument("--asr-workers", type=int, help="transcription processes (default: one per core)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="sessions graded by the LLM at once")
+    parser.add_argument("--questions", default="interview_questions.json")
+    parser.add_argument("--limit", type=int, help="grade at most this many sessions in this run")
+    parser.add_argument("--retry-failed", action="store_true", help="redo sessions with answers that failed to transcribe or grade")
+    args = parser.parse_args()
+
+    load_dotenv()
+    stats = run_batch(
+        args.archive, args.out, OpenAI(api_key=os.getenv("OPENAI_API_KEY")),
+        engine=args.engine, model_path=args.model_path, model_size=args.model_size,
+        asr_workers=args.asr_workers, llm_concurrency=args.llm_concurrency,
+        questions_file=args.questions, limit=args.limit, retry_failed=args.retry_failed
+    )
+    print(f"\n{stats['sessions']} sessions ({stats['failed_sessions']} with failures, see --retry-failed), "
+          f"{stats['answers']} answers ({stats['failed_answers']} failed to transcribe) in {stats['elapsed_seconds']}s")
+    print(f"ASR real-time factor {stats['asr_real_time_factor']} over {stats['audio_seconds']:.0f}s of audio "
+          f"on {stats['asr_workers']} worker(s)")
+    print(f"{stats['interviews_per_hour_per_core']} interviews per hour per core")
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+Two Sum Test Runner
+Executes OA submissions against a Two Sum test suite in resource-limited worker processes
+Interpreted languages are served from a pool of pre-warmed workers so a submission
+never pays interpreter startup on the request path
+
+NOT A SECURITY BOUNDARY: workers only get rlimits (CPU, memory, file size), a stripped
+environment, a scratch directory and a wall-clock timeout. They run as the server's user
+with its filesystem and network access, so a submission can read the backend's files
+(including .env, and the server process's environment with its API keys), write wherever
+that user can, and open connections. Before running untrusted candidate code, start the
+workers through real isolation (e.g. nsjail or gVisor, as a separate unprivileged user
+with no network and only their scratch directory mounted).
+"""
+
+import json
+import math
+import os
+import queue
+import secrets
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; timeouts still apply
+    resource = None
+
+
+# Harness run inside a warm Python worker. It blocks on stdin until a job arrives,
+# so interpreter startup and imports are paid before the submission shows up.
+# Harnesses report thread CPU time rather than wall time, so test groups running side by
+# side on a busy box do not inflate each other's timings (Node has no fine-grained thread
+# clock, so the JavaScript harness falls back to hrtime). Fast cases are repeated
+# (up to 5 runs / 50 ms) and the best run is kept so JIT warmup does not skew the estimate.
+# The submission shares stdout with the harness, so every result line starts with a tag that
+# is random per run; _score reads only tagged lines and ignores whatever the submission prints.
+PYTHON_HARNESS = r'''
+import json, sys, time
+job = json.loads(sys.stdin.read())
+tag = job.pop("tag")
+ns = {"__name__": "submission"}
+try:
+    exec(compile(job["code"], "<submission>", "exec"), ns)
+    if "Solution" in ns:
+        fn = ns["Solution"]().twoSum
+    else:
+        fn = ns.get("twoSum") or ns["two_sum"]
+except BaseException as e:
+    print("\n" + tag + "ERR " + type(e).__name__ + ": " + str(e).replace("\n", " "), flush=True)
+    sys.exit(0)
+for nums, target in job["tests"]:
+    try:
+        best, spent = None, 0
+        for _ in range(5):
+            args = list(nums)
+            start = time.thread_time_ns()
+            out = fn(args, target)
+            elapsed = time.thread_time_ns() - start
+            best = elapsed if best is None else min(best, elapsed)
+            spent += elapsed
+            if spent > 50_000_000:
+                break
+        print("\n" + tag, int(out[0]), int(out[1]), best, flush=True)
+    except BaseException as e:
+        print("\n" + tag + "ERR " + type(e).__name__ + ": " + str(e).replace("\n", " "), flush=True)
+'''
+
+JAVASCRIPT_HARNESS = r'''
+let data = "";
+process.stdin.on("data", (c) => (data += c));
+process.stdin.on("end", () => {
+  const job = JSON.parse(data);
+  const tag = job.tag;
+  delete job.tag;
+  let fn;
+  try {
+    fn = new Function(job.code + `
+;return typeof twoSum !== "undefined" ? twoSum
+  : (typeof Solution !== "undefined" ? (n, t) => new Solution().twoSum(n, t) : undefined);`)();
+    if (typeof fn !== "function") throw new Error("twoSum is not defined");
+  } catch (e) {
+    process.stdout.write("\n" + tag + "ERR " + String(e).replace(/\n/g, " ") + "\n");
+    return;
+  }
+  const out = [];
+  for (const [nums, target] of job.tests) {
+    try {
+      let best = null, spent = 0n, r;
+      for (let k = 0; k < 5 && spent <= 50000000n; k++) {
+        const args = nums.slice();
+        const start = process.hrtime.bigint();
+        r = fn(args, target);
+        const elapsed = process.hrtime.bigint() - start;
+        if (best === null || elapsed < best) best = elapsed;
+        spent += elapsed;
+      }
+      out.push(`${tag} ${r[0]} ${r[1]} ${best}`);
+    } catch (e) {
+      out.push(tag + "ERR " + String(e).replace(/\n/g, " "));
+    }
+  }
+  process.stdout.write("\n" + out.join("\n") + "\n");
+});
+'''
+
+JAVA_MAIN = r'''
+import java.io.*;
+import java.lang.management.*;
+
+public class Main {
+    public static void main(String[] args) throws Exception {
+        ThreadMXBean clock = ManagementFactory.getThreadMXBean();
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
+        String tag = reader.readLine().trim();
+        StreamTokenizer in = new StreamTokenizer(reader);
+        StringBuilder out = new StringBuilder("\n");
+        in.nextToken();
+        int t = (int) in.nval;
+        for (int k = 0; k < t; k++) {
+            in.nextToken(); int n = (int) in.nval;
+            in.nextToken(); int target = (int) in.nval;
+            int[] nums = new int[n];
+            for (int i = 0; i < n; i++) { in.nextToken(); nums[i] = (int) in.nval; }
+            try {
+                long best = Long.MAX_VALUE, spent = 0;
+                int[] r = null;
+                for (int rep = 0; rep < 5 && spent <= 50_000_000L; rep++) {
+                    int[] args = nums.clone();
+                    long start = clock.getCurrentThreadCpuTime();
+                    r = new Solution().twoSum(args, target);
+                    long elapsed = clock.getCurrentThreadCpuTime() - start;
+                    best = Math.min(best, elapsed);
+                    spent += elapsed;
+                }
+                out.append(tag).append(' ').append(r[0]).append(' ').append(r[1]).append(' ').append(best).append('\n');
+            } catch (Throwable e) {
+                out.append(tag).append("ERR ").append(e.toString().replace('\n', ' ')).append('\n');
+            }
+        }
+        System.out.print(out);
+        System.out.flush();
+    }
+}
+'''
+
+CPP_MAIN = r'''
+static long long thread_cpu_ns() {
+    struct timespec ts;
+    clock_gettime(CLOCK_THREAD_CPUTIME_ID, &ts);
+    return ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
+int main() {
+    char tag[64];
+    int t;
+    if (scanf("%63s %d", tag, &t) != 2) return 0;
+    for (int k = 0; k < t; k++) {
+        int n, target;
+        scanf("%d %d", &n, &target);
+        std::vector<int> nums(n);
+        for (int i = 0; i < n; i++) scanf("%d", &nums[i]);
+        try {
+            long long best = -1, spent = 0;
+            std::vector<int> r;
+            for (int rep = 0; rep < 5 && spent <= 50000000LL; rep++) {
+                std::vector<int> args(nums);
+                long long start = thread_cpu_ns();
+                r = Solution().twoSum(args, target);
+                long long elapsed = thread_cpu_ns() - start;
+                if (best < 0 || elapsed < best) best = elapsed;
+                spent += elapsed;
+            }
+            // stdio and cout are synchronized, so this cannot land inside a line the code printed
+            if (r.size() < 2) printf("\n%sERR returned fewer than two indices\n", tag);
+            else printf("\n%s %d %d %lld\n", tag, r[0], r[1], best);
+        } catch (...) {
+            printf("\n%sERR exception thrown\n", tag);
+        }
+    }
+    return 0;
+}
+'''
+
+# Sizes for the timing cases; a 4x step separates O(n) (~4x slower) from O(n^2) (~16x)
+LARGE_SIZES = (2000, 8000)
+
+
+def large_case(n):
+    """Worst case for a nested-loop scan: the only valid pair sits at the very end"""
+    # Evens can never sum to the odd target, and -2 does not collide with any of them
+    nums = [2 * k for k in range(n - 2)] + [1, -2]
+    return {"name": f"large_n_{n}", "nums": nums, "target": -1, "n": n}
+
+
+def two_sum_suite():
+    """Functional cases from the problem statement plus the large-n timing cases"""
+    cases = [
+        {"name": "example_1", "nums": [2, 7, 11, 15], "target": 9},
+        {"name": "example_2", "nums": [3, 2, 4], "target": 6},
+        {"name": "example_3", "nums": [3, 3], "target": 6},
+        {"name": "negatives", "nums": [-3, 4, 3, 90], "target": 0},
+        {"name": "zeros", "nums": [0, 4, 3, 0], "target": 0},
+        {"name": "duplicates_apart", "nums": [5, 1, 2, 3, 5], "target": 10},
+        {"name": "pair_at_end", "nums": list(range(1, 12)), "target": 21},
+    ]
+    for case in cases:
+        case["n"] = len(case["nums"])
+    return cases + [large_case(n) for n in LARGE_SIZES]
+
+
+def check_answer(case, i, j):
+    nums = case["nums"]
+    return (i != j and 0 <= i < len(nums) and 0 <= j < len(nums)
+            and nums[i] + nums[j] == case["target"])
+
+
+def estimate_complexity(cases):
+    """Estimate the growth exponent from the two large-n timings"""
+    timed = [c for c in cases if c["name"].startswith("large_n_")]
+    if len(timed) < 2:
+        return None
+    small, big = timed[0], timed[-1]
+    if big.get("error") == "timeout" and small["passed"]:
+        return {"estimate": "O(n^2) or worse", "exponent": None}
+    if not (small["passed"] and big["passed"]) or not small["cpu_ms"]:
+        return None
+    ratio = max(big["cpu_ms"], 1e-6) / small["cpu_ms"]
+    exponent = math.log(ratio) / math.log(big["n"] / small["n"])
+    estimate = "O(n)" if exponent < 1.5 else "O(n^2) or worse"
+    return {"estimate": estimate, "exponent": round(exponent, 2)}
+
+
+def format_report(report):
+    """Summarize a test report as plain text for the feedback prompt"""
+    if report is None:
+        return "Automated tests were not run."
+    if report.get("error"):
+        return f"Automated tests could not run: {report['error']}"
+
+    lines = [f"Automated tests ({report['language']}): {report['passed']} of {report['total']} passed."]
+    failures = {}
+    for c in report["cases"]:
+        if not c["passed"]:
+            failures.setdefault(c["error"] or "wrong answer", []).append(c["name"])
+    for error, names in failures.items():
+        lines.append(f"Failed {', '.join(names)}: {error}")
+    timings = [c for c in report["cases"] if c["name"].startswith("large_n_") and c["passed"]]
+    if timings:
+        lines.append("Large input timing: " + ", ".join(
+            f"n={c['n']} took {c['cpu_ms']:.2f} ms" for c in timings))
+    complexity = report.get("complexity")
+    if complexity:
+        lines.append(f"Measured runtime growth suggests {complexity['estimate']}.")
+    return "\n".join(lines)
+
+
+class TestRunnerPool:
+    """Pool of resource-limited worker processes that run Two Sum submissions (not isolated; see the module docstring)"""
+
+    WARM_LANGUAGES = ("python", "javascript")
+    COMPILED_LANGUAGES = ("java", "cpp")
+
+    def __init__(self, warm_workers=2, parallelism=None, time_limit=10.0,
+                 cpu_limit=10, memory_limit_mb=256, compile_timeout=30.0):
+        self.warm_workers = warm_workers
+        self.time_limit = time_limit
+        self.cpu_limit = cpu_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.compile_timeout = compile_timeout
+        self.workdir = tempfile.mkdtemp(prefix="surveycode_runner_")
+
+        self.available = {
+            "python": sys.executable,
+            "javascript": shutil.which("node"),
+            "java": shutil.which("javac") and shutil.which("java"),
+            "cpp": shutil.which("g++"),
+        }
+        self._idle = {lang: queue.Queue() for lang in self.WARM_LANGUAGES if self.available[lang]}
+        self._closed = False
+
+        # Test groups of one submission run side by side on separate workers
+        self.executor = ThreadPoolExecutor(max_workers=parallelism or max(4, os.cpu_count() or 1))
+        for language in self._idle:
+            self._refill(language)
+
+    def _limits(self, language):
+        """Return a preexec_fn applying rlimits inside the child process"""
+        cpu = self.cpu_limit
+        # V8 and the JVM reserve huge address spaces up front; their heaps are capped by flags instead
+        memory = self.memory_limit_mb * 1024 * 1024 if language in ("python", "cpp") else None
+
+        def apply():
+            if resource is None:
+                return
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+            resource.setrlimit(resource.RLIMIT_FSIZE, (1 << 20, 1 << 20))
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+            if memory:
+                resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        return apply
+
+    def _popen(self, language, args, cwd):
+        return subprocess.Popen(
+            args,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={"PATH": os.environ.get("PATH", ""), "LANG": "C.UTF-8"},
+            preexec_fn=self._limits(language) if resource else None,
+            start_new_session=True,
+        )
+
+    def _spawn(self, language):
+        """Start a warm interpreter worker waiting for its job on stdin"""
+        cwd = tempfile.mkdtemp(dir=self.workdir)
+        if language == "python":
+            args = [self.available["python"], "-I", "-S", "-c", PYTHON_HARNESS]
+        else:
+            args = [self.available["javascript"], f"--max-old-space-size={self.memory_limit_mb}",
+                    "-e", JAVASCRIPT_HARNESS]
+        proc = self._popen(language, args, cwd)
+        proc.sandbox_dir = cwd
+        return proc
+
+    def _refill(self, language):
+        idle = self._idle[language]
+        while not self._closed and idle.qsize() < self.warm_workers:
+            idle.put(self._spawn(language))
+
+    def _acquire(self, language):
+        try:
+            proc = self._idle[language].get_nowait()
+        except queue.Empty:
+            proc = self._spawn(language)
+        # Workers are single-use so no state leaks between submissions; top the pool back up
+        self.executor.submit(self._refill, language)
+        return proc
+
+    def _communicate(self, proc, payload):
+        """Feed one job to a worker and collect its output, enforcing the wall-clock limit"""
+        try:
+            out, _ = proc.communicate(payload.encode(), timeout=self.time_limit)
+            return out.decode(errors="replace").splitlines(), None
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                proc.kill()
+            out, _ = proc.communicate()
+            return out.decode(errors="replace").splitlines(), "timeout"
+        finally:
+            shutil.rmtree(getattr(proc, "sandbox_dir", ""), ignore_errors=True)
+
+    def _run_group_warm(self, language, code, tests, tag):
+        proc = self._acquire(language)
+        payload = json.dumps({"code": code, "tests": [[t["nums"], t["target"]] for t in tests], "tag": tag})
+        return self._communicate(proc, payload)
+
+    def _run_group_compiled(self, language, binary_dir, tests, tag):
+        if language == "java":
+            args = [self.available["java"], f"-Xmx{self.memory_limit_mb}m", "-Xss64m", "-cp", binary_dir, "Main"]
+        else:
+            args = [os.path.join(binary_dir, "solution")]
+        cwd = tempfile.mkdtemp(dir=self.workdir)
+        proc = self._popen(language, args, cwd)
+        proc.sandbox_dir = cwd
+        payload = [tag, str(len(tests))]
+        for t in tests:
+            payload.append(f"{len(t['nums'])} {t['target']}")
+            payload.append(" ".join(map(str, t["nums"])))
+        return self._communicate(proc, "\n".join(payload) + "\n")
+
+    def _compile(self, code, language):
+        """Compile a Java or C++ submission; returns (build_dir, error)"""
+        build_dir = tempfile.mkdtemp(dir=self.workdir)
+        if language == "java":
+            with open(os.path.join(build_dir, "Solution.java"), "w") as f:
+                f.write(code)
+            with open(os.path.join(build_dir, "Main.java"), "w") as f:
+                f.write(JAVA_MAIN)
+            args = [shutil.which("javac"), "-nowarn", "Main.java", "Solution.java"]
+        else:
+            with open(os.path.join(build_dir, "main.cpp"), "w") as f:
+                f.write("#include <bits/stdc++.h>\nusing namespace std;\n" + code + "\n" + CPP_MAIN)
+            args = [self.available["cpp"], "-O2", "-std=c++17", "-o", "solution", "main.cpp"]
+        try:
+            result = subprocess.run(args, cwd=build_dir, capture_output=True, timeout=self.compile_timeout)
+        except subprocess.TimeoutExpired:
+            return build_dir, "compilation timed out"
+        if result.returncode != 0:
+            message = result.stderr.decode(errors="replace").strip().splitlines()
+            return build_dir, "compilation failed: " + (message[0] if message else "unknown error")
+        return build_dir, None
+
+    def run(self, code, language="python"):
+        """Run a submission against the Two Sum suite and return a report dict"""
+        start = time.perf_counter()
+        language = (language or "python").lower()
+        report = {"language": language, "passed": 0, "total": 0, "cases": [], "complexity": None, "error": None}
+
+        if language not in self.available:
+            report["error"] = f"unsupported language '{language}'"
+            return report
+        if not self.available[language]:
+            report["error"] = f"no {language} toolchain on the server"
+            return report
+
+        suite = two_sum_suite()
+        # Functional cases share one worker; each timing case gets its own so they run in parallel
+        groups = [[c for c in suite if not c["name"].startswith("large_n_")]]
+        groups += [[c] for c in suite if c["name"].startswith("large_n_")]
+
+        # Marks the harness's result lines; the submission cannot know it in advance
+        tag = "@" + secrets.token_hex(8) + "@"
+        build_dir = None
+        try:
+            if language in self.WARM_LANGUAGES:
+                futures = [self.executor.submit(self._run_group_warm, language, code, g, tag) for g in groups]
+            else:
+                build_dir, error = self._compile(code, language)
+                if error:
+                    report["error"] = error
+                    return report
+                futures = [self.executor.submit(self._run_group_compiled, language, build_dir, g, tag) for g in groups]
+
+            for group, future in zip(groups, futures):
+                lines, group_error = future.result()
+                report["cases"].extend(self._score(group, lines, group_error, tag))
+        except Exception as e:
+            print(f"Test runner error: {e}")
+            report["error"] = str(e)
+            return report
+        finally:
+            if build_dir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+
+        order = {c["name"]: i for i, c in enumerate(suite)}
+        report["cases"].sort(key=lambda c: order[c["name"]])
+        report["total"] = len(report["cases"])
+        report["passed"] = sum(c["passed"] for c in report["cases"])
+        report["all_passed"] = report["passed"] == report["total"]
+        report["complexity"] = estimate_complexity(report["cases"])
+        report["wall_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return report
+
+    def _score(self, group, lines, group_error, tag):
+        # Anything else on stdout was printed by the submission
+        lines = [line[len(tag):].strip() for line in lines if line.startswith(tag)]
+        # A single ERR line with no per-test output means the submission failed to load
+        load_error = lines[0][4:] if len(lines) == 1 and lines[0].startswith("ERR ") and len(group) > 1 else None
+        results = []
+        for idx, case in enumerate(group):
+            result = {"name": case["name"], "n": case["n"], "passed": False, "cpu_ms": None, "error": None}
+            line = lines[idx] if idx < len(lines) and not load_error else None
+            if line is None:
+                result["error"] = load_error or group_error or "no output"
+            elif line.startswith("ERR "):
+                result["error"] = line[4:]
+            else:
+                try:
+                    i, j, elapsed_ns = (int(x) for x in line.split())
+                    result["cpu_ms"] = round(elapsed_ns / 1e6, 3)
+                    result["passed"] = check_answer(case, i, j)
+                except ValueError:
+                    result["error"] = "malformed output"
+            results.append(result)
+        return results
+
+    def shutdown(self):
+        self._closed = True
+        self.executor.shutdown(wait=False)
+        for idle in self._idle.values():
+            while not idle.empty():
+                proc = idle.get_nowait()
+                proc.kill()
+                proc.wait()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+REFERENCE_SOLUTIONS = {
+    "python": """
+class Solution:
+    def twoSum(self, nums, target):
+        index = {}
+        for i, x in enumerate(nums):
+            if target - x in index:
+                return [index[target - x], i]
+            index[x] = i
+        return []
+""",
+    "javascript": """
+var twoSum = function(nums, target) {
+  const index = new Map();
+  for (let i = 0; i < nums.length; i++) {
+    if (index.has(target - nums[i])) return [index.get(target - nums[i]), i];
+    index.set(nums[i], i);
+  }
+  return [];
+};
+""",
+    "java": """
+import java.util.*;
+
+class Solution {
+    public int[] twoSum(int[] nums, int target) {
+        Map<Integer, Integer> index = new HashMap<>();
+        for (int i = 0; i < nums.length; i++) {
+            if (index.containsKey(target - nums[i])) return new int[]{index.get(target - nums[i]), i};
+            index.put(nums[i], i);
+        }
+        return new int[]{};
+    }
+}
+""",
+    "cpp": """
+class Solution {
+public:
+    vector<int> twoSum(vector<int>& nums, int target) {
+        unordered_map<int, int> index;
+        for (int i = 0; i < (int) nums.size(); i++) {
+            auto it = index.find(target - nums[i]);
+            if (it != index.end()) return {it->second, i};
+            index[nums[i]] = i;
+        }
+        return {};
+    }
+};
+""",
+}
+
+
+# Debug output a candidate might leave in: one statement (no trailing newline) inserted
+# after the line that builds the index, for checking that it cannot shift the results
+DEBUG_PRINTS = {
+    "python": ("index = {}", '; print("debug", target, end="")'),
+    "javascript": ("const index = new Map();", 'process.stdout.write("debug " + target); console.log(nums.length);'),
+    "java": ("Map<Integer, Integer> index = new HashMap<>();", 'System.out.print("debug " + target);'),
+    "cpp": ("unordered_map<int, int> index;", 'cout << "debug " << target;'),
+}
+
+
+def with_debug_print(code, language):
+    anchor, statement = DEBUG_PRINTS[language]
+    return code.replace(anchor, anchor + " " + statement)
+
+
+if __name__ == "__main__":
+    # Throughput benchmark: submissions per second per core with the reference solutions
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    runner = TestRunnerPool()
+    failed = False
+    try:
+        for language, code in REFERENCE_SOLUTIONS.items():
+            report = runner.run(code, language)
+            if report["error"]:
+                print(f"{language:<11} skipped: {report['error']}")
+                continue
+            # A submission that prints must score exactly like one that does not
+            noisy = runner.run(with_debug_print(code, language), language)
+            if noisy["error"] or [c["passed"] for c in noisy["cases"]] != [c["passed"] for c in report["cases"]]:
+                failed = True
+                print(f"{language:<11} FAIL: printing changed the results: "
+                      f"{noisy['error'] or [(c['name'], c['error']) for c in noisy['cases'] if not c['passed']]}")
+            start = time.perf_counter()
+            for _ in range(rounds):
+                runner.run(code, language)
+            elapsed = time.perf_counter() - start
+            estimate = (report["complexity"] or {}).get("estimate", "complexity unknown")
+            print(f"{language:<11} {report['passed']}/{report['total']} passed, {estimate}, "
+                  f"{rounds / elapsed:.1f} submissions/s, {rounds / elapsed / cores:.1f} per core")
+    finally:
+        runner.shutdown()
+    sys.exit(1 if failed else 0)
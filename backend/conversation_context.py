@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted conversation context
+Keeps the most recent question/answer turns verbatim and folds older turns into a
+running summary, so the prompt stops growing with the length of the interview.
+Summaries are updated in the background between turns; a turn only leaves the
+verbatim window once a summary that covers it has landed, so nothing is dropped
+while an update is still in flight. Nothing is summarized until something reads
+the context (the first build_messages call), so a caller that only records turns
+never pays for summary calls.
+
+Message order is static system prompt -> summary -> verbatim turns, so the prompt
+ends with the candidate's latest answer. The summary only changes when a fold lands,
+which is also the only time turns leave the front of the window; between folds the
+prompt is append-only, so everything up to the newest turn repeats the previous
+prompt and can be served from the provider's prompt cache. OpenAI only caches
+prefixes of 1024 tokens or more, so the default budget lets the verbatim window
+grow to about 2000 tokens, and each fold brings it down to half the budget so the
+prefix then stays unchanged for several turns rather than shifting on every one.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SUMMARY_PROMPT = """You maintain running notes on a job interview for the interviewer.
+Merge the new exchanges into the existing notes. Keep facts about the candidate
+(background, projects, interests, goals, strengths, concerns) and drop pleasantries.
+Write plain sentences, under {max_words} words."""
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    def __init__(self, client, token_budget=2048, keep_recent=3, model="gpt-4o-mini", summary_words=120):
+        """
+        Args:
+            client: OpenAI client used for summary updates
+            token_budget: Estimated tokens allowed for verbatim turns before older ones are folded
+                          (down to half of it)
+            keep_recent: Number of latest turns kept verbatim unless they alone exceed the budget
+            model: Model used to update the summary
+            summary_words: Length cap for the running summary
+        """
+        self.client = client
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.model = model
+        self.summary_words = summary_words
+
+        self.summary = ""
+        self._turns = []  # (question, answer) pairs not yet folded into the summary
+        self._folding = 0  # leading turns covered by the summary update in flight
+        self._all_turns = []  # everything, for the replay-everything comparison
+        self._lock = threading.Lock()
+        # One worker so summary updates apply in order
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self._read = False  # set by the first build_messages; no folds before that
+
+        # Per prompt: tokens actually sent vs. what replaying every turn would have sent
+        self.prompt_log = []
+        self.summary_tokens = 0
+
+    def _turn_tokens(self, turns):
+        return sum(estimate_tokens(q) + estimate_tokens(a) for q, a in turns)
+
+    def add_turn(self, question, answer):
+        """Record a finished turn and, if the window is over budget, fold older turns in the background"""
+        with self._lock:
+            self._turns.append((question, answer))
+            self._all_turns.append((question, answer))
+            if self._read:
+                self._schedule_fold()
+
+    def _schedule_fold(self):
+        # Called with the lock held
+        if self._folding or self._turn_tokens(self._turns) <= self.token_budget:
+            return
+        count = 0
+        # Fold down to half the budget, sparing the keep_recent latest turns; past the full
+        # budget fold into those too, but always keep the latest turn
+        while count < len(self._turns) - 1:
+            remaining = self._turn_tokens(self._turns[count:])
+            if not (remaining > self.token_budget
+                    or (remaining > self.token_budget // 2 and count < len(self._turns) - self.keep_recent)):
+                break
+            count += 1
+        if count == 0:
+            return
+        self._folding = count
+        self._pending = self._executor.submit(self._fold, self.summary, self._turns[:count])
+
+    def _fold(self, summary, turns):
+        exchanges = "\n".join(f"Q: {q}\nA: {a}" for q, a in turns)
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT.format(max_words=self.summary_words)},
+                    {"role": "user", "content": f"Existing notes:\n{summary or '(none)'}\n\nNew exchanges:\n{exchanges}"}
+                ],
+                max_tokens=self.summary_words * 2,
+                temperature=0.3
+            )
+            new_summary = response.choices[0].message.content.strip()
+            usage = getattr(response, "usage", None)
+        except Exception as e:
+            # Keep the turns verbatim; the next add_turn retries the fold
+            print(f"⚠️  Context summary error: {e}")
+            with self._lock:
+                self._folding = 0
+            return
+
+        with self._lock:
+            self.summary = new_summary
+            if usage is not None:
+                self.summary_tokens += usage.prompt_tokens + usage.completion_tokens
+            del self._turns[:self._folding]
+            self._folding = 0
+            self._schedule_fold()
+
+    def build_messages(self, system_prompt):
+        """Messages for the next prompt: static system prompt, the summary, then the verbatim turns"""
+        with self._lock:
+            summary = self.summary
+            turns = list(self._turns)
+            if not self._read:
+                # First reader: catch up on turns recorded so far, ready for the next prompt
+                self._read = True
+                self._schedule_fold()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"Notes on the candidate's earlier answers:\n{summary}"})
+        for question, answer in turns:
+            messages.append({"role": "assistant", "content": question})
+            messages.append({"role": "user", "content": answer})
+        return messages
+
+    def record_prompt(self, messages, prompt_tokens=None):
+        """Log one prompt's size; prompt_tokens is the provider's count when available"""
+        system = messages[0]["content"]
+        sent = prompt_tokens if prompt_tokens is not None else sum(estimate_tokens(m["content"]) for m in messages)
+        with self._lock:
+            replay_all = estimate_tokens(system) + self._turn_tokens(self._all_turns)
+            self.prompt_log.append({
+                "turn": len(self._all_turns),
+                "prompt_tokens": sent,
+                "replay_all_tokens_est": replay_all,
+                "verbatim_turns": len(self._turns),
+                "summary_tokens_est": estimate_tokens(self.summary) if self.summary else 0,
+            })
+
+    def wait(self, timeout=None):
+        """Block until the summary update in flight (if any) has finished"""
+        pending = self._pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Process-wide model registry
+Loads each speech model once per process and shares it across every consumer
+(server sessions, the CLI interviewer, the standalone STT scripts, pool workers).
+prefork.py fills it in the master so forked workers share the model pages
+copy-on-write instead of loading their own copy.
+"""
+
+import threading
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _get(key, load):
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = load()
+            _models[key] = model
+        return model
+
+
+def get_vosk_model(path="model"):
+    """Return the Vosk model at path, loading it on first use"""
+    def load():
+        from vosk import Model
+        print(f"Loading Vosk model from '{path}'...")
+        model = Model(path)
+        print("Model loaded!")
+        return model
+    return _get(("vosk", path), load)
+
+
+def register_vosk_model(path, model):
+    """Serve an already-built model for path (e.g. the stub model in soak_test.py)"""
+    with _lock:
+        _models[("vosk", path)] = model
+
+
+def get_whisper_model(model_size="base", device="cpu", compute_type="int8", cpu_threads=0):
+    """Return a Faster-Whisper model, loading it on first use"""
+    def load():
+        from faster_whisper import WhisperModel
+        print(f"Loading Faster-Whisper {model_size} model... (this may take a moment)")
+        model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+        print("Model loaded!")
+        return model
+    return _get(("whisper", model_size, device, compute_type, cpu_threads), load)
+
+
+def loaded_models():
+    with _lock:
+        return list(_models)
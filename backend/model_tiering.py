@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Load-adaptive ASR model tiering
+Two Vosk models stay loaded: the accurate vosk-model-en-us-0.22 ("large") and the
+fast vosk-model-small-en-us-0.15 ("small"). Every recognizer.accept() call reports
+how long it took for how much audio; from that the monitor derives the CPU share
+spent decoding over a sliding window, the per-tier real-time factor and the number
+of chunks decoding right now. The policy gives a session the large model only if
+the projected load with one more large session stays under the high-water mark,
+and keeps handing out the small model until load falls back under the low-water
+mark, so a spike never pushes decoding below real time.
+"""
+
+import collections
+import os
+import threading
+import time
+
+TIERS = ("large", "small")
+
+
+class DecodeLoadMonitor:
+    def __init__(self, window=10.0, cores=None):
+        """
+        Args:
+            window: Seconds of history used for load and real-time factor
+            cores: CPU cores available for decoding (defaults to this process's affinity)
+        """
+        self.window = window
+        if cores is None:
+            cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        self.cores = cores
+        self._events = collections.deque()  # (finished_at, tier, audio_seconds, decode_seconds)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def end(self, tier, audio_seconds, decode_seconds):
+        now = time.time()
+        with self._lock:
+            self._in_flight -= 1
+            self._events.append((now, tier, audio_seconds, decode_seconds))
+            self._trim(now)
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._events and self._events[0][0] < cutoff:
+            self._events.popleft()
+
+    def snapshot(self):
+        """Decode load (CPU share across cores), per-tier RTF and chunks decoding right now"""
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            events = list(self._events)
+            in_flight = self._in_flight
+        audio = dict.fromkeys(TIERS, 0.0)
+        decode = dict.fromkeys(TIERS, 0.0)
+        for _, tier, audio_seconds, decode_seconds in events:
+            audio[tier] = audio.get(tier, 0.0) + audio_seconds
+            decode[tier] = decode.get(tier, 0.0) + decode_seconds
+        return {
+            "load": sum(decode.values()) / (self.window * self.cores),
+            "rtf": {tier: decode[tier] / audio[tier] if audio[tier] else None for tier in audio},
+            "in_flight": in_flight,
+            "cores": self.cores,
+        }
+
+
+class TierPolicy:
+    def __init__(self, monitor, high_load=0.75, low_load=0.5, max_in_flight=None,
+                 default_rtf=None, ramp_seconds=3.0):
+        """
+        Args:
+            monitor: DecodeLoadMonitor
+            high_load: Projected decode load above which new assignments get the small model
+            low_load: Load below which the large model is handed out again (hysteresis)
+            max_in_flight: Chunks decoding at once that count as a backlog (default 2x cores)
+            default_rtf: Assumed real-time factor per tier until one has been measured
+            ramp_seconds: How long a fresh large assignment counts as load before its
+                          audio shows up in the monitor (stops bursts all getting "large")
+        """
+        self.monitor = monitor
+        self.high_load = high_load
+        self.low_load = low_load
+        self.max_in_flight = max_in_flight or 2 * monitor.cores
+        self.default_rtf = default_rtf or {"large": 0.35, "small": 0.08}
+        self.ramp_seconds = ramp_seconds
+        self.degraded = False
+        self.assigned = dict.fromkeys(TIERS, 0)
+        self._recent_large = collections.deque()
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Tier for a session starting (or moving on to) its next answer"""
+        snap = self.monitor.snapshot()
+        rtf = snap["rtf"].get("large") or self.default_rtf["large"]
+        now = time.time()
+        with self._lock:
+            while self._recent_large and self._recent_large[0] < now - self.ramp_seconds:
+                self._recent_large.popleft()
+            # Each real-time stream on the large model costs rtf core-seconds per second
+            projected = snap["load"] + (1 + len(self._recent_large)) * rtf / snap["cores"]
+            if snap["in_flight"] > self.max_in_flight or projected > self.high_load:
+                self.degraded = True
+            elif snap["load"] < self.low_load:
+                self.degraded = False
+            tier = "small" if self.degraded else "large"
+            self.assigned[tier] += 1
+            if tier == "large":
+                self._recent_large.append(now)
+        return tier
+
+    def stats(self):
+        snap = self.monitor.snapshot()
+        with self._lock:
+            return {
+                "degraded": self.degraded,
+                "load": round(snap["load"], 3),
+                "rtf": {tier: round(v, 3) if v is not None else None for tier, v in snap["rtf"].items()},
+                "in_flight": snap["in_flight"],
+                "cores": snap["cores"],
+                "high_load": self.high_load,
+                "low_load": self.low_load,
+                "assigned": dict(self.assigned),
+            }
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Spoken walkthrough of per-segment code feedback
+Feedback for every segment is generated concurrently and joined into one script,
+which is voiced in as few TTS requests as the per-request character limit allows
+(the parts are plain CBR MP3 and are concatenated). The TTS character alignment
+maps each segment's span in the script to start/end seconds in the audio, so the
+page can highlight the segment being talked about. Narrations are cached by a hash
+of the submission and its segmentation, in memory and optionally on disk, but only
+once complete: a narration with missing feedback or a failed TTS part is kept in
+memory just long enough to serve its audio, and the next request rebuilds it.
+"""
+
+import base64
+import collections
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# mp3_44100_128 is constant bitrate, so byte counts give exact part durations
+OUTPUT_FORMAT = "mp3_44100_128"
+BYTES_PER_SECOND = 128000 / 8
+
+MAX_CHARS = 2500  # per TTS request
+
+
+def narration_key(code, language, segments, voice_id):
+    payload = json.dumps({
+        "code": code,
+        "language": language,
+        "segments": [[s["start_line"], s["end_line"]] for s in segments],
+        "voice": voice_id,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def build_script(feedbacks, max_chars=MAX_CHARS):
+    """Split the spoken script into TTS parts at segment boundaries
+
+    Returns a list of parts, each {"text", "spans": [(segment index, char start, char end)]}.
+    A single segment longer than max_chars gets a part of its own; segments whose feedback
+    is None (it failed) are left out of the script.
+    """
+    parts = []
+    current = None
+    for index, feedback in enumerate(feedbacks):
+        if feedback is None:
+            continue
+        line = f"Segment {index + 1}. {feedback.strip()}"
+        if current is None or len(current["text"]) + 1 + len(line) > max_chars:
+            current = {"text": "", "spans": []}
+            parts.append(current)
+        if current["text"]:
+            current["text"] += " "
+        start = len(current["text"])
+        current["text"] += line
+        current["spans"].append((index, start, len(current["text"])))
+    return parts
+
+
+def _span_times(part, audio, alignment):
+    """Start/end seconds of each span within one part's audio"""
+    duration = len(audio) / BYTES_PER_SECOND
+    times = []
+    for index, start, end in part["spans"]:
+        if alignment and len(alignment["character_start_times_seconds"]) >= end:
+            times.append((index, alignment["character_start_times_seconds"][start],
+                          alignment["character_end_times_seconds"][end - 1]))
+        else:
+            # No alignment: assume an even speaking rate over the part
+            total = len(part["text"]) or 1
+            times.append((index, duration * start / total, duration * end / total))
+    return duration, times
+
+
+class NarrationBuilder:
+    def __init__(self, feedback_fn, synthesize_fn, voice_id, cache_dir=None, cache_size=64,
+                 max_chars=MAX_CHARS, workers=4):
+        """
+        Args:
+            feedback_fn: (segment code, index, total, language) -> feedback text, or None
+                         (or an exception) on failure
+            synthesize_fn: (text, previous_text, next_text) -> (MP3 bytes, alignment dict or None)
+            voice_id: Part of the cache key, so a voice change re-synthesizes
+            cache_dir: Optional directory for <key>.json / <key>.mp3, kept across restarts
+            cache_size: Narrations kept in memory
+            max_chars: Characters per TTS request
+            workers: Concurrent feedback and TTS requests per narration
+        """
+        self.feedback_fn = feedback_fn
+        self.synthesize_fn = synthesize_fn
+        self.voice_id = voice_id
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.max_chars = max_chars
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._cache = collections.OrderedDict()  # key -> (metadata, audio)
+        self._lock = threading.Lock()
+        self._key_locks = {}  # one build per key at a time; later callers get the cached result
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key):
+        """(metadata, audio) for a built narration, or None"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json")) as f:
+                metadata = json.load(f)
+            with open(os.path.join(self.cache_dir, f"{key}.mp3"), "rb") as f:
+                audio = f.read()
+        except OSError:
+            return None
+        self._remember(key, metadata, audio)
+        return metadata, audio
+
+    def _remember(self, key, metadata, audio):
+        with self._lock:
+            self._cache[key] = (metadata, audio)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def build(self, code, language, segments):
+        """Narration metadata for code split into segments ({"start_line", "end_line"}, 1-based)
+
+        Returns (metadata, cached): metadata has the key, total duration, whether every
+        segment's feedback and every TTS part succeeded ("complete"), and per-segment
+        feedback (None if it failed) with start/end seconds; the audio is fetched
+        separately with get(key).
+        """
+        key = narration_key(code, language, segments, self.voice_id)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                entry = self.get(key)
+                if entry is not None and entry[0].get("complete"):
+                    self.hits += 1
+                    return entry[0], True
+                self.misses += 1
+                metadata, audio = self._build(key, code, language, segments)
+                # An incomplete narration is held in memory only so its audio can be fetched;
+                # it is not a cache hit and not written to disk, so the next request retries it
+                if audio:
+                    self._remember(key, metadata, audio)
+                    if self.cache_dir and metadata["complete"]:
+                        with open(os.path.join(self.cache_dir, f"{key}.mp3"), "wb") as f:
+                            f.write(audio)
+                        with open(os.path.join(self.cache_dir, f"{key}.json"), "w") as f:
+                            json.dump(metadata, f)
+                return metadata, False
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+    def _feedback(self, lines, segment, index, total, language):
+        try:
+            return self.feedback_fn("\n".join(lines[segment["start_line"] - 1:segment["end_line"]]),
+                                    index, total, language)
+        except Exception as e:
+            print(f"Narration feedback error (segment {index + 1}): {e}")
+            return None
+
+    def _build(self, key, code, language, segments):
+        lines = code.replace("\r\n", "\n").split("\n")
+        total = len(segments)
+        feedbacks = list(self.executor.map(
+            lambda item: self._feedback(lines, item[1], item[0], total, language),
+            enumerate(segments)
+        ))
+
+        parts = build_script(feedbacks, self.max_chars)
+        # Neighbouring text keeps the intonation continuous across part boundaries
+        synthesized = list(self.executor.map(
+            lambda i: self.synthesize_fn(
+                parts[i]["text"],
+                parts[i - 1]["text"] if i > 0 else None,
+                parts[i + 1]["text"] if i + 1 < len(parts) else None),
+            range(len(parts))
+        ))
+
+        audio = b""
+        offset = 0.0
+        out_segments = [dict(start_line=s["start_line"], end_line=s["end_line"], index=i,
+                             feedback=feedbacks[i], start=None, end=None)
+                        for i, s in enumerate(segments)]
+        for part, (part_audio, alignment) in zip(parts, synthesized):
+            if not part_audio:
+                continue
+            duration, times = _span_times(part, part_audio, alignment)
+            for index, start, end in times:
+                out_segments[index]["start"] = round(offset + start, 3)
+                out_segments[index]["end"] = round(offset + end, 3)
+            audio += part_audio
+            offset += duration
+
+        metadata = {
+            "key": key,
+            "complete": all(f is not None for f in feedbacks) and all(a for a, _ in synthesized),
+            "duration": round(offset, 3),
+            "tts_requests": len(parts),
+            "segments": out_segments,
+        }
+        return metadata, audio
+
+    def stats(self):
+        with self._lock:
+            cached = len(self._cache)
+        return {"cached": cached, "hits": self.hits, "misses": self.misses}
+
+
+def decode_alignment(response):
+    """(MP3 bytes, alignment dict) from an ElevenLabs convert_with_timestamps response"""
+    audio = base64.b64decode(response.audio_base_64)
+    alignment = response.alignment
+    if alignment is None:
+        return audio, None
+    return audio, {
+        "character_start_times_seconds": list(alignment.character_start_times_seconds),
+        "character_end_times_seconds": list(alignment.character_end_times_seconds),
+    }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Pre-fork launcher for the interview server
+Loads the Vosk model once in the master, then forks workers that share its pages
+copy-on-write. Each worker serves app.py on its own port (base_port + i); put a
+load balancer with sticky sessions in front, since interview sessions live in worker memory.
+
+Usage:
+    python prefork.py --workers 4 --base-port 5001
+    python prefork.py --workers 4 --no-preload   # baseline: every worker loads its own model
+"""
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+import traceback
+
+import model_registry
+
+
+def memory_usage(pid):
+    """Return RSS, PSS and USS in MB for a process, from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def print_memory_report(master_pid, workers):
+    print("\n" + "=" * 60)
+    print("MEMORY PER PROCESS (MB)")
+    print("=" * 60)
+    print(f"{'process':<16}{'pid':>8}{'RSS':>10}{'PSS':>10}{'USS':>10}")
+    rows = [("master", master_pid)] + [(f"worker:{port}", pid) for pid, port in workers.items()]
+    total_pss = 0.0
+    for name, pid in rows:
+        usage = memory_usage(pid)
+        if usage is None:
+            print(f"{name:<16}{pid:>8}{'n/a':>10}{'n/a':>10}{'n/a':>10}")
+            continue
+        total_pss += usage["pss_mb"]
+        print(f"{name:<16}{pid:>8}{usage['rss_mb']:>10}{usage['pss_mb']:>10}{usage['uss_mb']:>10}")
+    print("-" * 60)
+    print(f"Total PSS (actual memory used by the group): {total_pss:.1f} MB")
+    print("=" * 60 + "\n", flush=True)
+
+
+def run_worker(host, port):
+    """Body of a forked worker: import the app (reusing the preloaded model) and serve"""
+    import app as server
+    print(f"Worker {os.getpid()} serving on {host}:{port}")
+    server.socketio.run(server.app, host=host, port=port, debug=False, use_reloader=False,
+                        allow_unsafe_werkzeug=True)
+
+
+def spawn(host, port):
+    pid = os.fork()
+    if pid == 0:
+        # Default signal handling in the child; the master owns shutdown
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            run_worker(host, port)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork launcher for app.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--base-port", type=int, default=5001)
+    parser.add_argument("--model", default=os.getenv("VOSK_MODEL", "model"), help="Vosk model directory")
+    parser.add_argument("--small-model", default=os.getenv("VOSK_SMALL_MODEL", "model-small"),
+                        help="Small Vosk model used under load (preloaded if the directory exists)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Let each worker load its own model (for comparison)")
+    parser.add_argument("--report-after", type=float, default=30.0,
+                        help="Seconds after startup to print the per-worker memory report")
+    parser.add_argument("--max-fast-failures", type=int, default=5,
+                        help="Stop restarting a port after this many consecutive workers that died "
+                             "within --fast-failure seconds of starting")
+    parser.add_argument("--fast-failure", type=float, default=10.0,
+                        help="A worker exiting sooner than this after starting counts as a failed start")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("prefork.py needs os.fork(); run app.py directly on this platform")
+        sys.exit(1)
+
+    # Workers read these when they import app.py; each worker's tier policy sees only its
+    # own decode load, so it gets an even share of the cores
+    os.environ["VOSK_MODEL"] = args.model
+    os.environ["VOSK_SMALL_MODEL"] = args.small_model
+    os.environ.setdefault("ASR_CORES", str(max(1, (os.cpu_count() or 1) // args.workers)))
+
+    if not args.no_preload:
+        model_registry.get_vosk_model(args.model)
+        if os.path.isdir(args.small_model):
+            model_registry.get_vosk_model(args.small_model)
+        # Move everything allocated so far out of the GC's reach so collections in the
+        # workers never write to (and un-share) the master's object pages
+        gc.collect()
+        gc.freeze()
+
+    workers = {}  # pid -> port
+    started = {}  # port -> time its current worker was forked
+    failures = {}  # port -> consecutive fast failures
+    restarts = {}  # port -> time a delayed restart is due
+    for i in range(args.workers):
+        port = args.base_port + i
+        workers[spawn(args.host, port)] = port
+        started[port] = time.time()
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    report_at = time.time() + args.report_after
+    while workers or (restarts and not stopping):
+        now = time.time()
+        if report_at and now >= report_at:
+            print_memory_report(os.getpid(), workers)
+            report_at = None
+        for port, due in list(restarts.items()):
+            if now >= due and not stopping:
+                # Replacement is forked from the master, so it still shares the preloaded model
+                del restarts[port]
+                workers[spawn(args.host, port)] = port
+                started[port] = time.time()
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG) if workers else (0, 0)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.5)
+            continue
+        port = workers.pop(pid)
+        if stopping:
+            continue
+        if time.time() - started[port] < args.fast_failure:
+            failures[port] = failures.get(port, 0) + 1
+        else:
+            failures[port] = 0
+        if failures[port] >= args.max_fast_failures:
+            print(f"Worker on port {port} failed to start {failures[port]} times in a row, not restarting it")
+            continue
+        # Exponential backoff while a worker keeps dying at start-up (0.5 s, 1 s, 2 s, ... up to 60 s)
+        delay = min(0.5 * 2 ** failures[port], 60.0) if failures[port] else 0.0
+        print(f"Worker {pid} on port {port} exited ({status}), restarting in {delay:.1f}s")
+        restarts[port] = time.time() + delay
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Request tagging, on-demand sampling profiler and slow-handler watchdog
+Handlers mark the thread they run on with a tag ("audio_chunk", "/api/code_review").
+The profiler samples every thread's stack from a background thread for a fixed
+window and folds the samples into collapsed stacks (one "frame;frame;... count"
+line per stack, the input format of flamegraph.pl and speedscope), prefixed with
+the tag of the handler that was running. The watchdog prints the stack of any
+watched handler that runs past a threshold, once per call.
+
+Samples are taken with sys._current_frames(), so there is no tracing overhead on
+the handlers themselves and nothing runs at all while no profile is requested.
+"""
+
+import collections
+import functools
+import sys
+import threading
+import time
+import traceback
+
+
+class HandlerTracker:
+    """Which handler each thread is currently running, and since when"""
+
+    def __init__(self):
+        self._active = {}  # thread id -> (tag, kind, started_at)
+        self._lock = threading.Lock()
+
+    def enter(self, tag, kind="http"):
+        with self._lock:
+            self._active[threading.get_ident()] = (tag, kind, time.time())
+
+    def exit(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def active(self):
+        with self._lock:
+            return dict(self._active)
+
+    def tagged(self, tag, kind="socket"):
+        """Decorator for handlers that are not Flask routes (e.g. Socket.IO events)"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                self.enter(tag, kind)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.exit()
+            return wrapper
+        return decorator
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, tracker, interval=0.01, max_depth=64):
+        """
+        Args:
+            tracker: HandlerTracker used to tag samples
+            interval: Seconds between samples (0.01 = 100 Hz)
+            max_depth: Innermost frames kept per stack
+        """
+        self.tracker = tracker
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()  # one profile at a time
+
+    def run(self, seconds, interval=None, include_idle=False):
+        """Sample for the given number of seconds; returns (stack -> count, number of ticks)
+
+        interval: Overrides the default seconds between samples
+        include_idle: Also keep threads that are not inside a tagged handler
+                      (tagged "untagged:<thread name>")
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            return self._sample(seconds, interval or self.interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds, interval, include_idle):
+        me = threading.get_ident()
+        names = {}
+        stacks = collections.Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        next_tick = time.perf_counter()
+        while next_tick < deadline:
+            active = self.tracker.active()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                if thread_id in active:
+                    tag = active[thread_id][0]
+                elif include_idle:
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    tag = f"untagged:{names.get(thread_id, thread_id)}"
+                else:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    frames.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks[";".join([tag] + frames[::-1])] += 1
+            samples += 1
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+        return stacks, samples
+
+
+def collapsed(stacks):
+    """Brendan Gregg's collapsed format, heaviest stacks first"""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+def summarize(stacks, samples, interval, top=15):
+    """Per-handler sample counts and the hottest leaf frames"""
+    by_handler = collections.Counter()
+    leaves = collections.Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        by_handler[frames[0]] += count
+        leaves[f"{frames[0]};{frames[-1]}"] += count
+    return {
+        "samples": samples,
+        "interval_ms": interval * 1000,
+        "by_handler": dict(by_handler.most_common()),
+        "hot_frames": [{"stack": k, "samples": v} for k, v in leaves.most_common(top)],
+    }
+
+
+class Watchdog:
+    def __init__(self, tracker, threshold=1.0, kinds=("socket",), history=50):
+        """
+        Args:
+            tracker: HandlerTracker to watch
+            threshold: Seconds a handler may run before its stack is logged
+            kinds: Handler kinds to watch ("socket", "http")
+            history: Number of reports kept for the admin endpoint
+        """
+        self.tracker = tracker
+        self.threshold = threshold
+        self.kinds = kinds
+        self.reports = collections.deque(maxlen=history)
+        self._reported = set()  # (thread id, started_at) already logged
+        self._thread = threading.Thread(target=self._run, daemon=True, name="handler-watchdog")
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.threshold / 4)
+            now = time.time()
+            active = self.tracker.active()
+            frames = None
+            for thread_id, (tag, kind, started_at) in active.items():
+                if kind not in self.kinds or now - started_at < self.threshold:
+                    continue
+                key = (thread_id, started_at)
+                if key in self._reported:
+                    continue
+                self._reported.add(key)
+                if frames is None:
+                    frames = sys._current_frames()
+                frame = frames.get(thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+                self.reports.append({"handler": tag, "running_s": round(now - started_at, 3),
+                                     "at": time.strftime("%Y-%m-%d %H:%M:%S"), "stack": stack})
+                print(f"[Watchdog] {tag} has been running for {now - started_at:.2f}s:\n{stack}")
+            # Forget calls that have finished
+            live = {(tid, entry[2]) for tid, entry in active.items()}
+            self._reported &= live
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Pre-generated interviewer reactions with pre-synthesized audio
+The live reaction is a vague acknowledgment that never references the answer, so
+it can be written and voiced ahead of time. `build` asks the LLM for a varied set
+of reactions per answer bucket, synthesizes each one once and stores text and MP3
+audio on disk. At runtime `ReactionBank.pick` classifies the answer with a few set
+lookups (length and a small sentiment lexicon), then picks a reaction from the
+matching bucket that this session has not heard recently.
+
+    bank/
+        bank.json        [{"id", "text", "length", "tone", "audio"}, ...]
+        <id>.mp3
+
+Build and time a bank:
+    python reaction_bank.py build --out reaction_bank --per-bucket 8
+    python reaction_bank.py bench --bank reaction_bank
+    python reaction_bank.py bench --bank reaction_bank --llm 5
+"""
+
+import json
+import os
+import random
+import re
+import time
+
+LENGTHS = ("short", "medium", "long")
+TONES = ("positive", "neutral", "negative")
+
+# Word counts separating short/medium/long answers
+SHORT_WORDS = 8
+LONG_WORDS = 40
+
+_WORD = re.compile(r"[a-z']+")
+_POSITIVE = frozenset("""
+    love loved enjoy enjoyed enjoying excited exciting passionate passion fun great
+    awesome amazing proud happy glad like liked interesting fascinating rewarding
+    good best favorite favourite learned grew succeed succeeded success won win
+""".split())
+_NEGATIVE = frozenset("""
+    hard difficult struggle struggled struggling stressful stress tough failed fail
+    failure worried nervous frustrating frustrated unfortunately bad hate hated
+    challenging lost confusing confused tired overwhelmed stuck afraid sorry
+""".split())
+_NEGATIONS = frozenset("not no never don't didn't wasn't isn't can't couldn't".split())
+
+# Shared with the live path in app.py
+REACTION_SYSTEM_PROMPT = "You are a warm, friendly interviewer. Give a brief, positive acknowledgment in 1 sentence. Be encouraging and supportive but keep it general and vague. Don't reference specific details from their answer. Keep it under 12 words. DO NOT ask any questions or follow-ups."
+
+_BUCKET_STYLE = {
+    "short": "The candidate gave a brief answer of a few words.",
+    "medium": "The candidate gave a normal-length answer.",
+    "long": "The candidate gave a long, detailed answer.",
+    "positive": "They sounded enthusiastic.",
+    "neutral": "They sounded matter-of-fact.",
+    "negative": "They talked about something difficult or frustrating; be gently supportive.",
+}
+
+
+def classify(answer):
+    """(length, tone) bucket for an answer transcript"""
+    words = _WORD.findall(answer.lower())
+    if len(words) < SHORT_WORDS:
+        length = "short"
+    elif len(words) > LONG_WORDS:
+        length = "long"
+    else:
+        length = "medium"
+
+    score = 0
+    for i, word in enumerate(words):
+        polarity = (word in _POSITIVE) - (word in _NEGATIVE)
+        if polarity and i and words[i - 1] in _NEGATIONS:
+            polarity = -polarity
+        score += polarity
+    tone = "positive" if score > 0 else "negative" if score < 0 else "neutral"
+    return length, tone
+
+
+class ReactionBank:
+    def __init__(self, path):
+        """
+        Args:
+            path: Directory written by build()
+        """
+        with open(os.path.join(path, "bank.json")) as f:
+            entries = json.load(f)
+        self.entries = {}
+        self.audio = {}  # id -> MP3 bytes
+        self.by_text = {}  # text -> id, so /api/tts can serve bank audio
+        self.buckets = {}  # (length, tone) -> [id, ...]
+        for entry in entries:
+            with open(os.path.join(path, entry["audio"]), "rb") as f:
+                self.audio[entry["id"]] = f.read()
+            self.entries[entry["id"]] = entry
+            self.by_text[entry["text"]] = entry["id"]
+            self.buckets.setdefault((entry["length"], entry["tone"]), []).append(entry["id"])
+        self._all = list(self.entries)
+        self._rng = random.Random()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pick(self, answer, recent=(), match=True):
+        """Reaction entry for this answer, avoiding ids in recent when possible
+
+        match: Pick from the answer's (length, tone) bucket; otherwise from the whole bank
+        """
+        candidates = self.buckets.get(classify(answer), self._all) if match else self._all
+        fresh = [i for i in candidates if i not in recent]
+        if not fresh:
+            fresh = [i for i in self._all if i not in recent] or candidates
+        return self.entries[self._rng.choice(fresh)]
+
+    def audio_for(self, text):
+        reaction_id = self.by_text.get(text)
+        return self.audio.get(reaction_id) if reaction_id else None
+
+
+def _generate_texts(client, length, tone, count, model="gpt-4o-mini"):
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REACTION_SYSTEM_PROMPT + " Write several such acknowledgments, each worded differently. Reply with a JSON object {\"reactions\": [...]}."},
+            {"role": "user", "content": f"{_BUCKET_STYLE[length]} {_BUCKET_STYLE[tone]} Write {count} acknowledgments."}
+        ],
+        response_format={"type": "json_object"},
+        temperature=1.0
+    )
+    texts = json.loads(response.choices[0].message.content).get("reactions", [])
+    return [t.strip() for t in texts if isinstance(t, str) and t.strip() and "?" not in t]
+
+
+def build(path, openai_client, tts, per_bucket=8):
+    """Generate, voice and store per_bucket reactions for every (length, tone) bucket
+
+    tts: Callable text -> MP3 bytes (or None on failure)
+    """
+    os.makedirs(path, exist_ok=True)
+    entries, seen = [], set()
+    for length in LENGTHS:
+        for tone in TONES:
+            texts = [t for t in _generate_texts(openai_client, length, tone, per_bucket) if t.lower() not in seen]
+            for text in texts[:per_bucket]:
+                audio = tts(text)
+                if not audio:
+                    print(f"  TTS failed, skipping: {text}")
+                    continue
+                reaction_id = f"{length}-{tone}-{len(entries):03d}"
+                with open(os.path.join(path, f"{reaction_id}.mp3"), "wb") as f:
+                    f.write(audio)
+                entries.append({"id": reaction_id, "text": text, "length": length, "tone": tone,
+                                "audio": f"{reaction_id}.mp3"})
+                seen.add(text.lower())
+            print(f"{length:<6} {tone:<8} {sum(e['length'] == length and e['tone'] == tone for e in entries)} reactions")
+    with open(os.path.join(path, "bank.json"), "w") as f:
+        json.dump(entries, f, indent=2)
+    return entries
+
+
+SAMPLE_ANSWERS = [
+    "Yes.",
+    "I'm a third year computer science student.",
+    "I really enjoyed my internship last summer, I built a dashboard and learned a lot about React and testing.",
+    "Honestly it was hard, the deadline was tough and I struggled with the database migrations for weeks.",
+    "I started programming in high school with some small Python scripts, then I took a few online courses, "
+    "joined the robotics club, and since then I have worked on a couple of web apps and a compiler project "
+    "for a class which was probably the most interesting thing I've done so far.",
+]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or benchmark the reaction bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Generate reactions with the LLM and voice them with ElevenLabs")
+    build_parser.add_argument("--out", default="reaction_bank")
+    build_parser.add_argument("--per-bucket", type=int, default=8)
+    bench_parser = sub.add_parser("bench", help="Per-turn reaction latency: bank pick vs live LLM + TTS")
+    bench_parser.add_argument("--bank", default="reaction_bank")
+    bench_parser.add_argument("--turns", type=int, default=10000)
+    bench_parser.add_argument("--llm", type=int, default=0, help="Also time this many live LLM + TTS reactions")
+    args = parser.parse_args()
+
+    if args.command == "build" or args.llm:
+        from dotenv import load_dotenv
+        from openai import OpenAI
+        from elevenlabs.client import ElevenLabs
+        load_dotenv()
+        openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API"))
+
+        def tts(text):
+            try:
+                return b"".join(elevenlabs_client.text_to_speech.convert(
+                    voice_id="hzLyDn3IrvrdH83BdqUu", text=text, model_id="eleven_turbo_v2_5",
+                    optimize_streaming_latency=4
+                ))
+            except Exception as e:
+                # build() skips the entry; raising would abort it before bank.json is written
+                print(f"  TTS error: {e}")
+                return None
+
+    if args.command == "build":
+        entries = build(args.out, openai_client, tts, args.per_bucket)
+        print(f"Wrote {len(entries)} reactions to {args.out}")
+    else:
+        bank = ReactionBank(args.bank)
+        recent = []
+        start = time.perf_counter()
+        for turn in range(args.turns):
+            entry = bank.pick(SAMPLE_ANSWERS[turn % len(SAMPLE_ANSWERS)], recent)
+            recent = (recent + [entry["id"]])[-5:]
+        per_turn = (time.perf_counter() - start) / args.turns
+        print(f"bank: {len(bank)} reactions, {per_turn * 1e6:.1f} µs per turn (classify + pick), audio ready")
+        for answer in SAMPLE_ANSWERS:
+            print(f"  {classify(answer)!s:<24} {bank.pick(answer)['text']}")
+
+        if args.llm:
+            timings = []
+            for turn in range(args.llm):
+                start = time.perf_counter()
+                # Same request as the live path in app.py
+                response = openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": REACTION_SYSTEM_PROMPT},
+                        {"role": "user", "content": f"They said: {SAMPLE_ANSWERS[turn % len(SAMPLE_ANSWERS)]}"}
+                    ],
+                    max_tokens=25,
+                    temperature=0.7
+                )
+                text = response.choices[0].message.content.strip()
+                llm_s = time.perf_counter() - start
+                tts(text)
+                timings.append((llm_s, time.perf_counter() - start))
+            print(f"llm: {sum(t[0] for t in timings) / len(timings) * 1000:.0f} ms text, "
+                  f"{sum(t[1] for t in timings) / len(timings) * 1000:.0f} ms text + audio per turn")
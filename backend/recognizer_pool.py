@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Streaming Recognizer Pool
+Hands out recognizers lazily when a session first streams audio and takes them
+back when the session is saved or evicted, keeping a few pre-warmed idle ones ready
+"""
+
+import threading
+import time
+
+
+class RecognizerPool:
+    def __init__(self, factory, min_idle=2, max_idle=8, max_total=32):
+        """
+        Args:
+            factory: Zero-argument callable returning a new stt_engine.StreamingRecognizer
+        """
+        self.factory = factory
+        self.min_idle = min_idle
+        self.max_idle = max(max_idle, min_idle)
+        self.max_total = max_total
+
+        self._idle = []
+        self._in_use = 0
+        self._building = 0
+        self._lock = threading.Condition()
+        self._warming = False
+
+        # Counters for utilization reporting
+        self.created = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.peak_in_use = 0
+
+        self._warm()
+
+    def _create(self):
+        recognizer = self.factory()
+        with self._lock:
+            self.created += 1
+        return recognizer
+
+    def _total(self):
+        return len(self._idle) + self._in_use + self._building
+
+    def _warm(self):
+        """Top the idle list back up to min_idle without exceeding max_total"""
+        try:
+            while True:
+                with self._lock:
+                    if len(self._idle) >= self.min_idle or self._total() >= self.max_total:
+                        return
+                    self._building += 1  # reserve the slot while the recognizer is built
+                try:
+                    recognizer = self._create()
+                finally:
+                    with self._lock:
+                        self._building -= 1
+                with self._lock:
+                    self._idle.append(recognizer)
+                    self._lock.notify()
+        except Exception as e:
+            print(f"Recognizer warmup error: {e}")
+        finally:
+            with self._lock:
+                self._warming = False
+
+    def _warm_async(self):
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+        threading.Thread(target=self._warm, daemon=True).start()
+
+    def acquire(self, timeout=0):
+        """Return a ready recognizer, or None if the pool is at capacity after timeout seconds"""
+        deadline = time.time() + timeout
+        with self._lock:
+            while not self._idle and self._total() >= self.max_total:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.rejected += 1
+                    return None
+                self._lock.wait(remaining)
+
+            recognizer = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            self.acquired += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+
+        if recognizer is None:
+            # Idle list was drained faster than warming could keep up; build one inline
+            try:
+                recognizer = self._create()
+            except Exception:
+                with self._lock:
+                    self._in_use -= 1
+                raise
+        self._warm_async()
+        return recognizer
+
+    def release(self, recognizer):
+        """Reset a recognizer and make it available to the next session"""
+        if recognizer is None:
+            return
+        recognizer.reset()
+        with self._lock:
+            self._in_use -= 1
+            # Surplus idle recognizers are dropped so memory shrinks after a spike
+            if len(self._idle) < self.max_idle:
+                self._idle.append(recognizer)
+            self._lock.notify()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "total": self._total(),
+                "max_total": self.max_total,
+                "min_idle": self.min_idle,
+                "max_idle": self.max_idle,
+                "utilization": round(self._in_use / self.max_total, 3) if self.max_total else 0.0,
+                "peak_in_use": self.peak_in_use,
+                "created": self.created,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Streaming sample-rate conversion to the recognizer's 16 kHz
+Browsers capture at the sound card's native rate (usually 44.1 or 48 kHz) and
+resample badly, or at a high main-thread cost, when forced into a 16 kHz
+AudioContext. Clients therefore send audio at the rate they declare on connect,
+and each session converts it here before it reaches the recognizer.
+
+PolyphaseResampler is a rational L/M polyphase FIR (Kaiser-windowed sinc): for
+output n the filter phase is (n * M) mod L and the newest input sample used is
+(n * M) // L, so every output of a chunk is one row of a sliding-window view of
+the input dotted with its phase's taps, computed for the whole chunk at once. The
+last taps - 1 input samples carry over to the next chunk, so a stream cut into
+any chunk sizes gives exactly the same output as one call on the whole signal.
+
+Benchmark per-stream cost and check parity (optionally transcripts with Vosk):
+    python resampler.py
+    python resampler.py fixtures/*.wav --model-path model
+"""
+
+import functools
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+RATE = 16000
+
+
+@functools.lru_cache(maxsize=None)
+def filter_bank(in_rate, out_rate, taps=64, cutoff=0.9, beta=8.0):
+    """(L, M, bank, delay) with bank[phase] holding that phase's taps, oldest input sample first
+
+    cutoff: -6 dB point as a fraction of the lower Nyquist frequency
+    delay: Whole output samples between the input and the output signal
+    """
+    g = math.gcd(in_rate, out_rate)
+    up, down = out_rate // g, in_rate // g
+    n = taps * up
+    # Centre the sinc on a multiple of M (near the middle) so the delay is whole output samples
+    center = down * round((n - 1) / 2 / down)
+    t = np.arange(n) - center
+    fc = cutoff / max(up, down)  # normalized to the Nyquist frequency of the upsampled rate
+    window = np.i0(beta * np.sqrt(np.clip(1 - (t / ((n - 1) / 2)) ** 2, 0, None))) / np.i0(beta)
+    h = fc * np.sinc(fc * t) * window * up
+    # h[p + j * up] is tap j of phase p; reversed so taps line up with ascending input windows
+    bank = h.reshape(taps, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank, dtype=np.float32)
+    bank.setflags(write=False)
+    return up, down, bank, center // down
+
+
+class PolyphaseResampler:
+    def __init__(self, in_rate, out_rate=RATE, taps=None):
+        """
+        Args:
+            in_rate: Sample rate the client declared
+            out_rate: Rate the recognizer expects
+            taps: Filter length per phase, in input samples (default: 64 up to 3:1
+                  decimation, more beyond, so the transition band stays as narrow)
+        """
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        taps = taps or max(64, math.ceil(64 * in_rate / (3 * out_rate)))
+        self.up, self.down, self._bank, self.delay = filter_bank(in_rate, out_rate, taps)
+        self.taps = taps
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._received = 0  # input samples seen so far
+        self._produced = 0  # output samples emitted so far
+
+    def process(self, samples):
+        """int16 samples at in_rate -> int16 samples at out_rate, self.delay samples late"""
+        if self.in_rate == self.out_rate:
+            return np.asarray(samples, dtype=np.int16)
+        x = np.concatenate((self._history, np.asarray(samples, dtype=np.float32)))
+        first_input = self._received - len(self._history)  # stream index of x[0]
+        self._received += len(samples)
+        # Every output whose newest input sample has arrived: n * M // L < received
+        end = (self._received * self.up + self.down - 1) // self.down
+        n = np.arange(self._produced, end, dtype=np.int64)
+        self._produced = end
+        self._history = x[len(x) - (self.taps - 1):]
+        if not len(n):
+            return np.zeros(0, dtype=np.int16)
+
+        windows = sliding_window_view(x, self.taps)  # row r covers x[r:r + taps], no copy
+        t = n * self.down
+        rows = t // self.up - first_input - (self.taps - 1)
+        if self.up == 1:
+            # Integer decimation (48 -> 16 kHz): one phase, evenly spaced rows
+            y = windows[rows[0]:rows[-1] + 1:self.down] @ self._bank[0]
+        else:
+            y = np.einsum("ij,ij->i", windows[rows], self._bank[t % self.up])
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+def band_limited_resample(samples, in_rate, out_rate):
+    """Whole-signal FFT resampling, used as the offline reference in the benchmark"""
+    n_out = int(round(len(samples) * out_rate / in_rate))
+    spectrum = np.fft.rfft(np.asarray(samples, dtype=np.float64))
+    bins = n_out // 2 + 1
+    resized = np.zeros(bins, dtype=complex)
+    keep = min(bins, len(spectrum))
+    resized[:keep] = spectrum[:keep]
+    return np.fft.irfft(resized, n_out) * (n_out / len(samples))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import wave
+
+    import audio_codecs
+
+    parser = argparse.ArgumentParser(description="Benchmark native-rate ingest and check parity with 16 kHz audio")
+    parser.add_argument("wavs", nargs="*", help="16 kHz mono WAV fixtures (a synthetic signal is used if none)")
+    parser.add_argument("--rates", default="48000,44100", help="client capture rates to simulate")
+    parser.add_argument("--chunk", type=int, default=8192, help="samples per socket message at the capture rate")
+    parser.add_argument("--model-path", help="Vosk model; if set, compare transcripts with the 16 kHz original")
+    args = parser.parse_args()
+
+    fixtures = []
+    for path in args.wavs:
+        with wave.open(path, "rb") as wf:
+            fixtures.append((path, np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)))
+    if not fixtures:
+        # 10 s of a gliding harmonic tone with noise and pauses, band-limited to 7 kHz
+        t = np.arange(RATE * 10) / RATE
+        f0 = 140 + 60 * np.sin(2 * np.pi * 0.3 * t)
+        phase = 2 * np.pi * np.cumsum(f0) / RATE
+        voice = sum(np.sin(k * phase) / k for k in range(1, 30) if k * 200 < 7000)
+        envelope = (np.sin(2 * np.pi * 0.5 * t) > -0.3).astype(float)
+        rng = np.random.default_rng(0)
+        signal = 6000 * voice * envelope + rng.normal(0, 150, len(t))
+        fixtures.append(("synthetic", np.clip(signal, -32768, 32767).astype(np.int16)))
+
+    recognizer = None
+    if args.model_path:
+        from stt_engine import create_recognizer, run_file, word_error_rate
+        recognizer = create_recognizer("vosk", RATE, model_path=args.model_path)
+
+    for name, pcm in fixtures:
+        seconds = len(pcm) / RATE
+        print(f"\n{name} ({seconds:.1f} s)")
+        reference_text = None
+        if recognizer is not None:
+            recognizer.reset()
+            events, _ = run_file(recognizer, pcm.tobytes(), 4000)
+            reference_text = " ".join(e["text"] for e in events if e["type"] == "final")
+        for rate in (int(r) for r in args.rates.split(",")):
+            # What the browser would capture at this rate, sent as float32 messages
+            native = np.clip(band_limited_resample(pcm, RATE, rate), -32768, 32767).astype(np.int16)
+            payloads = [audio_codecs.encode(native[i:i + args.chunk], "float32")
+                        for i in range(0, len(native), args.chunk)]
+
+            best = float("inf")
+            for _ in range(5):
+                resampler = PolyphaseResampler(rate)
+                start = time.perf_counter()
+                out = [resampler.process(audio_codecs.decode(p, "float32")) for p in payloads]
+                best = min(best, time.perf_counter() - start)
+            out = np.concatenate(out)
+
+            # Chunking must not change the output
+            whole = PolyphaseResampler(rate).process(np.concatenate([audio_codecs.decode(p, "float32") for p in payloads]))
+            aligned = out[resampler.delay:resampler.delay + len(pcm)]
+            line = (f"  {rate:>5} Hz  {best / seconds * 1000:>6.3f} ms per audio second "
+                    f"({best / len(payloads) * 1e6:.0f} µs per message)  "
+                    f"chunked == whole: {np.array_equal(out, whole)}  "
+                    f"SNR vs 16 kHz {audio_codecs.snr_db(pcm[:len(aligned)], aligned):.1f} dB")
+            if recognizer is not None:
+                recognizer.reset()
+                events, _ = run_file(recognizer, out.tobytes(), 4000)
+                text = " ".join(e["text"] for e in events if e["type"] == "final")
+                line += f"  WER vs 16 kHz {word_error_rate(reference_text, text):.3f}"
+            print(line)
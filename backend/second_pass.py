@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Second-pass answer transcription
+Re-transcribes each complete answer with Faster-Whisper in a background process pool
+and replaces the live Vosk text once it finishes. Nothing here blocks the live turn:
+answers are queued, batched across sessions and handed to worker processes.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+RATE = 16000
+
+# Per worker process; built once by the pool initializer
+_worker_recognizer = None
+
+
+def _init_worker(model_size, beam_size):
+    global _worker_recognizer
+    import model_registry
+    from stt_engine import WhisperStreamingRecognizer
+    # One thread per worker; parallelism comes from the pool size
+    model = model_registry.get_whisper_model(model_size, cpu_threads=1)
+    # No block size: the recognizer decodes the whole answer on flush()
+    _worker_recognizer = WhisperStreamingRecognizer(model, RATE, block_seconds=None, beam_size=beam_size)
+
+
+def _transcribe_batch(batch):
+    """Runs in a worker: transcribe a list of (job_id, pcm_bytes) answers"""
+    results = []
+    for job_id, pcm in batch:
+        start = time.perf_counter()
+        try:
+            _worker_recognizer.reset()
+            _worker_recognizer.accept(pcm)
+            text = " ".join(e["text"] for e in _worker_recognizer.flush() if e["type"] == "final")
+            error = None
+        except Exception as e:
+            text, error = None, str(e)
+        results.append((job_id, text, len(pcm) / 2 / RATE, time.perf_counter() - start, error))
+    return results
+
+
+class SecondPassTranscriber:
+    def __init__(self, pool_size=1, model_size="base", beam_size=5, batch_size=4, batch_wait=0.5):
+        self.pool_size = pool_size
+        self.model_size = model_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        # spawn, not fork: the server process has live threads and sockets
+        self.executor = ProcessPoolExecutor(
+            max_workers=pool_size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, beam_size)
+        )
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._next_id = 0
+        self._lock = threading.Condition()
+        # Keep at most one batch per worker in flight so queue lag stays measurable here
+        self._in_flight = threading.Semaphore(pool_size)
+
+        # Stats
+        self.completed = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, session_id, pcm, on_result):
+        """Queue an answer's PCM; on_result(text) is called from a background thread, and
+        wait_for_session() does not return until it has finished"""
+        if not pcm:
+            return None
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = {
+                "session_id": session_id,
+                "on_result": on_result,
+                "queued_at": time.time(),
+            }
+        self._queue.put((job_id, bytes(pcm)))
+        return job_id
+
+    def _dispatch(self):
+        """Collect queued answers into batches and hand them to the process pool"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._in_flight.acquire()
+            with self._lock:
+                now = time.time()
+                for job_id, _ in batch:
+                    self._jobs[job_id]["started_at"] = now
+            try:
+                future = self.executor.submit(_transcribe_batch, batch)
+            except Exception as e:
+                # A broken pool (e.g. the model failed to load) fails the batch instead of the dispatcher
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f, ids=[j for j, _ in batch]: self._on_batch_done(f, ids))
+
+    def _on_batch_done(self, future, job_ids):
+        self._in_flight.release()
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Second-pass batch error: {e}")
+            results = [(job_id, None, 0.0, 0.0, str(e)) for job_id in job_ids]
+
+        for job_id, text, audio_seconds, decode_seconds, error in results:
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None:
+                continue
+
+            if error:
+                print(f"Second-pass transcription error: {error}")
+            elif text:
+                try:
+                    job["on_result"](text)
+                except Exception as e:
+                    print(f"Second-pass callback error: {e}")
+
+            # The job only counts as done once its result is applied, so wait_for_session
+            # never returns between the two
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                lag = job["started_at"] - job["queued_at"]
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                if error or text is None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                    self.audio_seconds += audio_seconds
+                    self.decode_seconds += decode_seconds
+                self._lock.notify_all()
+
+    def pending(self, session_id=None):
+        with self._lock:
+            return sum(1 for job in self._jobs.values()
+                       if session_id is None or job["session_id"] == session_id)
+
+    def wait_for_session(self, session_id, timeout):
+        """Block until a session's queued answers are refined or timeout passes"""
+        deadline = time.time() + timeout
+        with self._lock:
+            while any(job["session_id"] == session_id for job in self._jobs.values()):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "model_size": self.model_size,
+                "pool_size": self.pool_size,
+                "pending": len(self._jobs),
+                "completed": self.completed,
+                "failed": self.failed,
+                "audio_seconds": round(self.audio_seconds, 1),
+                # decode time / audio time, below 1.0 means faster than real time
+                "real_time_factor": round(self.decode_seconds / self.audio_seconds, 3) if self.audio_seconds else None,
+                "avg_queue_lag_s": round(self.total_lag / finished, 3) if finished else None,
+                "max_queue_lag_s": round(self.max_lag, 3),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
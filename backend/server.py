@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Entry point for the interview server
+All start-up (models, recognizer and test-runner pools, the second-pass pool, the
+asset index) happens when app.py is imported. Worker processes started with
+"spawn", such as the second-pass Whisper pool, re-run the main script as
+__mp_main__ before they import what they need. This file is that main script and
+only imports app when it really is __main__, so a worker costs one small import
+instead of a second copy of the whole server.
+
+    python server.py
+"""
+
+if __name__ == "__main__":
+    import app
+    app.main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Memory soak test for the interview server
+Drives synthetic interviews through app.py's real HTTP and Socket.IO handlers (via
+the Flask and Socket.IO test clients) with stub speech, LLM, TTS and test-runner
+providers, while recording tracemalloc and RSS over time. Each interview starts a
+session, streams audio for every question until the server auto-submits it,
+requests a code review and saves the session.
+
+At the end it reports the allocation sites that grew most since the warm-up
+snapshot and the memory retained per completed session: while sessions are still
+registered (they stay until SESSION_TTL or COMPLETED_SESSION_TTL) and after they
+are evicted. It exits with status 1 if either value is over its threshold.
+
+    python soak_test.py --sessions 2000
+    python soak_test.py --sessions 5000 --workers 4 --csv soak.csv
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+import model_registry
+from stt_engine import StreamingRecognizer
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUNK_SAMPLES = 4096  # what interview.js sends per socket message
+ANSWER_WORDS = "i have been programming for a few years mostly in python and javascript".split()
+
+
+class StubModel:
+    """Stands in for the Vosk model; recognizers come from StubRecognizer"""
+
+
+class StubRecognizer(StreamingRecognizer):
+    """Emits one final result, with word timings, every final_every chunks"""
+
+    def __init__(self, final_every=2):
+        self.final_every = final_every
+        self.chunks = 0
+
+    def accept(self, pcm):
+        self.chunks += 1
+        if self.chunks % self.final_every:
+            return []
+        t = self.chunks * CHUNK_SAMPLES / 16000
+        words = [{"word": w, "start": t + 0.3 * i, "end": t + 0.3 * i + 0.25, "conf": 0.9}
+                 for i, w in enumerate(ANSWER_WORDS)]
+        return [{"type": "final", "text": " ".join(ANSWER_WORDS), "words": words}]
+
+    def reset(self):
+        self.chunks = 0
+
+
+class StubOpenAI:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        message = SimpleNamespace(content="Thanks, that's a great answer to hear.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(prompt_tokens=50, completion_tokens=10))
+
+
+class StubElevenLabs:
+    def __init__(self, audio_bytes=8000):
+        self.text_to_speech = SimpleNamespace(convert=lambda **kwargs: iter([b"\xff" * audio_bytes]))
+
+
+def stub_test_run(code, language):
+    cases = [{"name": f"case_{i}", "passed": True, "error": None} for i in range(10)]
+    return {"language": language, "total": len(cases), "passed": len(cases), "cases": cases, "complexity": None}
+
+
+def load_app(workdir):
+    """Import app.py with stub providers; files it writes go to workdir"""
+    # The real clients are built at import (and need a key) before being swapped out
+    os.environ.setdefault("OPENAI_API_KEY", "soak-test")
+    os.environ.setdefault("ELEVENLABS_API", "soak-test")
+    os.environ.setdefault("SECOND_PASS_WORKERS", "0")
+    os.environ.setdefault("RECOGNIZER_MIN_IDLE", "0")
+    os.environ.setdefault("STATIC_ASSET_INDEX", "0")
+    os.environ.setdefault("WORD_TIMINGS_DIR", os.path.join(workdir, "word_timings"))
+    model_registry.register_vosk_model(os.getenv("VOSK_MODEL", "model"), StubModel())
+    import app
+    app.openai_client = StubOpenAI()
+    app.elevenlabs_client = StubElevenLabs()
+    app.test_runner.run = stub_test_run
+    for pool in app.recognizer_pools.values():
+        pool.factory = StubRecognizer
+    os.chdir(workdir)  # save_responses writes interview_responses_*.json to the cwd
+    return app
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current
+
+
+def run_interview(app, http, sio, rng, answer_chunks):
+    session_id = http.post("/api/start").get_json()["session_id"]
+    # Submit on the first chunk after a final result instead of waiting for real silence
+    app.sessions[session_id].silence_threshold = 0.0
+    while True:
+        question = http.get(f"/api/question/{session_id}").get_json()
+        if question.get("completed"):
+            break
+        for _ in range(answer_chunks):
+            pcm = rng.integers(-3000, 3000, CHUNK_SAMPLES, dtype=np.int16)
+            sio.emit("audio_chunk", {"session_id": session_id, "audio": pcm.tobytes(), "encoding": "pcm16"})
+        sio.get_received()  # drop transcription/reaction events the server sent
+    http.post("/api/code_review", json={"session_id": session_id, "code": "def twoSum(nums, target):\n    return []",
+                                        "language": "python"})
+    http.post(f"/api/save/{session_id}")
+
+
+def evict_all(app):
+    """Evict every registered session, as if its TTL had passed"""
+    ttls = app.SESSION_TTL, app.COMPLETED_SESSION_TTL
+    app.SESSION_TTL = app.COMPLETED_SESSION_TTL = -1
+    try:
+        app.evict_stale_sessions()
+    finally:
+        app.SESSION_TTL, app.COMPLETED_SESSION_TTL = ttls
+
+
+def traced_kb():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive synthetic interviews through app.py and track memory")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50, help="interviews before the baseline snapshot")
+    parser.add_argument("--workers", type=int, default=1, help="interviews run concurrently")
+    parser.add_argument("--answer-chunks", type=int, default=6, help="audio chunks per answer (0.26 s each)")
+    parser.add_argument("--sample-every", type=int, default=100, help="record traced memory and RSS every N interviews")
+    parser.add_argument("--frames", type=int, default=8, help="traceback depth kept by tracemalloc")
+    parser.add_argument("--top", type=int, default=15, help="growing allocation sites to report")
+    parser.add_argument("--max-retained-kb", type=float, default=64.0,
+                        help="fail if a completed, still-registered session holds more than this")
+    parser.add_argument("--max-leaked-kb", type=float, default=4.0,
+                        help="fail if more than this per session remains after eviction")
+    parser.add_argument("--csv", help="write the memory time series here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="soak_")
+    app = load_app(workdir)
+    print(f"Soak test: {args.sessions} interviews, {args.workers} worker(s), output in {workdir}")
+
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "http"):
+            local.http = app.app.test_client()
+            local.rng = np.random.default_rng(i)
+        # A fresh socket per interview, as a browser page load would have
+        sio = app.socketio.test_client(app.app, auth={"audio_encodings": ["pcm16"]})
+        try:
+            run_interview(app, local.http, sio, local.rng, args.answer_chunks)
+        finally:
+            sio.disconnect()
+
+    def drive(start, count, executor):
+        for _ in executor.map(one, range(start, start + count)):
+            pass
+
+    tracemalloc.start(args.frames)
+    series = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        drive(0, args.warmup, executor)
+        evict_all(app)
+        baseline = tracemalloc.take_snapshot()
+        base_traced, base_rss, base_sessions = traced_kb(), rss_kb(), len(app.sessions)
+        started = time.time()
+        done = 0
+        while done < args.sessions:
+            count = min(args.sample_every, args.sessions - done)
+            drive(args.warmup + done, count, executor)
+            done += count
+            series.append((done, traced_kb(), rss_kb(), len(app.sessions)))
+            print(f"  {done:>6} interviews  traced {series[-1][1] / 1024:>8.1f} MB  "
+                  f"RSS {series[-1][2] / 1024:>8.1f} MB  registered sessions {series[-1][3]}")
+    elapsed = time.time() - started
+
+    final = tracemalloc.take_snapshot()
+    registered = len(app.sessions) - base_sessions
+    retained = (series[-1][1] - base_traced) / max(registered, 1)
+    rss_retained = (series[-1][2] - base_rss) / max(args.sessions, 1)
+
+    print(f"\n{args.sessions} interviews in {elapsed:.1f}s ({args.sessions / elapsed:.1f}/s)")
+    print(f"Top {args.top} growing allocation sites since warm-up:")
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+    stats = final.filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+    for stat in stats[:args.top]:
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:>10.1f} KB  {stat.count_diff:>+8} blocks  "
+              f"{frame.filename.replace(BACKEND_DIR + os.sep, '')}:{frame.lineno}")
+
+    # Everything still reachable from the sessions dict goes once they are evicted
+    evict_all(app)
+    leaked = (traced_kb() - base_traced) / max(args.sessions, 1)
+
+    print(f"\nPer completed session: {retained:.1f} KB traced while registered "
+          f"({registered} sessions), {rss_retained:.1f} KB RSS, {leaked:.2f} KB traced after eviction")
+
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write("interviews,traced_kb,rss_kb,registered_sessions\n")
+            for row in series:
+                f.write(",".join(str(round(v, 1)) for v in row) + "\n")
+
+    failed = False
+    if retained > args.max_retained_kb:
+        print(f"FAIL: {retained:.1f} KB retained per completed session (limit {args.max_retained_kb} KB)")
+        failed = True
+    if leaked > args.max_leaked_kb:
+        print(f"FAIL: {leaked:.2f} KB per session left after eviction (limit {args.max_leaked_kb} KB)")
+        failed = True
+    if not failed:
+        print("PASS")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
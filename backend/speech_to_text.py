@@ -2,25 +2,65 @@
 """
 Real-time Speech-to-Text Converter using Faster-Whisper
 Captures audio from microphone and converts speech to text in real-time
+
+Modes:
+    streaming (default) - overlapping windows, words committed once two decodes agree
+    blocks              - fixed 1-second blocks, each transcribed from scratch
 """
 
 import pyaudio
-from faster_whisper import WhisperModel
-import numpy as np
 import threading
-import queue
+import collections
+import time
 import sys
-import wave
-import tempfile
-import os
+import model_registry
+from stt_engine import WhisperStreamingRecognizer, WhisperSlidingWindowRecognizer
+
+
+class BoundedAudioQueue:
+    """Audio queue with a fixed number of slots
+    
+    Under backpressure the oldest chunk is dropped instead of letting latency grow without
+    bound, and the consumer takes everything queued at once (merged into one chunk) so a
+    slow decode is followed by one catch-up decode rather than many stale ones. Dropped
+    audio is counted, and get_all() reports how many bytes were lost just before the data
+    it returns (last_gap), so a streaming consumer can keep its timeline contiguous."""
+    
+    def __init__(self, max_chunks=64):
+        self._chunks = collections.deque()
+        self.max_chunks = max_chunks
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.merged = 0
+        self._gap = 0  # bytes dropped since the last get_all
+        self.last_gap = 0  # bytes dropped before the data the last get_all returned
+    
+    def put(self, chunk):
+        with self._cond:
+            if len(self._chunks) >= self.max_chunks:
+                self._gap += len(self._chunks.popleft())
+                self.dropped += 1
+            self._chunks.append(chunk)
+            self._cond.notify()
+    
+    def get_all(self, timeout=1.0):
+        """Return every queued chunk joined together, or None on timeout"""
+        with self._cond:
+            if not self._chunks and not self._cond.wait_for(lambda: self._chunks, timeout):
+                return None
+            if len(self._chunks) > 1:
+                self.merged += len(self._chunks) - 1
+            data = b''.join(self._chunks)
+            self._chunks.clear()
+            self.last_gap, self._gap = self._gap, 0
+            return data
 
 
 class RealtimeSpeechToText:
-    def __init__(self, model_size="base"):
-        print(f"Loading Faster-Whisper {model_size} model... (this may take a moment)")
+    def __init__(self, model_size="base", mode="streaming"):
         # Use CPU with int8 for better compatibility
-        self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
-        print("Model loaded!\n")
+        self.model = model_registry.get_whisper_model(model_size, device="cpu", compute_type="int8")
+        print()
         
         # Audio settings - REDUCED for lower latency
         self.CHUNK = 1024
@@ -29,7 +69,17 @@ class RealtimeSpeechToText:
         self.RATE = 16000
         self.RECORD_SECONDS = 1  # Reduced from 3 to 1 second for lower latency
         
-        self.audio_queue = queue.Queue()
+        self.mode = mode
+        if mode == "streaming":
+            # Re-decode the uncommitted window every second of new audio
+            self.recognizer = WhisperSlidingWindowRecognizer(self.model, self.RATE, step_seconds=1.0, beam_size=1)
+        else:
+            # record_audio() cuts fixed blocks (no overlap); each one is decoded on flush()
+            # Use smaller beam_size for faster processing
+            self.recognizer = WhisperStreamingRecognizer(self.model, self.RATE, block_seconds=None, beam_size=1)
+        
+        # ~4 seconds of CHUNK-sized reads (or 64 blocks) before the oldest audio is dropped
+        self.audio_queue = BoundedAudioQueue(max_chunks=64)
         self.is_running = False
         self.pyaudio = pyaudio.PyAudio()
     
@@ -45,9 +95,12 @@ class RealtimeSpeechToText:
         
         print("Listening... (Press Ctrl+C to stop)\n")
         
+        # Streaming mode hands over every read; block mode groups reads into RECORD_SECONDS blocks
+        reads_per_item = 1 if self.mode == "streaming" else int(self.RATE / self.CHUNK * self.RECORD_SECONDS)
+        
         while self.is_running:
             frames = []
-            for _ in range(0, int(self.RATE / self.CHUNK * self.RECORD_SECONDS)):
+            for _ in range(reads_per_item):
                 if not self.is_running:
                     break
                 data = stream.read(self.CHUNK, exception_on_overflow=False)
@@ -64,34 +117,27 @@ class RealtimeSpeechToText:
         """Process audio from queue and convert to text"""
         while self.is_running:
             try:
-                audio_data = self.audio_queue.get(timeout=1)
-                
-                # Convert bytes to numpy array
-                audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-                
-                # Transcribe with Faster-Whisper
-                # Use smaller beam_size for faster processing
-                segments, info = self.model.transcribe(
-                    audio_np, 
-                    language="en", 
-                    beam_size=1,  # Reduced from 5 to 1 for speed
-                    vad_filter=True,  # Voice activity detection to skip silence
-                    vad_parameters=dict(min_silence_duration_ms=500)
-                )
-                
-                # Collect all segments
-                text_parts = []
-                for segment in segments:
-                    text_parts.append(segment.text)
+                audio_data = self.audio_queue.get_all(timeout=1)
+                if audio_data is None:
+                    continue
                 
-                text = "".join(text_parts).strip()
+                events = []
+                if self.mode == "streaming" and self.audio_queue.last_gap:
+                    # Chunks were dropped under backpressure: finish the window before the gap
+                    # and move past it, so later word timings stay on the real timeline
+                    events += self.recognizer.skip(self.audio_queue.last_gap / 2 / self.RATE)
+                events += self.recognizer.accept(audio_data)
+                if self.mode != "streaming":
+                    events += self.recognizer.flush()
                 
-                if text:
-                    print(f"You said: {text}")
+                for event in events:
+                    if event["type"] == "final":
+                        print(f"\rYou said: {event['text']}")
+                    else:
+                        # Uncommitted tail, shown on the same line until it settles
+                        print(f"\r... {event['text']}", end="")
                     sys.stdout.flush()
-                    
-            except queue.Empty:
-                continue
+            
             except Exception as e:
                 print(f"[Error: {e}]")
     
@@ -108,9 +154,9 @@ class RealtimeSpeechToText:
         self.process_thread.start()
         
         try:
-            # Keep main thread alive
-            while True:
-                pass
+            # Keep main thread alive without burning a core
+            while self.is_running:
+                time.sleep(0.5)
         except KeyboardInterrupt:
             print("\n\nStopping...")
             self.stop()
@@ -121,12 +167,21 @@ class RealtimeSpeechToText:
         self.record_thread.join()
         self.process_thread.join()
         self.pyaudio.terminate()
+        if self.audio_queue.dropped:
+            print(f"Dropped {self.audio_queue.dropped} audio chunks under backpressure")
         print("Stopped.")
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Real-time speech-to-text with Faster-Whisper")
     # Use "tiny" for lowest latency (fastest)
     # Use "base" for balance of speed and accuracy
     # Use "small", "medium", or "large-v2" for better accuracy but slower
-    stt = RealtimeSpeechToText(model_size="base")  # Changed to "tiny" for lower latency
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--mode", default="streaming", choices=["streaming", "blocks"])
+    args = parser.parse_args()
+    
+    stt = RealtimeSpeechToText(model_size=args.model_size, mode=args.mode)
     stt.start()
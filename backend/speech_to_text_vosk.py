@@ -6,9 +6,8 @@ Vosk is much faster than Whisper for real-time applications
 """
 
 import pyaudio
-import json
-from vosk import Model, KaldiRecognizer
 import sys
+from stt_engine import create_recognizer
 
 
 class RealtimeSpeechToText:
@@ -22,10 +21,9 @@ class RealtimeSpeechToText:
                        Recommended: vosk-model-en-us-0.22 (1.8GB, better accuracy)
                        Or: vosk-model-small-en-us-0.15 (40MB, faster but less accurate)
         """
-        print(f"Loading Vosk model from '{model_path}'...")
         try:
-            self.model = Model(model_path)
-            print("Model loaded!\n")
+            self.recognizer = create_recognizer("vosk", 16000, model_path=model_path)
+            print()
         except Exception as e:
             print(f"Error loading model: {e}")
             print("\nPlease download a Vosk model:")
@@ -42,8 +40,6 @@ class RealtimeSpeechToText:
         self.RATE = 16000
         
         self.pyaudio = pyaudio.PyAudio()
-        self.recognizer = KaldiRecognizer(self.model, self.RATE)
-        self.recognizer.SetWords(True)
     
     def start(self):
         """Start listening and processing speech in real-time"""
@@ -61,20 +57,14 @@ class RealtimeSpeechToText:
             while True:
                 data = stream.read(self.CHUNK, exception_on_overflow=False)
                 
-                if self.recognizer.AcceptWaveform(data):
-                    # Final result (end of phrase)
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get("text", "")
-                    if text:
-                        print(f"You said: {text}")
+                for event in self.recognizer.accept(data):
+                    if event["type"] == "final":
+                        # Final result (end of phrase)
+                        print(f"You said: {event['text']}")
                         sys.stdout.flush()
-                else:
-                    # Partial result (real-time, as you speak)
-                    partial = json.loads(self.recognizer.PartialResult())
-                    text = partial.get("partial", "")
-                    if text:
-                        # Print partial results on same line
-                        print(f"\rListening: {text}", end="", flush=True)
+                    else:
+                        # Partial result (real-time, as you speak)
+                        print(f"\rListening: {event['text']}", end="", flush=True)
                         
         except KeyboardInterrupt:
             print("\n\nStopping...")
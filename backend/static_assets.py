@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Static asset pipeline for the frontend
+Reads frontend/src once at startup, fingerprints scripts and styles by content hash,
+rewrites page references to the fingerprinted names and keeps gzip (and brotli, when
+the module is installed) variants in memory. Responses carry strong ETags, answer
+conditional requests with 304 and negotiate Accept-Encoding.
+
+Pages keep their plain names (scripts navigate to them by name) and are revalidated
+on every load; fingerprinted scripts/styles are cached for a year.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# URL extension -> directory under frontend/src (mirrors the old serve_static routing)
+ASSET_DIRS = {".html": "pages", ".js": "scripts", ".css": "styles"}
+FINGERPRINTED = (".js", ".css")
+MIN_COMPRESS_BYTES = 256
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Local script/stylesheet references in pages, e.g. src="app.js" or href="styles.css"
+_LOCAL_REF = re.compile(r'((?:src|href)=")([\w.-]+\.(?:js|css))(")')
+
+
+class Asset:
+    def __init__(self, body, mimetype, cache_control):
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the gzip bytes identical across restarts
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                self.variants["gzip"] = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.variants["br"] = br
+
+    def etag(self, encoding):
+        # Strong ETags must differ between encodings of the same resource
+        return self.digest if encoding == "identity" else f"{self.digest}-{encoding}"
+
+
+class AssetIndex:
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}  # URL path -> Asset
+        self.fingerprints = {}  # plain name -> fingerprinted name
+        self.build()
+
+    def _url_path(self, rel):
+        directory, name = os.path.split(rel)
+        ext = os.path.splitext(name)[1]
+        if ASSET_DIRS.get(ext) == directory:
+            return name
+        return rel.replace(os.sep, "/")
+
+    def build(self):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                url = self._url_path(os.path.relpath(full, self.root))
+                # A routed file (e.g. pages/index.html) wins over a same-named file elsewhere
+                if url not in files or os.path.dirname(os.path.relpath(full, self.root)):
+                    with open(full, "rb") as f:
+                        files[url] = f.read()
+
+        assets, fingerprints = {}, {}
+        # Scripts and styles first, so pages can point at their fingerprinted names
+        for url, body in files.items():
+            stem, ext = os.path.splitext(url)
+            if ext not in FINGERPRINTED:
+                continue
+            mimetype = mimetypes.guess_type(url)[0] or "application/octet-stream"
+            asset = Asset(body, mimetype, REVALIDATE)
+            assets[url] = asset
+            hashed = f"{stem}.{asset.digest}{ext}"
+            assets[hashed] = Asset(body, mimetype, IMMUTABLE)
+            fingerprints[url] = hashed
+
+        for url, body in files.items():
+            ext = os.path.splitext(url)[1]
+            if ext in FINGERPRINTED:
+                continue
+            if ext == ".html":
+                body = _LOCAL_REF.sub(
+                    lambda m: m.group(1) + fingerprints.get(m.group(2), m.group(2)) + m.group(3),
+                    body.decode("utf-8")
+                ).encode("utf-8")
+            mimetype = mimetypes.guess_type(url)[0] or "application/octet-stream"
+            assets[url] = Asset(body, mimetype, REVALIDATE)
+
+        self.assets, self.fingerprints = assets, fingerprints
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def stats(self):
+        unique = {id(a): a for a in self.assets.values()}.values()
+        return {
+            "assets": len(self.assets),
+            "fingerprinted": len(self.fingerprints),
+            "brotli": brotli is not None,
+            "identity_bytes": sum(len(a.variants["identity"]) for a in unique),
+            "gzip_bytes": sum(len(a.variants.get("gzip", a.variants["identity"])) for a in unique),
+        }
+
+
+def send_asset(index, path):
+    """Response for path from the index, or None if it is not an indexed asset"""
+    asset = index.get(path)
+    if asset is None:
+        return None
+
+    # Highest client quality wins; ties go to the smallest variant (br, then gzip)
+    offered = [e for e in ("br", "gzip") if e in asset.variants] + ["identity"]
+    encoding = request.accept_encodings.best_match(offered, default="identity")
+
+    headers = {"Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+    etag = asset.etag(encoding)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    response = Response(asset.variants[encoding], mimetype=asset.mimetype, headers=headers)
+    response.set_etag(etag)
+    return response
+
+
+def _page_requests(index, page):
+    """URL paths a browser fetches from this server for one page load"""
+    body = index.get(page).variants["identity"].decode("utf-8")
+    return [page] + [m.group(2) for m in _LOCAL_REF.finditer(body) if index.get(m.group(2))]
+
+
+def benchmark(root, pages, rounds=200):
+    """Compare send_from_directory with the asset index: requests/s and bytes per page load"""
+    import time
+    from flask import Flask, send_from_directory
+
+    def legacy_app():
+        app = Flask("legacy")
+
+        @app.route("/<path:path>")
+        def serve(path):
+            directory = ASSET_DIRS.get(os.path.splitext(path)[1])
+            return send_from_directory(os.path.join(root, directory) if directory else root, path)
+        return app
+
+    def indexed_app(index):
+        app = Flask("indexed")
+
+        @app.route("/<path:path>")
+        def serve(path):
+            return send_asset(index, path) or ("Not found", 404)
+        return app
+
+    index = AssetIndex(root)
+    plain_names = {hashed: plain for plain, hashed in index.fingerprints.items()}
+    headers = {"Accept-Encoding": "gzip, deflate, br"}
+
+    for name, app, legacy in [("send_from_directory", legacy_app(), True), ("asset index", indexed_app(index), False)]:
+        client = app.test_client()
+        print(f"\n{name}")
+        for page in pages:
+            urls = _page_requests(index, page)
+            if legacy:
+                # The unprocessed pages reference the plain names
+                urls = [plain_names.get(url, url) for url in urls]
+
+            def load(cache):
+                """One page load against a browser cache dict (url -> (etag, cache-control))"""
+                sent, made = 0, 0
+                for url in urls:
+                    cached = cache.get(url)
+                    if cached and cached[1] == IMMUTABLE:
+                        continue  # still fresh, the browser does not ask
+                    h = dict(headers)
+                    if cached and cached[0]:
+                        h["If-None-Match"] = cached[0]
+                    r = client.get("/" + url, headers=h)
+                    made += 1
+                    if r.status_code == 200:
+                        sent += len(r.get_data())
+                    cache[url] = (r.headers.get("ETag"), r.headers.get("Cache-Control"))
+                    r.close()
+                return sent, made
+
+            cache = {}
+            first_bytes, first_requests = load(cache)
+            repeat_bytes, repeat_requests = load(cache)
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for url in urls:
+                    client.get("/" + url, headers=headers).close()
+            rps = rounds * len(urls) / (time.perf_counter() - start)
+            print(f"  {page:<16} first load {first_bytes:>6} B / {first_requests} req, "
+                  f"repeat load {repeat_bytes:>6} B / {repeat_requests} req, {rps:>7.0f} req/s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the static asset index and benchmark it")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "src"))
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    index = AssetIndex(args.root)
+    for plain_name, hashed in sorted(index.fingerprints.items()):
+        print(f"{plain_name:<16} -> {hashed}")
+    print(index.stats())
+    benchmark(args.root, sorted(p for p in index.assets if p.endswith(".html")), rounds=args.rounds)
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Streaming speech-to-text engine interface
+One recognizer API for every consumer: feed 16-bit mono PCM with accept(), get back
+partial / final events with word timings. Vosk and Faster-Whisper backends share
+models through model_registry, so each model is loaded once per process.
+
+Events are dicts:
+    {"type": "partial", "text": "hello wor"}
+    {"type": "final", "text": "hello world", "words": [{"word", "start", "end", "conf"}, ...]}
+
+Benchmark a backend on a WAV file:
+    python stt_engine.py answer.wav --engine vosk --chunk 4000
+    python stt_engine.py answer.wav --engine whisper --model-size base
+    python stt_engine.py answer.wav --engine whisper-streaming --realtime
+"""
+
+import abc
+import json
+import time
+import numpy as np
+
+import model_registry
+
+
+class StreamingRecognizer(abc.ABC):
+    """Base interface; backends must implement accept/reset and may override flush"""
+
+    sample_rate = 16000
+
+    @abc.abstractmethod
+    def accept(self, pcm):
+        """Feed int16 PCM bytes; return the list of events this produced"""
+
+    def flush(self):
+        """Force out a final event for any audio still pending"""
+        return []
+
+    @abc.abstractmethod
+    def reset(self):
+        """Drop all state so the recognizer can start a new utterance"""
+
+
+class VoskStreamingRecognizer(StreamingRecognizer):
+    def __init__(self, model, sample_rate=16000, partials=True):
+        from vosk import KaldiRecognizer
+        self.sample_rate = sample_rate
+        self.partials = partials
+        self.recognizer = KaldiRecognizer(model, sample_rate)
+        self.recognizer.SetWords(True)
+        self._last_partial = ""
+
+    def _final(self, raw):
+        result = json.loads(raw)
+        text = result.get("text", "").strip()
+        if not text:
+            return []
+        self._last_partial = ""
+        return [{"type": "final", "text": text, "words": result.get("result", [])}]
+
+    def accept(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            return self._final(self.recognizer.Result())
+        if not self.partials:
+            return []
+        text = json.loads(self.recognizer.PartialResult()).get("partial", "").strip()
+        if not text or text == self._last_partial:
+            return []
+        self._last_partial = text
+        return [{"type": "partial", "text": text}]
+
+    def flush(self):
+        return self._final(self.recognizer.FinalResult())
+
+    def reset(self):
+        self.recognizer.Reset()
+        self._last_partial = ""
+
+
+class WhisperStreamingRecognizer(StreamingRecognizer):
+    """Transcribes fixed, non-overlapping blocks of audio (one final event per block)
+    block_seconds=None buffers everything and decodes only on flush()"""
+
+    def __init__(self, model, sample_rate=16000, block_seconds=1.0, beam_size=1, vad_filter=True):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.block_samples = int(block_seconds * sample_rate) if block_seconds else None
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+        self._pending = []
+        self._pending_samples = 0
+        self._offset = 0.0  # stream time of the first pending sample, for word timings
+
+    def _transcribe(self, audio_np):
+        segments, info = self.model.transcribe(
+            audio_np,
+            language="en",
+            beam_size=self.beam_size,
+            word_timestamps=True,
+            vad_filter=self.vad_filter,
+            vad_parameters=dict(min_silence_duration_ms=500)
+        )
+        words = []
+        text_parts = []
+        for segment in segments:
+            text_parts.append(segment.text)
+            for w in segment.words or []:
+                words.append({"word": w.word.strip(), "start": self._offset + w.start,
+                              "end": self._offset + w.end, "conf": w.probability})
+        return "".join(text_parts).strip(), words
+
+    def _drain(self):
+        audio_np = np.concatenate(self._pending).astype(np.float32) / 32768.0
+        duration = self._pending_samples / self.sample_rate
+        self._pending = []
+        self._pending_samples = 0
+        text, words = self._transcribe(audio_np)
+        self._offset += duration
+        return [{"type": "final", "text": text, "words": words}] if text else []
+
+    def accept(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        self._pending.append(samples)
+        self._pending_samples += len(samples)
+        if self.block_samples is None or self._pending_samples < self.block_samples:
+            return []
+        return self._drain()
+
+    def flush(self):
+        return self._drain() if self._pending_samples else []
+
+    def reset(self):
+        self._pending = []
+        self._pending_samples = 0
+        self._offset = 0.0
+
+
+def _norm(word):
+    return word.lower().strip(" .,!?;:\"'")
+
+
+class WhisperSlidingWindowRecognizer(StreamingRecognizer):
+    """Streaming Faster-Whisper with overlapping windows and local agreement
+
+    Every step_seconds of new audio, the uncommitted window is re-decoded. Words on which
+    two successive hypotheses agree are committed (final event); the rest is a partial.
+    The window is trimmed at the last committed word once it grows past trim_seconds,
+    so each decode only covers recent, still-uncertain audio; with nothing to commit
+    (silence, noise) a window past max_window_seconds is cut back to its last trim_seconds."""
+
+    def __init__(self, model, sample_rate=16000, step_seconds=1.0, trim_seconds=8.0,
+                 max_window_seconds=20.0, beam_size=1, vad_filter=True):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.step_samples = int(step_seconds * sample_rate)
+        self.trim_seconds = trim_seconds
+        self.max_window_seconds = max_window_seconds
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+        self.reset()
+
+    def reset(self):
+        self._audio = np.zeros(0, dtype=np.float32)  # uncommitted window
+        self._window_start = 0.0  # stream time of _audio[0]
+        self._new_samples = 0
+        self._committed = []
+        self._previous = []  # last hypothesis, minus what was committed
+
+    def _hypothesis(self):
+        last_end = self._committed[-1]["end"] if self._committed else 0.0
+        # Committed text is fed back as the prompt so the decoder keeps its context
+        prompt = " ".join(w["word"] for w in self._committed[-30:]) or None
+        segments, info = self.model.transcribe(
+            self._audio,
+            language="en",
+            beam_size=self.beam_size,
+            word_timestamps=True,
+            initial_prompt=prompt,
+            condition_on_previous_text=False,
+            vad_filter=self.vad_filter,
+            vad_parameters=dict(min_silence_duration_ms=500)
+        )
+        words = []
+        for segment in segments:
+            for w in segment.words or []:
+                start = self._window_start + w.start
+                # Skip words that were already committed from the overlapping part of the window
+                if start < last_end - 0.1:
+                    continue
+                words.append({"word": w.word.strip(), "start": start,
+                              "end": self._window_start + w.end, "conf": w.probability})
+        # Timestamps jitter, so also drop a repeated n-gram at the seam with committed text
+        for n in range(min(5, len(self._committed), len(words)), 0, -1):
+            if [_norm(w["word"]) for w in self._committed[-n:]] == [_norm(w["word"]) for w in words[:n]]:
+                words = words[n:]
+                break
+        return words
+
+    def _trim(self, force=False):
+        window = len(self._audio) / self.sample_rate
+        if self._committed and (window >= self.trim_seconds or force):
+            self._cut(int((self._committed[-1]["end"] - self._window_start) * self.sample_rate))
+        if len(self._audio) > self.max_window_seconds * self.sample_rate:
+            # Nothing committed to cut at (silence or noise): keep only the recent tail, so
+            # each decode stays bounded instead of re-decoding an ever longer window
+            self._cut(len(self._audio) - int(self.trim_seconds * self.sample_rate))
+
+    def _cut(self, samples):
+        if samples > 0:
+            self._audio = self._audio[samples:]
+            self._window_start += samples / self.sample_rate
+
+    def _events(self, committed, pending):
+        events = []
+        if committed:
+            self._committed.extend(committed)
+            events.append({"type": "final", "text": " ".join(w["word"] for w in committed), "words": committed})
+        if pending:
+            events.append({"type": "partial", "text": " ".join(w["word"] for w in pending)})
+        return events
+
+    def accept(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        self._audio = np.concatenate((self._audio, samples))
+        self._new_samples += len(samples)
+        if self._new_samples < self.step_samples:
+            return []
+        self._new_samples = 0
+
+        words = self._hypothesis()
+        agreed = 0
+        while (agreed < len(words) and agreed < len(self._previous)
+               and _norm(words[agreed]["word"]) == _norm(self._previous[agreed]["word"])):
+            agreed += 1
+        committed, pending = words[:agreed], words[agreed:]
+
+        if len(self._audio) / self.sample_rate > self.max_window_seconds:
+            # No agreement for too long: commit what we have rather than grow without bound
+            committed, pending = words, []
+        self._previous = pending
+        events = self._events(committed, pending)
+        self._trim(force=not pending and bool(committed))
+        return events
+
+    def flush(self):
+        if not len(self._audio):
+            return []
+        events = self._events(self._hypothesis(), [])
+        self._previous = []
+        self._window_start += len(self._audio) / self.sample_rate
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._new_samples = 0
+        return events
+
+    def skip(self, seconds):
+        """Account for audio lost upstream: close out the window, then move the stream clock past the gap"""
+        events = self.flush()
+        self._window_start += seconds
+        return events
+
+
+def create_recognizer(engine="vosk", sample_rate=16000, model_path="model", model_size="base", **kwargs):
+    """Build a streaming recognizer on a registry-shared model"""
+    if engine == "vosk":
+        return VoskStreamingRecognizer(model_registry.get_vosk_model(model_path), sample_rate, **kwargs)
+    if engine == "whisper":
+        return WhisperStreamingRecognizer(model_registry.get_whisper_model(model_size), sample_rate, **kwargs)
+    if engine == "whisper-streaming":
+        return WhisperSlidingWindowRecognizer(model_registry.get_whisper_model(model_size), sample_rate, **kwargs)
+    raise ValueError(f"Unknown STT engine '{engine}'")
+
+
+def run_file(recognizer, pcm, chunk_samples):
+    """Stream PCM through a recognizer as fast as possible; return (events, timing dict)"""
+    step = chunk_samples * 2
+    events = []
+    first_event = None
+    start = time.perf_counter()
+    for i in range(0, len(pcm), step):
+        produced = recognizer.accept(pcm[i:i + step])
+        if produced and first_event is None:
+            first_event = time.perf_counter() - start
+        events.extend(produced)
+    events.extend(recognizer.flush())
+    elapsed = time.perf_counter() - start
+    audio_seconds = len(pcm) / 2 / recognizer.sample_rate
+    return events, {
+        "audio_seconds": round(audio_seconds, 2),
+        "decode_seconds": round(elapsed, 3),
+        "real_time_factor": round(elapsed / audio_seconds, 3) if audio_seconds else None,
+        "first_event_s": round(first_event, 3) if first_event is not None else None,
+    }
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length (case and punctuation ignored)"""
+    ref = [w for w in map(_norm, reference.split()) if w]
+    hyp = [w for w in map(_norm, hypothesis.split()) if w]
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
+
+
+def simulate_realtime(recognizer, pcm, chunk_samples, events_out=None):
+    """Replay PCM as if it arrived live and measure how long after a word is spoken it gets committed
+
+    A chunk can only be processed once it has "arrived" (its end time in the stream) and the
+    recognizer has finished the previous one, so slow decoding shows up as growing latency.
+    Events produced are appended to events_out if given."""
+    step = chunk_samples * 2
+    free_at = 0.0
+    latencies = []
+    first_event = None
+    decode_seconds = 0.0
+    cpu_start = time.process_time()
+
+    def record(events, done_at):
+        nonlocal first_event
+        if events and first_event is None:
+            first_event = done_at
+        if events_out is not None:
+            events_out.extend(events)
+        for event in events:
+            if event["type"] == "final":
+                latencies.extend(done_at - w["end"] for w in event.get("words", []))
+
+    for i in range(0, len(pcm), step):
+        chunk = pcm[i:i + step]
+        arrival = (i + len(chunk)) / 2 / recognizer.sample_rate
+        start = max(free_at, arrival)
+        t0 = time.perf_counter()
+        events = recognizer.accept(chunk)
+        elapsed = time.perf_counter() - t0
+        decode_seconds += elapsed
+        free_at = start + elapsed
+        record(events, free_at)
+    t0 = time.perf_counter()
+    events = recognizer.flush()
+    elapsed = time.perf_counter() - t0
+    decode_seconds += elapsed
+    free_at += elapsed
+    record(events, free_at)
+
+    audio_seconds = len(pcm) / 2 / recognizer.sample_rate
+    latencies.sort()
+    return {
+        "words_committed": len(latencies),
+        "mean_commit_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p95_commit_latency_s": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None,
+        # Stream time at which the first partial or final result was available
+        "first_event_s": round(first_event, 3) if first_event is not None else None,
+        "decode_seconds": round(decode_seconds, 4),
+        "real_time_factor": round(decode_seconds / audio_seconds, 3) if audio_seconds else None,
+        # Share of one core used while keeping up with the audio
+        "cpu_percent": round(100 * (time.process_time() - cpu_start) / audio_seconds, 1) if audio_seconds else None,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+    import wave
+
+    parser = argparse.ArgumentParser(description="Benchmark a streaming STT backend on a 16 kHz mono WAV")
+    parser.add_argument("wav")
+    parser.add_argument("--engine", default="vosk", choices=["vosk", "whisper", "whisper-streaming"])
+    parser.add_argument("--model-path", default="model")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--chunk", type=int, default=4000, help="samples per accept() call")
+    parser.add_argument("--realtime", action="store_true",
+                        help="replay at real-time pace and report commit latency and CPU use")
+    args = parser.parse_args()
+
+    with wave.open(args.wav, "rb") as wf:
+        pcm = wf.readframes(wf.getnframes())
+        rate = wf.getframerate()
+
+    recognizer = create_recognizer(args.engine, rate, model_path=args.model_path, model_size=args.model_size)
+    if args.realtime:
+        print(json.dumps(simulate_realtime(recognizer, pcm, args.chunk), indent=2))
+        raise SystemExit(0)
+    events, timing = run_file(recognizer, pcm, args.chunk)
+    print(" ".join(e["text"] for e in events if e["type"] == "final"))
+    timing["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(timing, indent=2))
@@ -0,0 +1,104 @@
+// Microphone chunk encoders (float32 samples -> the negotiated socket encoding). Shared by
+// capture-worklet.js, which encodes on the audio rendering thread, and the ScriptProcessor
+// fallback in interview.js for browsers without AudioWorklet.
+
+// G.711 µ-law: 8 bits per sample (matches audio_codecs.encode_mulaw)
+const MULAW_SEGMENT_END = [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF];
+
+function encodeMulaw(pcm) {
+    const out = new Uint8Array(pcm.length);
+    for (let i = 0; i < pcm.length; i++) {
+        let value = pcm[i] >> 2;
+        const mask = value < 0 ? 0x7F : 0xFF;
+        value = Math.min(Math.abs(value), 8159) + 0x21;
+        let segment = 0;
+        while (segment < 8 && value > MULAW_SEGMENT_END[segment]) segment++;
+        const code = segment < 8 ? (segment << 4) | ((value >> (segment + 1)) & 0x0F) : 0x7F;
+        out[i] = (code ^ mask) & 0xFF;
+    }
+    return out;
+}
+
+// IMA-ADPCM: 4 bits per sample in 36-byte blocks of 65 samples (matches audio_codecs.py)
+const ADPCM_BLOCK_BYTES = 36;
+const ADPCM_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767
+];
+const ADPCM_INDEX_ADJUST = [-1, -1, -1, -1, 2, 4, 6, 8];
+function encodeImaAdpcm(pcm, state) {
+    const perBlock = 1 + (ADPCM_BLOCK_BYTES - 4) * 2;
+    const blocks = Math.ceil(pcm.length / perBlock);
+    const out = new Uint8Array(blocks * ADPCM_BLOCK_BYTES);
+    let pos = 0;
+    for (let start = 0; start < pcm.length; start += perBlock) {
+        let coded = Math.min(perBlock, pcm.length - start) - 1;
+        coded -= coded % 2;  // whole bytes only; an odd leftover sample is dropped
+        let predictor = pcm[start];
+        out[pos] = predictor & 0xFF;
+        out[pos + 1] = (predictor >> 8) & 0xFF;
+        out[pos + 2] = state.adpcmIndex;
+        out[pos + 3] = 0;
+        pos += 4;
+        for (let i = 0; i < coded; i++) {
+            const step = ADPCM_STEPS[state.adpcmIndex];
+            let diff = pcm[start + 1 + i] - predictor;
+            let code = diff < 0 ? 8 : 0;
+            diff = Math.abs(diff);
+            if (diff >= step) { code |= 4; diff -= step; }
+            if (diff >= step >> 1) { code |= 2; diff -= step >> 1; }
+            if (diff >= step >> 2) { code |= 1; }
+            
+            let delta = step >> 3;
+            if (code & 4) delta += step;
+            if (code & 2) delta += step >> 1;
+            if (code & 1) delta += step >> 2;
+            predictor += (code & 8) ? -delta : delta;
+            predictor = Math.max(-32768, Math.min(32767, predictor));
+            state.adpcmIndex = Math.max(0, Math.min(88, state.adpcmIndex + ADPCM_INDEX_ADJUST[code & 7]));
+            
+            if (i % 2 === 0) {
+                out[pos] = code;
+            } else {
+                out[pos++] |= code << 4;
+            }
+        }
+    }
+    return out.slice(0, pos);
+}
+
+// Float32 samples in [-1, 1] -> Int16 PCM, for the encodings that need integer samples
+function floatToPcm16(samples) {
+    const pcm = new Int16Array(samples.length);
+    for (let i = 0; i < samples.length; i++) {
+        const s = Math.max(-1, Math.min(1, samples[i]));
+        pcm[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+    }
+    return pcm;
+}
+
+// One per recording; ADPCM's step index is carried across chunks so each block starts well fitted
+class AudioChunkEncoder {
+    constructor(encoding) {
+        this.encoding = encoding;
+        this.state = { adpcmIndex: 0 };
+    }
+
+    // Returns a new typed array, so its buffer can be transferred or sent as is
+    encode(samples) {
+        // The caller reuses its sample buffer, so float32 is sent as a copy
+        if (this.encoding === 'float32') return samples.slice();
+        const pcm = floatToPcm16(samples);
+        if (this.encoding === 'adpcm') return encodeImaAdpcm(pcm, this.state);
+        if (this.encoding === 'mulaw') return encodeMulaw(pcm);
+        return pcm;
+    }
+}
+
+// Loaded both as a page script and as an AudioWorklet module, whose scope is separate
+globalThis.AudioChunkEncoder = AudioChunkEncoder;
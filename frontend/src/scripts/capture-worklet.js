@@ -0,0 +1,33 @@
+// Microphone capture on the audio rendering thread. Render quanta (128 frames) are gathered
+// into chunks, encoded in the negotiated encoding by AudioChunkEncoder (audio-encoder.js, loaded
+// into this worklet scope first) and the bytes are transferred to the page, which only
+// forwards them to the socket, so encoding costs no main-thread time.
+class CaptureProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        const { encoding, chunkSamples } = options.processorOptions;
+        this.encoder = new globalThis.AudioChunkEncoder(encoding);
+        this.chunk = new Float32Array(chunkSamples);
+        this.filled = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0] && inputs[0][0];
+        if (!input) return true;  // no input connected yet
+        let offset = 0;
+        while (offset < input.length) {
+            const n = Math.min(input.length - offset, this.chunk.length - this.filled);
+            this.chunk.set(input.subarray(offset, offset + n), this.filled);
+            this.filled += n;
+            offset += n;
+            if (this.filled === this.chunk.length) {
+                const bytes = this.encoder.encode(this.chunk).buffer;
+                this.port.postMessage(bytes, [bytes]);
+                this.filled = 0;
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('capture-processor', CaptureProcessor);
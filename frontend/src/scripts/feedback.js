@@ -45,6 +45,15 @@ function escapeHtml(s) {
     .replaceAll("'", "&#039;");
 }
 
+function summarizeTestReport(report) {
+  if (!report || report.error || !report.total) return null;
+  let summary = `${report.passed} of ${report.total} tests passed on the server.`;
+  if (report.complexity) {
+    summary += ` Measured runtime growth suggests ${report.complexity.estimate}.`;
+  }
+  return summary;
+}
+
 function buildMockFeedback(submission) {
   const lang = submission?.language || "python";
   const code = submission?.code || "";
@@ -69,7 +78,8 @@ function buildMockFeedback(submission) {
         time: "See AI feedback",
         space: "See AI feedback",
       },
-      testsSummary: "AI feedback provided below includes analysis of your approach.",
+      testsSummary: summarizeTestReport(submission?.test_report) ||
+        "AI feedback provided below includes analysis of your approach.",
       explanation: aiFeedback,
       referenceSolution:
         lang === "python"
@@ -129,6 +139,8 @@ class Solution:
 
 let SEGMENTS = [];
 let CURRENT_SEGMENT = 0;
+let narrationReady = Promise.resolve(null);  // resolves to the /api/narration response (or null)
+let narrationAudio = null;
 
 function segmentCode(code, language) {
   const lines = code.replace(/\r\n/g, "\n").split("\n");
@@ -269,17 +281,39 @@ function applySegmentHighlight(index, segments) {
   });
 }
 
+// One request for all segment feedback and a single narration audio with per-segment offsets
+async function fetchNarration(segments, language, fullCode) {
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/narration`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        code: fullCode,
+        language: language,
+        segments: segments.map((seg) => ({ start_line: seg.startLine, end_line: seg.endLine }))
+      })
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Narration error:', error);
+    return null;
+  }
+}
+
 async function buildSegmentCards(segments, language, fullCode) {
   const container = document.getElementById("segment-cards");
-  if (!container) return;
+  if (!container) return null;
 
   container.innerHTML = "<div style='padding: 10px; color: #666;'>Generating AI feedback for code segments...</div>";
 
   const lines = fullCode.replace(/\r\n/g, "\n").split("\n");
+  const notesEls = [];
   
   for (let idx = 0; idx < segments.length; idx++) {
     const seg = segments[idx];
-    const segmentCode = lines.slice(seg.startLine - 1, seg.endLine).join("\n");
     
     const card = document.createElement("div");
     card.className = "segment-card";
@@ -300,16 +334,60 @@ async function buildSegmentCards(segments, language, fullCode) {
     card.appendChild(title);
     card.appendChild(linesMeta);
     card.appendChild(notes);
+    card.addEventListener("click", () => goToSegment(idx));
 
     if (idx === 0) {
       container.innerHTML = "";
     }
     container.appendChild(card);
-    
-    // Generate AI feedback for this segment
-    const feedback = await generateSegmentFeedback(segmentCode, idx, segments.length, language);
-    notes.textContent = feedback;
+    notesEls.push(notes);
+  }
+
+  const narration = await fetchNarration(segments, language, fullCode);
+  if (narration) {
+    narration.segments.forEach((seg, idx) => {
+      // null when that segment's feedback failed; it is left out of the narration
+      if (notesEls[idx]) notesEls[idx].textContent = seg.feedback ?? "Unable to generate feedback for this segment.";
+    });
+    return narration.audio_url ? narration : null;
   }
+
+  // Fall back to one feedback request per segment, without narration
+  for (let idx = 0; idx < segments.length; idx++) {
+    const seg = segments[idx];
+    const segmentCode = lines.slice(seg.startLine - 1, seg.endLine).join("\n");
+    notesEls[idx].textContent = await generateSegmentFeedback(segmentCode, idx, segments.length, language);
+  }
+  return null;
+}
+
+function playNarration(narration) {
+  narrationAudio = new Audio(`${BACKEND_URL}${narration.audio_url}`);
+  // Highlight whichever segment is being talked about
+  narrationAudio.ontimeupdate = () => {
+    const t = narrationAudio.currentTime;
+    const idx = narration.segments.findIndex((seg) => seg.start !== null && t >= seg.start && t < seg.end);
+    if (idx !== -1 && idx !== CURRENT_SEGMENT) {
+      CURRENT_SEGMENT = idx;
+      applySegmentHighlight(CURRENT_SEGMENT, SEGMENTS);
+    }
+  };
+  narrationAudio.play().catch((error) => console.error('Narration playback error:', error));
+}
+
+function goToSegment(index) {
+  if (!SEGMENTS.length) return;
+  CURRENT_SEGMENT = Math.max(0, Math.min(SEGMENTS.length - 1, index));
+  console.log(`Moving to segment ${CURRENT_SEGMENT}`);
+  applySegmentHighlight(CURRENT_SEGMENT, SEGMENTS);
+
+  // Jump the narration to the same segment
+  narrationReady.then((narration) => {
+    const seg = narration?.segments[CURRENT_SEGMENT];
+    if (narrationAudio && seg && seg.start !== null) {
+      narrationAudio.currentTime = seg.start;
+    }
+  });
 }
 
 function renderFeedback() {
@@ -362,14 +440,15 @@ function renderFeedback() {
   if (solEl) solEl.textContent = mock.referenceSolution;
 
   // Build and render code segments (async)
-  (async () => {
+  narrationReady = (async () => {
     console.log('Building code segments...');
     SEGMENTS = segmentCode(submission.code || "", submission.language || "python");
     CURRENT_SEGMENT = 0;
     console.log(`Created ${SEGMENTS.length} segments`);
-    await buildSegmentCards(SEGMENTS, submission.language || "python", submission.code || "");
+    const narration = await buildSegmentCards(SEGMENTS, submission.language || "python", submission.code || "");
     renderCodeWithSegments(submission.code || "", SEGMENTS);
     console.log('Code segments rendered');
+    return narration;
   })();
 }
 
@@ -393,20 +472,10 @@ window.addEventListener("DOMContentLoaded", () => {
   console.log('Next button:', next);
   
   if (prev) {
-    prev.addEventListener("click", () => {
-      if (!SEGMENTS.length) return;
-      CURRENT_SEGMENT = Math.max(0, CURRENT_SEGMENT - 1);
-      console.log(`Moving to segment ${CURRENT_SEGMENT}`);
-      applySegmentHighlight(CURRENT_SEGMENT, SEGMENTS);
-    });
+    prev.addEventListener("click", () => goToSegment(CURRENT_SEGMENT - 1));
   }
   if (next) {
-    next.addEventListener("click", () => {
-      if (!SEGMENTS.length) return;
-      CURRENT_SEGMENT = Math.min(SEGMENTS.length - 1, CURRENT_SEGMENT + 1);
-      console.log(`Moving to segment ${CURRENT_SEGMENT}`);
-      applySegmentHighlight(CURRENT_SEGMENT, SEGMENTS);
-    });
+    next.addEventListener("click", () => goToSegment(CURRENT_SEGMENT + 1));
   }
   
   // Play AI feedback TTS when page loads
@@ -414,11 +483,17 @@ window.addEventListener("DOMContentLoaded", () => {
     const submission = JSON.parse(localStorage.getItem("oa_last_submission") || '{}');
     const aiFeedback = submission?.ai_feedback;
     
+    let overall = Promise.resolve();
     if (aiFeedback) {
       console.log('AI feedback found, playing TTS immediately...');
-      playFeedbackTTS(aiFeedback);
+      overall = playFeedbackTTS(aiFeedback).catch(() => {});
     } else {
       console.log('No AI feedback found in localStorage');
     }
+    
+    // Then walk through the segments
+    Promise.all([narrationReady, overall]).then(([narration]) => {
+      if (narration) playNarration(narration);
+    });
   }, 500); // Wait 0.5 seconds for page to settle
 });
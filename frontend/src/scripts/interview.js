@@ -10,11 +10,43 @@ let totalQuestions = 0;  // Will be set from backend
 let currentQuestionNumber = 0;
 let interviewCompleted = false;  // Flag to prevent duplicate completion calls
 
+// Microphone encodings this client can send, in order of preference; the server picks one on
+// connect. ADPCM (4 bits per sample at the native rate) comes first. ?audio=float32 opts in to
+// sending the Web Audio samples as is: no per-sample work here, but about 1.5 Mbit/s at 48 kHz,
+// and only if the server's AUDIO_ENCODINGS allows it
+const AUDIO_ENCODINGS = new URLSearchParams(window.location.search).get('audio') === 'float32'
+    ? ['float32', 'adpcm', 'mulaw', 'pcm16']
+    : ['adpcm', 'mulaw', 'pcm16'];
+let audioEncoding = 'pcm16';
+
+// Audio is captured at the sound card's native rate, declared on connect and resampled to
+// 16 kHz by the server; if the server does not accept the rate it answers with 16000
+const NATIVE_RATE = nativeSampleRate();
+let audioRate = 16000;
+
+function nativeSampleRate() {
+    const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+    const probe = new AudioContextClass();
+    const rate = probe.sampleRate;
+    probe.close();
+    return rate;
+}
+
+// After an answer the server pushes the reaction and the next question with their audio
+// (turn_reaction / turn_question); ?transition=legacy keeps the fetch-per-step flow
+const USE_TURN_TRANSITION = new URLSearchParams(window.location.search).get('transition') !== 'legacy';
+let reactionPlayback = Promise.resolve();
+let turnClock = null;  // timestamps of the current answer -> reaction -> question transition
+
 // Initialize Socket.IO
-socket = io(BACKEND_URL);
+socket = io(BACKEND_URL, {
+    auth: { audio_encodings: AUDIO_ENCODINGS, audio_rate: NATIVE_RATE, turn_transition: USE_TURN_TRANSITION }
+});
 
 socket.on('connected', (data) => {
-    console.log('Connected to server');
+    audioEncoding = data.audio_encoding || 'pcm16';
+    audioRate = data.audio_rate || 16000;
+    console.log(`Connected to server (audio encoding: ${audioEncoding}, ${audioRate} Hz)`);
     playIntroduction();
 });
 
@@ -58,7 +90,7 @@ socket.on('reaction', async (data) => {
     // Play TTS and wait for it to finish
     if (data.has_audio) {
         try {
-            await playTTS(data.reaction);
+            await playTTS(data.reaction, 'reaction');
         } catch (error) {
             console.error('Reaction TTS error:', error);
         }
@@ -86,8 +118,38 @@ socket.on('reaction', async (data) => {
     }, 1000);
 });
 
+socket.on('turn_reaction', (data) => {
+    const reactionCard = document.getElementById('reactionCard');
+    const reactionText = document.getElementById('reactionText');
+    
+    reactionText.textContent = '💬 ' + data.reaction;
+    reactionCard.style.display = 'block';
+    
+    reactionPlayback = playAudioData(data.audio, 'reaction').catch((error) => {
+        console.error('Reaction audio error:', error);
+    });
+});
+
+socket.on('turn_question', async (data) => {
+    // The question follows the reaction, never talks over it
+    await reactionPlayback;
+    document.getElementById('reactionCard').style.display = 'none';
+    
+    if (interviewCompleted) {
+        return;
+    }
+    if (data.completed) {
+        console.log(`Completed all ${totalQuestions} questions, moving to code review`);
+        interviewCompleted = true;
+        completeInterview();
+        return;
+    }
+    await showQuestion(data, () => playAudioData(data.audio, 'question'));
+});
+
 socket.on('auto_submit', (data) => {
     console.log('Auto-submit triggered by silence detection');
+    turnClock = { answeredAt: performance.now() };
     console.log('Answer submitted:', data.answer);
     
     // Stop recording
@@ -162,6 +224,15 @@ async function getNextQuestion() {
             return;
         }
         
+        await showQuestion(data, () => playTTS(data.question, 'question'));
+    } catch (error) {
+        console.error('Failed to get question:', error);
+        updateStatus(`Failed to load question: ${error.message}`, 'error');
+    }
+}
+
+async function showQuestion(data, playQuestion) {
+    try {
         currentQuestion = data;
         currentQuestionNumber = data.question_number;
         
@@ -190,7 +261,7 @@ async function getNextQuestion() {
         // Play question TTS and wait for it to finish before enabling recording
         console.log('Playing question TTS...');
         try {
-            await playTTS(data.question);
+            await playQuestion();
             console.log('Question TTS finished');
             // Add a small pause after question finishes
             await new Promise(resolve => setTimeout(resolve, 500));
@@ -207,12 +278,12 @@ async function getNextQuestion() {
             recordBtn.textContent = 'Answer';
         }
     } catch (error) {
-        console.error('Failed to get question:', error);
-        updateStatus(`Failed to load question: ${error.message}`, 'error');
+        console.error('Failed to show question:', error);
+        updateStatus(`Failed to show question: ${error.message}`, 'error');
     }
 }
 
-async function playTTS(text) {
+async function playTTS(text, label) {
     try {
         console.log('Generating TTS for:', text.substring(0, 50) + '...');
         const response = await fetch(`${BACKEND_URL}/api/tts`, {
@@ -228,27 +299,62 @@ async function playTTS(text) {
         const audioBlob = await response.blob();
         console.log('TTS audio received, size:', audioBlob.size);
         
-        const audioUrl = URL.createObjectURL(audioBlob);
-        const audio = new Audio(audioUrl);
-        
-        // Return a promise that resolves when audio finishes playing
-        return new Promise((resolve, reject) => {
-            audio.onended = () => {
-                console.log('TTS playback finished');
-                resolve();
-            };
-            audio.onerror = (error) => {
-                console.error('Audio playback error:', error);
-                reject(error);
-            };
-            audio.play().catch(reject);
-        });
+        return playAudioElement(new Audio(URL.createObjectURL(audioBlob)), label);
     } catch (error) {
         console.error('TTS playback error:', error);
         throw error;
     }
 }
 
+function playAudioData(bytes, label) {
+    // Audio pushed over the socket arrives as an ArrayBuffer (null if synthesis failed)
+    if (!bytes) {
+        markPlayback(label, 0);
+        return Promise.resolve();
+    }
+    const audioBlob = new Blob([bytes], { type: 'audio/mpeg' });
+    return playAudioElement(new Audio(URL.createObjectURL(audioBlob)), label);
+}
+
+// Return a promise that resolves when audio finishes playing
+function playAudioElement(audio, label) {
+    return new Promise((resolve, reject) => {
+        audio.onplaying = () => markPlayback(label, audio.duration * 1000);
+        audio.onended = () => {
+            console.log('TTS playback finished');
+            URL.revokeObjectURL(audio.src);
+            resolve();
+        };
+        audio.onerror = (error) => {
+            console.error('Audio playback error:', error);
+            reject(error);
+        };
+        audio.play().catch(reject);
+    });
+}
+
+// Dead air after an answer: time until the reaction and the next question start playing
+function markPlayback(label, durationMs) {
+    if (!turnClock) return;
+    const now = performance.now();
+    if (label === 'reaction' && turnClock.reactionAt === undefined) {
+        turnClock.reactionAt = now;
+        turnClock.reactionMs = durationMs;
+    } else if (label === 'question') {
+        const metrics = {
+            session_id: sessionId,
+            question_number: currentQuestionNumber,
+            mode: USE_TURN_TRANSITION ? 'push' : 'legacy',
+            answer_to_reaction_ms: turnClock.reactionAt !== undefined ? Math.round(turnClock.reactionAt - turnClock.answeredAt) : null,
+            answer_to_question_ms: Math.round(now - turnClock.answeredAt),
+            reaction_audio_ms: Number.isFinite(turnClock.reactionMs) ? Math.round(turnClock.reactionMs) : null
+        };
+        console.log('Turn transition:', metrics);
+        socket.emit('turn_metrics', metrics);
+        turnClock = null;
+    }
+}
+
 async function toggleRecording() {
     if (!isRecording) {
         await startRecording();
@@ -262,7 +368,6 @@ async function startRecording() {
         const stream = await navigator.mediaDevices.getUserMedia({ 
             audio: {
                 channelCount: 1,
-                sampleRate: 16000,
                 echoCancellation: true,
                 noiseSuppression: true,
                 autoGainControl: true
@@ -271,39 +376,53 @@ async function startRecording() {
         
         console.log('Microphone access granted');
         
-        // Use AudioContext for proper audio processing
-        const audioContext = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: 16000 });
+        // Capture at the native rate unless the server only accepted 16 kHz
+        const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+        const audioContext = audioRate === NATIVE_RATE ? new AudioContextClass() : new AudioContextClass({ sampleRate: audioRate });
         const source = audioContext.createMediaStreamSource(stream);
-        const processor = audioContext.createScriptProcessor(4096, 1, 1);
-        
-        source.connect(processor);
-        processor.connect(audioContext.destination);
+        // ~170 ms per message at 48 kHz, 256 ms at 16 kHz
+        const chunkSamples = audioContext.sampleRate > 32000 ? 8192 : 4096;
+        // Only named per chunk if the context did not open at the declared rate
+        const chunkRate = audioContext.sampleRate !== audioRate ? audioContext.sampleRate : undefined;
         
         let chunkCount = 0;
-        processor.onaudioprocess = (e) => {
+        const sendChunk = (bytes) => {
             if (!isRecording) return;
             
-            const inputData = e.inputBuffer.getChannelData(0);
-            
-            // Convert Float32Array to Int16Array (PCM 16-bit)
-            const pcmData = new Int16Array(inputData.length);
-            for (let i = 0; i < inputData.length; i++) {
-                const s = Math.max(-1, Math.min(1, inputData[i]));
-                pcmData[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
-            }
-            
             chunkCount++;
             if (chunkCount % 10 === 0) {
                 console.log(`Sent ${chunkCount} audio chunks`);
             }
             
-            // Send PCM data to server
+            // Send as a binary attachment in the negotiated encoding
             socket.emit('audio_chunk', {
                 session_id: sessionId,
-                audio: Array.from(pcmData)  // Convert to regular array for JSON
+                audio: bytes,
+                rate: chunkRate
             });
         };
         
+        let processor;
+        if (audioContext.audioWorklet) {
+            // Chunking and encoding run on the audio thread; the page only forwards the bytes
+            await audioContext.audioWorklet.addModule('audio-encoder.js');
+            await audioContext.audioWorklet.addModule('capture-worklet.js');
+            processor = new AudioWorkletNode(audioContext, 'capture-processor', {
+                processorOptions: { encoding: audioEncoding, chunkSamples: chunkSamples }
+            });
+            processor.port.onmessage = (e) => sendChunk(e.data);
+        } else {
+            // No AudioWorklet (older browsers, or a page not served from a secure context):
+            // encode in the main-thread callback instead
+            const encoder = new AudioChunkEncoder(audioEncoding);
+            processor = audioContext.createScriptProcessor(chunkSamples, 1, 1);
+            processor.onaudioprocess = (e) => sendChunk(encoder.encode(e.inputBuffer.getChannelData(0)).buffer);
+        }
+        
+        // Connected through to the destination so the browser keeps pulling audio through it
+        source.connect(processor);
+        processor.connect(audioContext.destination);
+        
         // Store for cleanup
         window.audioStream = stream;
         window.audioContext = audioContext;
@@ -415,7 +534,8 @@ async function completeInterview() {
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ 
                 session_id: sessionId, 
-                code: code 
+                code: code,
+                language: submission.language || 'python'
             })
         });
         
@@ -426,8 +546,9 @@ async function completeInterview() {
         const data = await response.json();
         console.log('AI feedback received');
         
-        // Store the AI feedback
+        // Store the AI feedback and test results
         submission.ai_feedback = data.feedback;
+        submission.test_report = data.tests;
         localStorage.setItem('oa_last_submission', JSON.stringify(submission));
         
         // Save session